@@ -0,0 +1,87 @@
+"""POST /api/todos 作成パスのマイクロベンチマーク。
+
+旧経路 (CreateTodoModel 検証 → Todo(**) で再検証 → uuid4 → jsonable_encoder でドキュメント化) と
+現経路 (main._new_todo による Todo 検証 1 回 + ID / 時刻ファクトリ → 直接変換の _to_doc) の 1 件あたりの時間を比較する。
+--e2e 指定時は ASGI クライアント経由の POST (インメモリリポジトリ) のスループットも計測する。
+
+実行:
+    cd backend
+    python benchmarks/bench_create_path.py --ops 20000 --e2e
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from domain.models.todo import Todo  # noqa: E402
+import main as app_main  # noqa: E402
+from infrastructure.repositories.cosmos_todo_repository import _to_doc  # noqa: E402
+
+PAYLOAD = {"title": "買い物", "description": "牛乳とパン", "priority": "normal", "dueDate": "2025-10-01T09:00:00Z", "tags": ["home", "errand"]}
+
+
+def legacy_create(payload: dict) -> dict:
+    body = app_main.CreateTodoModel.model_validate(payload)
+    now = datetime.now(timezone.utc)
+    todo = Todo(
+        id=body.id or str(uuid.uuid4()), title=body.title, description=body.description, priority=body.priority,
+        dueDate=body.dueDate, tags=body.tags, completed=False, createdAt=now, updatedAt=now,
+    )
+    return {**jsonable_encoder(todo.model_dump()), "priorityRank": 1}
+
+
+def lean_create(payload: dict) -> dict:
+    return _to_doc(app_main._new_todo(payload))
+
+
+def per_op_us(fn, ops: int) -> float:
+    for _ in range(min(ops, 1000)):  # ウォームアップ
+        fn(PAYLOAD)
+    start = time.perf_counter()
+    for _ in range(ops):
+        fn(PAYLOAD)
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+async def e2e(ops: int, concurrency: int) -> float:
+    from httpx import AsyncClient
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app_main.reset_readiness()
+    async with AsyncClient(app=app_main.app, base_url="http://bench") as ac:
+        async def worker(n: int):
+            for _ in range(n):
+                r = await ac.post("/api/todos", json=PAYLOAD)
+                assert r.status_code == 201, r.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(ops // concurrency) for _ in range(concurrency)))
+        return (ops // concurrency) * concurrency / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--e2e", action="store_true", help="ASGI 経由の POST スループットも計測")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    legacy = per_op_us(legacy_create, args.ops)
+    lean = per_op_us(lean_create, args.ops)
+    print(f"python={sys.version.split()[0]} ops={args.ops}")
+    print(f"{'path':>8} {'us/op':>8}")
+    print(f"{'legacy':>8} {legacy:>8.2f}")
+    print(f"{'lean':>8} {lean:>8.2f}  ({legacy / lean:.2f}x)")
+    if args.e2e:
+        print(f"e2e POST /api/todos: {asyncio.run(e2e(args.ops // 10, args.concurrency)):,.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""InMemoryTodoRepository のロック競合ベンチマーク。
+
+スレッド数を変えて read-modify-write (update) + get の混在負荷を流し、
+シャード分割 (stripes=64) と単一シャード (stripes=1: 全 Todo が 1 本のロック / 辞書を共有) のスループットを比較する。
+
+実行:
+    cd backend
+    python benchmarks/bench_repo_contention.py --threads 1 2 4 8 --ops 20000
+
+注意:
+  - 通常の CPython (GIL あり) では純 Python 処理はコア数に比例してスケールしない。
+    コア方向のスケールを確認する場合は free-threaded ビルド (python3.13t 等, PYTHON_GIL=0) で実行する。
+  - GIL 環境でもストライピング側が単一ロックより大きく劣化しないこと (競合時の待ち) の確認に使える。
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from domain.models.todo import Todo  # noqa: E402
+from infrastructure.repositories.in_memory_todo_repository import InMemoryTodoRepository  # noqa: E402
+
+
+def _seed(repo: InMemoryTodoRepository, n: int) -> None:
+    now = datetime.now(timezone.utc)
+    for i in range(n):
+        repo.add(Todo(id=f"b-{i}", title=f"t{i}", priority="normal", createdAt=now, updatedAt=now))
+
+
+def _toggle(draft: Todo) -> bool:
+    draft.completed = not draft.completed  # update() が渡すコピーを変更する
+    return True
+
+
+def run(threads: int, ops: int, stripes: int, items: int) -> float:
+    repo = InMemoryTodoRepository(stripes=stripes)
+    _seed(repo, items)
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(seed: int):
+        barrier.wait()
+        for j in range(ops):
+            todo_id = f"b-{(seed * 7919 + j) % items}"
+            if j % 4 == 0:
+                repo.update(todo_id, _toggle)
+            else:
+                repo.get(todo_id)
+
+    ts = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in ts:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in ts:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return threads * ops / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ops", type=int, default=20000, help="スレッドあたりの操作数")
+    parser.add_argument("--items", type=int, default=1024)
+    args = parser.parse_args()
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"python={sys.version.split()[0]} gil={'on' if gil else 'off'} cpus={os.cpu_count()}")
+    print(f"{'threads':>7} {'striped ops/s':>15} {'single-lock ops/s':>18} {'speedup vs 1T':>14}")
+    base = None
+    for n in args.threads:
+        striped = run(n, args.ops, stripes=64, items=args.items)
+        single = run(n, args.ops, stripes=1, items=args.items)
+        base = base or striped
+        print(f"{n:>7} {striped:>15,.0f} {single:>18,.0f} {striped / base:>13.2f}x")
+
+
+if __name__ == "__main__":
+    main()
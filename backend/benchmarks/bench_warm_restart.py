@@ -0,0 +1,73 @@
+"""DurableInMemoryTodoRepository の再起動 (warm start) 時間ベンチマーク。
+
+N 件をスナップショットへ書き出した後、新しいインスタンスで
+  1. warm_start() が戻るまで (= lifespan の起動完了までにかかる時間)
+  2. 展開完了前の最初の get() (スナップショット二分探索)
+  3. バックグラウンド展開完了まで
+を計測する。比較として Todo(**dict) による全件再構築 (検証付き) の時間も表示する。
+
+実行:
+    cd backend
+    python benchmarks/bench_warm_restart.py --items 1000000
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from domain.models.todo import Todo  # noqa: E402
+from infrastructure.repositories.durable_in_memory_todo_repository import DurableInMemoryTodoRepository  # noqa: E402
+from infrastructure.repositories.snapshot_store import SnapshotStore  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1_000_000)
+    args = parser.parse_args()
+    now = datetime.now(timezone.utc)
+
+    with tempfile.TemporaryDirectory() as d:
+        t0 = time.perf_counter()
+        todos = (
+            Todo.model_construct(
+                id=f"todo-{i:08d}", title=f"title {i}", description=None, priority="normal",
+                dueDate=None, tags=["bench"], completed=bool(i % 3 == 0), createdAt=now, updatedAt=now,
+            )
+            for i in range(args.items)
+        )
+        store = SnapshotStore(d)
+        store.write_snapshot(todos, wal_gen=store.rotate())
+        store.close()
+        size = os.path.getsize(os.path.join(d, "snapshot.bin"))
+        print(f"items={args.items:,} snapshot={size / 1e6:.1f} MB write={time.perf_counter() - t0:.2f}s")
+
+        repo = DurableInMemoryTodoRepository(d)
+        t0 = time.perf_counter()
+        repo.warm_start()
+        t_start = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        hit = repo.get(f"todo-{args.items // 2:08d}")
+        t_get = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        repo.list()
+        t_full = time.perf_counter() - t0 + t_start + t_get
+        print(f"warm_start returned in {t_start * 1000:.1f} ms")
+        print(f"first get before materialization: {t_get * 1000:.3f} ms (found={hit is not None})")
+        print(f"background materialization done after {t_full:.2f}s")
+
+        sample = min(args.items, 100_000)
+        payload = dict(id="x", title="t", priority="normal", tags=["bench"], createdAt=now, updatedAt=now)
+        t0 = time.perf_counter()
+        for _ in range(sample):
+            Todo(**payload)
+        per = (time.perf_counter() - t0) / sample
+        print(f"full rebuild via Todo(**dict) (extrapolated): {per * args.items:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Tuple
+
+
+class TagCatalog:
+    """タグごとの未完了 / 完了件数をインクリメンタルに保持する集計ビュー。
+
+    - counts: tag -> [open, completed]
+    - sorted_tags: 前方一致検索用のソート済みタグ配列 (bisect で維持)
+    前方一致は bisect で開始位置を求め、一致が続く間だけ走査するため O(log n + k)。
+    件数は加減算のみで下限クランプしないため、並行更新の差分適用順が入れ替わっても最終値は一致する
+    (一時的な負数は query で 0 扱い)。スレッド安全性は呼び出し側のロックで担保する。
+    """
+
+    def __init__(self):
+        self._counts: Dict[str, List[int]] = {}
+        self._sorted: List[str] = []
+
+    @classmethod
+    def from_counts(cls, rows: Iterable[Tuple[str, bool, int]]) -> TagCatalog:
+        """(tag, completed, count) の行から再構築する。Cosmos 集計クエリ結果の取り込み用。"""
+        catalog = cls()
+        for tag, completed, n in rows:
+            catalog._bump(tag, bool(completed), int(n))
+        return catalog
+
+    def _bump(self, tag: str, completed: bool, delta: int) -> None:
+        entry = self._counts.get(tag)
+        if entry is None:
+            entry = self._counts[tag] = [0, 0]
+            insort(self._sorted, tag)
+        entry[1 if completed else 0] += delta
+        if entry[0] == 0 and entry[1] == 0:
+            del self._counts[tag]
+            pos = bisect_left(self._sorted, tag)
+            if pos < len(self._sorted) and self._sorted[pos] == tag:
+                del self._sorted[pos]
+
+    def add(self, tags: Iterable[str], completed: bool) -> None:
+        """Todo 1 件分のタグを加算。同一 Todo 内の重複タグは 1 件として数える。"""
+        for tag in set(tags or []):
+            self._bump(tag, completed, 1)
+
+    def remove(self, tags: Iterable[str], completed: bool) -> None:
+        """Todo 1 件分のタグを減算。件数 0 になったタグはカタログから除去。"""
+        for tag in set(tags or []):
+            self._bump(tag, completed, -1)
+
+    def move(self, old_tags: Iterable[str], old_completed: bool, new_tags: Iterable[str], new_completed: bool) -> None:
+        """更新前後の差分を反映 (タグ変更 / 完了状態変更)。"""
+        self.remove(old_tags, old_completed)
+        self.add(new_tags, new_completed)
+
+    def query(self, prefix: str | None = None, limit: int | None = None) -> List[dict]:
+        """タグ一覧 (昇順) を返す。prefix 指定時は前方一致のみ。"""
+        start = bisect_left(self._sorted, prefix) if prefix else 0
+        out: List[dict] = []
+        for i in range(start, len(self._sorted)):
+            tag = self._sorted[i]
+            if prefix and not tag.startswith(prefix):
+                break
+            open_n, done_n = self._counts[tag]
+            if open_n <= 0 and done_n <= 0:
+                continue
+            out.append({"tag": tag, "open": max(0, open_n), "completed": max(0, done_n)})
+            if limit and len(out) >= limit:
+                break
+        return out
+
+    def __len__(self) -> int:
+        return len(self._sorted)
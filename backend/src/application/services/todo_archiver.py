@@ -0,0 +1,44 @@
+from __future__ import annotations
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from application.services.todo_service import TodoService
+
+logger = logging.getLogger("todo-api")
+
+
+class TodoArchiver:
+    """完了から retention_days 以上経過した Todo をホット側からコールド層 (アーカイブ) へ移動する。
+
+    完了日時は完了操作で更新される updatedAt で判定する。
+    1 回の run_once() で最大 batch_size 件を「アーカイブへ書き込み → ホット側から削除」の順で移動するため、
+    途中で失敗しても未削除分は次回に再投入される (アーカイブ側は同一 id 後勝ちで冪等)。
+    """
+
+    def __init__(self, service: TodoService, archive: Any, retention_days: float, batch_size: int = 500):
+        self._service = service
+        self._archive = archive
+        self._retention = timedelta(days=retention_days)
+        self._batch = max(1, batch_size)
+        # 観測用カウンタ
+        self.moved_total = 0
+
+    def run_once(self, now: datetime | None = None) -> int:
+        """1 バッチ分を移動し、ホット側から削除した件数を返す。"""
+        cutoff = (now or datetime.now(timezone.utc)) - self._retention
+        candidates = self._service.completed_before(cutoff, limit=self._batch)
+        if not candidates:
+            return 0
+        self._archive.put_many(candidates)
+        moved = sum(1 for todo in candidates if self._service.delete_if_unchanged(todo))
+        self.moved_total += moved
+        return moved
+
+    def run(self, now: datetime | None = None) -> int:
+        """対象が無くなるまでバッチを繰り返す。移動件数の合計を返す。"""
+        total = 0
+        while True:
+            moved = self.run_once(now)
+            total += moved
+            if moved < self._batch:
+                return total
@@ -1,77 +1,331 @@
 from __future__ import annotations
-from typing import List
-from domain.models.todo import Todo
-from domain.repositories.todo_repository import TodoRepository
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Iterator, List, Tuple
+from domain.models.todo import Todo, utc_now
+from domain.models.partition import PartitionScope
+from domain.repositories.todo_repository import TodoRepository, as_repository
+from application.services.tag_catalog import TagCatalog
+from domain.models.todo_sort import SortOrder
+
+class _RebuildGate:
+    """書き込み (共有) とタグカタログ再構築 (排他) の調停。
+
+    再構築は集計 (tag_counts) から設置までの間に確定した書き込みを取りこぼすため、実行中の書き込みの完了を待ち、
+    再構築中に始まる書き込みは設置後まで待たせる。書き込み同士は互いに待たない。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._writers = 0
+        self._rebuilding = 0
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        with self._cond:
+            while self._rebuilding:
+                self._cond.wait()
+            self._writers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writers -= 1
+                if not self._writers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def rebuilding(self) -> Iterator[None]:
+        with self._cond:
+            self._rebuilding += 1
+            while self._writers:
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._rebuilding -= 1
+                self._cond.notify_all()
+
 
 class TodoService:
-    def __init__(self, repo: TodoRepository):
+    def __init__(
+        self,
+        repo: TodoRepository,
+        scope: PartitionScope | None = None,
+        root: TodoService | None = None,
+        max_scopes: int = 1024,
+        max_scoped_catalogs: int = 64,
+    ):
         """サービス層コンストラクタ。
 
         引数:
-            repo: TodoRepository 実装（永続化の抽象）
+            repo: TodoRepository 実装（永続化の抽象。必須メソッドのみの実装は as_repository() で既定実装を補う）
+            scope: テナント / ユーザー範囲 (for_scope() 経由で生成されたサービスのみ)
+            root: 範囲指定なしのサービス (タグカタログ差分の配信元)
+            max_scopes: 範囲別サービスのキャッシュ上限 (LRU で追い出し)
+            max_scoped_catalogs: タグカタログ (差分反映の対象) を保持する範囲数の上限 (LRU で破棄し次回参照で再構築)
+        """
+        self._repo = as_repository(repo)
+        self._scope = scope
+        self._root = root or self
+        # タグ集計は初回参照 (または起動時 rebuild) で構築し、以降は各更新で差分反映
+        self._tags: TagCatalog | None = None
+        self._tags_version: int | None = None  # 構築時点のリポジトリの data_version (共有リポジトリのみ)
+        self._tags_lock = threading.Lock()
+        self._scoped: OrderedDict[PartitionScope, TodoService] = OrderedDict()
+        self._scoped_catalogs: OrderedDict[PartitionScope, TodoService] = OrderedDict()
+        self._scoped_lock = threading.Lock()
+        self._max_scopes = max_scopes
+        self._max_scoped_catalogs = max_scoped_catalogs
+        self._gate = _RebuildGate()  # ルートのものを全範囲で共有
+
+    def for_scope(self, scope: PartitionScope | None) -> TodoService:
+        """テナント / ユーザー範囲に限定したサービスを返す (範囲ごとにキャッシュ)。
+
+        リポジトリの scoped(scope) に委譲 (Cosmos: 単一パーティションクエリ + 正しいキーでの point read、
+        既定は ScopedTodoRepository での絞り込み)。scope が None / 空ならこのサービス自身。
+        キャッシュは max_scopes 件までの LRU (追い出した範囲のタグカタログも破棄)。
+        """
+        if scope is None or scope.is_empty:
+            return self
+        root = self._root
+        evicted: List[TodoService] = []
+        with root._scoped_lock:
+            svc = root._scoped.get(scope)
+            if svc is not None:
+                root._scoped.move_to_end(scope)
+            else:
+                svc = root._scoped[scope] = TodoService(root._repo.scoped(scope), scope=scope, root=root)
+                while len(root._scoped) > root._max_scopes:
+                    old_scope, old = root._scoped.popitem(last=False)
+                    root._scoped_catalogs.pop(old_scope, None)
+                    evicted.append(old)
+        for old in evicted:
+            old._drop_tags()
+        return svc
+
+    def _keep_catalog(self, svc: TodoService) -> None:
+        """範囲別サービスのタグカタログを差分反映の対象に登録 (最近使った max_scoped_catalogs 件のみ)。ルートでのみ呼ぶ。
+
+        キャッシュから追い出し済みのサービスや上限を超えて押し出された範囲のカタログは破棄し、次回参照で再構築する。
         """
-        self._repo = repo
+        dropped: List[TodoService] = []
+        with self._scoped_lock:
+            if self._scoped.get(svc._scope) is not svc:
+                dropped.append(svc)
+            else:
+                self._scoped_catalogs[svc._scope] = svc
+                self._scoped_catalogs.move_to_end(svc._scope)
+                while len(self._scoped_catalogs) > self._max_scoped_catalogs:
+                    dropped.append(self._scoped_catalogs.popitem(last=False)[1])
+        for old in dropped:
+            old._drop_tags()
+
+    def _drop_tags(self) -> None:
+        with self._tags_lock:
+            self._tags = None
+            self._tags_version = None
+
+    def rebuild_tag_catalog(self) -> TagCatalog:
+        """タグカタログを再構築する。
+
+        リポジトリの tag_counts() (Cosmos: 集計クエリ 1 回、既定: list() 全件の走査) から構築する。
+        集計から設置までこのプロセスの書き込みを止める (その間の書き込みが集計にも差分にも入らないのを防ぐ)。
+        """
+        with self._root._gate.rebuilding():
+            version = self._repo.data_version  # 集計より前に読む (他プロセスの集計中の書き込みは次回の再構築で取り込む)
+            catalog = TagCatalog.from_counts(self._repo.tag_counts())
+            with self._tags_lock:
+                self._tags = catalog
+                self._tags_version = version
+        if self._scope is not None:
+            self._root._keep_catalog(self)
+        return catalog
+
+    def tags(self, prefix: str | None = None, limit: int | None = None) -> List[dict]:
+        """タグ一覧 (open / completed 件数付き) を取得。prefix 指定で前方一致。"""
+        catalog = self._tags
+        if catalog is None or self._stale_tags():
+            catalog = self.rebuild_tag_catalog()
+        elif self._scope is not None:
+            self._root._keep_catalog(self)
+        with self._tags_lock:
+            return catalog.query(prefix=prefix, limit=limit)
+
+    def _stale_tags(self) -> bool:
+        """共有リポジトリ (複数ワーカーの mmap 等) で、構築後に他プロセスを含む書き込みがあったか。
+
+        差分反映はこのプロセスの書き込みしか見えないため、変更番号が進んでいれば次の参照で再構築する。
+        """
+        version = self._repo.data_version
+        return version is not None and version != self._tags_version
 
     def create(self, todo: Todo) -> Todo:
         """Todoを新規作成して保存する。重複IDならリポジトリ側が例外を送出。"""
-        return self._repo.add(todo)
+        with self._root._gate.writing():
+            created = self._repo.add(todo)
+            self._root._apply_tags(None, created)
+        return created
+
+    def last_request_charge(self) -> float | None:
+        """このスレッドで直前に実行した書き込みの消費 RU (リポジトリが報告する場合のみ)。"""
+        return self._repo.last_request_charge
+
+    def list(self, order: SortOrder | None = None, limit: int | None = None) -> List[Todo]:
+        """Todo一覧を取得する。
+
+        order / limit 指定時は (field, descending) 順 + id で安定ソートした先頭 limit 件。
+        リポジトリの list_sorted() に委譲 (Cosmos: ORDER BY + TOP、既定: ヒープによる top-N 選択 O(n log k))。
+        """
+        if order is None and limit is None:
+            return self._repo.list()
+        return self._repo.list_sorted(order or [], limit)
 
-    def list(self) -> List[Todo]:
-        """全Todo一覧を取得する。"""
-        return self._repo.list()
+    def due(
+        self,
+        before: datetime | None = None,
+        after: datetime | None = None,
+        completed: bool | None = None,
+    ) -> List[Todo]:
+        """期限範囲 (after <= dueDate < before) の Todo を期限昇順で取得。
+
+        リポジトリの list_due() に委譲 (期限インデックス / 範囲クエリ、既定: list() 全件の走査)。
+        """
+        return self._repo.list_due(before=before, after=after, completed=completed)
 
     def get(self, todo_id: str) -> Todo | None:
         """ID で単一Todoを取得。存在しなければ None。"""
         return self._repo.get(todo_id)
 
+    def completed_before(self, cutoff: datetime, limit: int | None = None) -> List[Todo]:
+        """完了済みかつ最終更新 (= 完了操作) が cutoff より前の Todo を取得 (アーカイブ移動用)。
+
+        リポジトリの list_completed_before() に委譲 (Cosmos: TOP 付きクエリ、既定: list() 全件の走査)。
+        """
+        return self._repo.list_completed_before(cutoff, limit)
+
+    def delete_if_unchanged(self, todo: Todo) -> bool:
+        """todo 取得時点から更新されていなければ削除 (アーカイブ後に再オープン等された Todo はホット側に残す)。
+
+        判定と削除はリポジトリの pop_if() でまとめて行う (InMemory: ストライプロック下、Cosmos: _etag 条件付き削除)。
+        """
+        def unchanged(current: Todo) -> bool:
+            return current.updatedAt == todo.updatedAt and current.completed == todo.completed
+
+        with self._root._gate.writing():
+            before = self._repo.pop_if(todo.id, unchanged)
+            if before is not None:
+                self._root._apply_tags(before, None)
+        return before is not None
+
+    def get_many(self, ids: List[str]) -> Tuple[List[Todo], List[str]]:
+        """複数 ID をまとめて取得。戻り値: (要求順の Todo, 見つからなかった id)。重複 id は 1 件にまとめる。
+
+        リポジトリの get_many() で 1 回で取得 (Cosmos: read_many_items / 1 クエリ, InMemory: 辞書 1 パス、既定: 1 件ずつ get())。
+        """
+        unique = list(dict.fromkeys(ids))
+        found = self._repo.get_many(unique)
+        return [found[i] for i in unique if i in found], [i for i in unique if i not in found]
+
+    def _rmw(self, todo_id: str, change: Callable[[Todo], bool]) -> Todo | None:
+        """read-modify-write を 1 件分実行する。
+
+        リポジトリの update() に委譲 (InMemory: ストライプロック下のアトミック RMW、既定: get → コピーに変更 → save)。
+        change(draft) は変更した場合のみ True を返す。タグカタログ構築済みなら確定時に差分反映。
+        """
+        with self._root._gate.writing():
+            on_commit = self._retag if self._root._catalogs() else None
+            return self._repo.update(todo_id, change, on_commit)
+
+    def _retag(self, before: Todo, after: Todo) -> None:
+        """更新前後でタグ / 完了状態が変わった場合にタグカタログへ差分反映。"""
+        if before.tags == after.tags and before.completed == after.completed:
+            return
+        self._root._apply_tags(before, after)
+
+    def _catalogs(self) -> List[TodoService]:
+        """構築済みタグカタログを持つサービス (自身 + 最近使った範囲別)。ルートでのみ呼ぶ。"""
+        with self._scoped_lock:
+            services = [self, *self._scoped_catalogs.values()]
+        return [svc for svc in services if svc._tags is not None]
+
+    def _apply_tags(self, before: Todo | None, after: Todo | None) -> None:
+        """追加 (before=None) / 更新 / 削除 (after=None) をその Todo を含む全カタログへ反映。ルートでのみ呼ぶ。"""
+        for svc in self._catalogs():
+            scope = svc._scope
+            b = before if before is not None and (scope is None or scope.matches(before)) else None
+            a = after if after is not None and (scope is None or scope.matches(after)) else None
+            if b is None and a is None:
+                continue
+            with svc._tags_lock:
+                catalog = svc._tags
+                if catalog is None:
+                    continue
+                if b is not None and a is not None:
+                    catalog.move(b.tags, b.completed, a.tags, a.completed)
+                elif a is not None:
+                    catalog.add(a.tags, a.completed)
+                else:
+                    catalog.remove(b.tags, b.completed)
+
     def update_partial(self, todo_id: str, **changes) -> Todo | None:
         """指定IDのTodoを部分更新する。
 
         変更可能フィールドのみ適用し、更新があれば updatedAt を現在時刻に更新する。
         存在しなければ None を返す。
         """
-        todo = self._repo.get(todo_id)
-        if not todo:
-            return None
         mutable_fields = {"title", "description", "priority", "dueDate", "tags"}
-        updated = False
-        for k, v in changes.items():
-            if k in mutable_fields and v is not None:
-                setattr(todo, k, v)
-                updated = True
-        if updated:
-            from datetime import datetime, timezone
-            todo.updatedAt = datetime.now(timezone.utc)
-            todo = self._repo.save(todo)
-        return todo
+
+        def change(todo: Todo) -> bool:
+            updated = False
+            for k, v in changes.items():
+                if k in mutable_fields and v is not None:
+                    setattr(todo, k, v)
+                    updated = True
+            if updated:
+                todo.updatedAt = utc_now()
+            return updated
+
+        return self._rmw(todo_id, change)
 
     def complete(self, todo_id: str) -> Todo | None:
         """Todo を完了状態へ。状態が変わった場合のみ updatedAt を更新。
 
         存在しなければ None。
         """
-        todo = self._repo.get(todo_id)
-        if not todo:
-            return None
-        if not todo.completed:
+        def change(todo: Todo) -> bool:
+            if todo.completed:
+                return False
             todo.mark_completed()
-            from datetime import datetime, timezone
-            todo.updatedAt = datetime.now(timezone.utc)
-            todo = self._repo.save(todo)
-        return todo
+            todo.updatedAt = utc_now()
+            return True
+
+        return self._rmw(todo_id, change)
 
     def reopen(self, todo_id: str) -> Todo | None:
         """Todo を未完了状態へ戻す。状態が変わった時のみ updatedAt 更新。"""
-        todo = self._repo.get(todo_id)
-        if not todo:
-            return None
-        if todo.completed:
+        def change(todo: Todo) -> bool:
+            if not todo.completed:
+                return False
             todo.reopen()
-            from datetime import datetime, timezone
-            todo.updatedAt = datetime.now(timezone.utc)
-            todo = self._repo.save(todo)
-        return todo
+            todo.updatedAt = utc_now()
+            return True
+
+        return self._rmw(todo_id, change)
 
     def delete(self, todo_id: str) -> bool:
-        """指定IDのTodoを削除。存在した場合 True、なければ False。"""
-        return self._repo.delete(todo_id)
+        """指定IDのTodoを削除。存在した場合 True、なければ False。
+
+        タグカタログ (いずれかの範囲) 構築済みの場合は減算のため削除前の状態を取得する
+        (リポジトリの pop() で削除と取得を行う。InMemory はアトミック)。
+        """
+        with self._root._gate.writing():
+            if not self._root._catalogs():
+                return self._repo.delete(todo_id)
+            before = self._repo.pop(todo_id)
+            if before is not None:
+                self._root._apply_tags(before, None)
+        return before is not None
@@ -0,0 +1,35 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional
+from domain.models.todo import Todo
+
+
+@dataclass(frozen=True)
+class PartitionScope:
+    """テナント / ユーザー単位のデータ範囲 (Cosmos のパーティションキー値に対応)。
+
+    tenant_id / user_id のうち指定された項目だけで絞り込む。両方 None は「範囲指定なし」(全件)。
+    階層パーティションキー (/tenantId, /userId) では tenant_id のみ指定でもプレフィックス単位の
+    単一パーティション範囲クエリになる。
+    """
+    tenant_id: Optional[str] = None
+    user_id: Optional[str] = None
+
+    @property
+    def is_empty(self) -> bool:
+        return self.tenant_id is None and self.user_id is None
+
+    def matches(self, todo: Todo) -> bool:
+        """todo がこの範囲に属するか。"""
+        return (
+            (self.tenant_id is None or todo.tenantId == self.tenant_id)
+            and (self.user_id is None or todo.userId == self.user_id)
+        )
+
+    def apply(self, todo: Todo) -> Todo:
+        """作成 / 保存する todo にパーティションキー値を付与する (未指定項目は変更しない)。"""
+        if self.tenant_id is not None:
+            todo.tenantId = self.tenant_id
+        if self.user_id is not None:
+            todo.userId = self.user_id
+        return todo
@@ -1,9 +1,29 @@
 from __future__ import annotations
-from pydantic import BaseModel, Field
+import os
+from functools import partial
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, timezone
 
 PRIORITY_PATTERN = "^(low|normal|high|urgent)$"
+# 並び替え用の優先度順位 (昇順 = low → urgent)。Cosmos ドキュメントにも priorityRank として保存
+PRIORITY_RANK = {"low": 0, "normal": 1, "high": 2, "urgent": 3}
+
+
+def to_utc(dt: datetime) -> datetime:
+    """naive datetime を UTC とみなし、aware datetime は UTC へ変換する (比較 / 索引キー用)。"""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+# 書き込み経路用のタイムスタンプ / ID ファクトリ (毎回の import や属性解決を避ける)
+utc_now = partial(datetime.now, timezone.utc)
+
+
+def new_todo_id() -> str:
+    """ランダムな UUID v4 文字列。uuid.uuid4() より軽量 (UUID オブジェクトを経由しない)。"""
+    h = os.urandom(16).hex()
+    return f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{'89ab'[int(h[16], 16) & 3]}{h[17:20]}-{h[20:]}"
 
 class Todo(BaseModel):
     """Todoアイテムを表すドメインモデル。
@@ -14,10 +34,12 @@ class Todo(BaseModel):
         description: 詳細説明（任意）
         priority: 優先度 (low|normal|high|urgent)
         dueDate: 期限日時（任意）
-        tags: タグ配列
+        tags: タグ配列 (重複は最初の出現順に 1 件へまとめる)
         completed: 完了フラグ
         createdAt: 作成日時（UTC）
         updatedAt: 更新日時（UTC）
+        tenantId: テナントID（任意。パーティションキー用）
+        userId: ユーザーID（任意。階層パーティションキーの第 2 階層用）
     振る舞い:
         mark_completed: 完了状態へ遷移
         reopen: 未完了状態へ戻す
@@ -31,6 +53,14 @@ class Todo(BaseModel):
     completed: bool = False
     createdAt: datetime
     updatedAt: datetime
+    tenantId: Optional[str] = None
+    userId: Optional[str] = None
+
+    @field_validator("tags")
+    @classmethod
+    def _distinct_tags(cls, tags: List[str]) -> List[str]:
+        # タグ集計 (TagCatalog / Cosmos の tag_counts) は 1 Todo 内の同一タグを 1 件として数える
+        return list(dict.fromkeys(tags)) if len(tags) > 1 else tags
 
     def mark_completed(self) -> Todo:
         """Todoを完了状態にする。
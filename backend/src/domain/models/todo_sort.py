@@ -0,0 +1,84 @@
+from __future__ import annotations
+import heapq
+from typing import Iterable, List, Tuple
+from domain.models.todo import Todo, PRIORITY_RANK, to_utc
+
+# sort= で指定可能なフィールド
+SORTABLE_FIELDS = ("priority", "dueDate", "createdAt", "updatedAt", "title")
+
+SortOrder = List[Tuple[str, bool]]  # (field, descending)
+
+
+class InvalidSortError(ValueError):
+    def __init__(self, field: str):
+        super().__init__(f"unsupported sort field: {field}")
+        self.field = field
+
+
+def parse_sort(spec: str | None) -> SortOrder:
+    """`priority,-dueDate,createdAt` 形式を [(field, descending), ...] へ変換。
+
+    未知のフィールドは InvalidSortError。空要素は無視。
+    """
+    order: SortOrder = []
+    for raw in (spec or "").split(","):
+        raw = raw.strip()
+        if not raw:
+            continue
+        desc = raw.startswith("-")
+        name = raw.lstrip("+-")
+        if name not in SORTABLE_FIELDS:
+            raise InvalidSortError(name)
+        order.append((name, desc))
+    return order
+
+
+class _Reversed:
+    """降順比較用ラッパ (文字列など符号反転できない値向け)。"""
+    __slots__ = ("v",)
+
+    def __init__(self, v):
+        self.v = v
+
+    def __lt__(self, other: _Reversed) -> bool:
+        return other.v < self.v
+
+    def __eq__(self, other) -> bool:
+        return self.v == other.v
+
+
+def _field_key(todo: Todo, name: str, desc: bool):
+    """1 フィールド分の比較キー。None は昇順で先頭 (Cosmos の null 順序と揃える)。"""
+    if name == "priority":
+        v = PRIORITY_RANK.get(todo.priority, -1)
+    else:
+        v = getattr(todo, name)
+    if v is None:
+        present, v = 0, 0
+    else:
+        present = 1
+        if name in ("dueDate", "createdAt", "updatedAt"):
+            v = to_utc(v).timestamp()
+    if not desc:
+        return (present, v)
+    if isinstance(v, str):
+        return (-present, _Reversed(v))
+    return (-present, -v)
+
+
+def sort_key(order: SortOrder):
+    """Todo の複合比較キー関数。末尾に id を加え全順序 (安定ページング用) にする。"""
+    def key(todo: Todo):
+        return tuple(_field_key(todo, name, desc) for name, desc in order) + (todo.id,)
+    return key
+
+
+def top_n(todos: Iterable[Todo], order: SortOrder, limit: int | None = None) -> List[Todo]:
+    """order で並べた先頭 limit 件を返す。
+
+    limit 指定時はヒープによる部分選択 (O(n log k))、未指定時は全体ソート。
+    """
+    key = sort_key(order)
+    if limit is None:
+        return sorted(todos, key=key)
+    return heapq.nsmallest(limit, todos, key=key)
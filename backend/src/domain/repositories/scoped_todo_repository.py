@@ -0,0 +1,78 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from domain.models.todo import Todo
+from domain.models.partition import PartitionScope
+from domain.repositories.todo_repository import TodoRepository
+
+
+class ScopedTodoRepository(TodoRepository):
+    """パーティションを持たないリポジトリ (InMemory 等) をテナント / ユーザー範囲に絞るラッパー。
+
+    TodoRepository.scoped() の既定実装。ネイティブに範囲指定できるリポジトリは scoped(scope) を上書きし、こちらは使われない。
+    範囲外の Todo は存在しないものとして扱う (get は None / update・delete は対象外)。
+    並び替え / 完了日時 / タグ集計は既定実装 (範囲内の list() を走査) を使う。
+    """
+
+    def __init__(self, base: TodoRepository, scope: PartitionScope):
+        self._base = base
+        self._scope = scope
+
+    @property
+    def data_version(self) -> Optional[int]:
+        return self._base.data_version
+
+    def add(self, todo: Todo) -> Todo:
+        return self._base.add(self._scope.apply(todo))
+
+    def list(self) -> List[Todo]:
+        return [t for t in self._base.list() if self._scope.matches(t)]
+
+    def list_due(
+        self,
+        before: Optional[datetime] = None,
+        after: Optional[datetime] = None,
+        completed: Optional[bool] = None,
+    ) -> List[Todo]:
+        return [t for t in self._base.list_due(before=before, after=after, completed=completed) if self._scope.matches(t)]
+
+    def get(self, todo_id: str) -> Optional[Todo]:
+        todo = self._base.get(todo_id)
+        return todo if todo is not None and self._scope.matches(todo) else None
+
+    def get_many(self, ids: List[str]) -> Dict[str, Todo]:
+        return {k: t for k, t in self._base.get_many(ids).items() if self._scope.matches(t)}
+
+    def update(
+        self,
+        todo_id: str,
+        change: Callable[[Todo], bool],
+        on_commit: Callable[[Todo, Todo], None] | None = None,
+    ) -> Todo | None:
+        """範囲外の Todo には change を適用しない。"""
+        scope = self._scope
+        seen: List[Todo] = []
+
+        def scoped_change(draft: Todo) -> bool:
+            if not scope.matches(draft):
+                seen.append(draft)
+                return False
+            return change(draft)
+
+        result = self._base.update(todo_id, scoped_change, on_commit)
+        return None if seen else result
+
+    def save(self, todo: Todo) -> Todo:
+        return self._base.save(self._scope.apply(todo))
+
+    def pop(self, todo_id: str) -> Optional[Todo]:
+        if self.get(todo_id) is None:
+            return None
+        return self._base.pop(todo_id)
+
+    def pop_if(self, todo_id: str, predicate: Callable[[Todo], bool]) -> Optional[Todo]:
+        scope = self._scope
+        return self._base.pop_if(todo_id, lambda todo: scope.matches(todo) and predicate(todo))
+
+    def delete(self, todo_id: str) -> bool:
+        return self.pop(todo_id) is not None
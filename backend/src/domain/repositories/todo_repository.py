@@ -1,10 +1,165 @@
 from __future__ import annotations
-from typing import Protocol, List, Optional
-from domain.models.todo import Todo
+from collections import Counter
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Protocol, Tuple
+from domain.models.todo import Todo, to_utc
+from domain.models.todo_sort import top_n
+
+if TYPE_CHECKING:
+    from domain.models.partition import PartitionScope
+
 
 class TodoRepository(Protocol):
+    """Todo の永続化の抽象。
+
+    必須: add / list / get / save / delete (構造的部分型。継承は不要)。
+    それ以外 (並び替え / 期限範囲 / 一括取得 / 集計 / アトミック更新 / 範囲限定) は必須メソッドによる既定実装を持ち、
+    実装はネイティブに処理できるもの (Cosmos のクエリ、InMemory の索引 / ロック等) だけを上書きする。
+    継承していない実装は as_repository() (TodoService が適用) で既定実装を補う。
+    """
+
+    # 書き込みの消費 RU を last_request_charge で報告するか (一括取り込みの RU 制御の有効化判定)
+    reports_request_charge: bool = False
+
     def add(self, todo: Todo) -> Todo: ...
     def list(self) -> List[Todo]: ...
     def get(self, todo_id: str) -> Optional[Todo]: ...
     def save(self, todo: Todo) -> Todo: ...
     def delete(self, todo_id: str) -> bool: ...
+
+    @property
+    def last_request_charge(self) -> Optional[float]:
+        """このスレッドで直前に実行した書き込みの消費 RU (報告しないリポジトリは None)。"""
+        return None
+
+    @property
+    def data_version(self) -> Optional[int]:
+        """他プロセスの書き込みも反映される共有リポジトリの変更番号 (どのプロセスの書き込みでも増える)。
+
+        None: このプロセスの書き込みだけが見える (タグカタログは差分反映で追従できる)。
+        """
+        return None
+
+    def list_sorted(self, order: List[tuple], limit: Optional[int] = None) -> List[Todo]:
+        """(field, descending) 順 + id で並べた先頭 limit 件。既定: 全件からヒープで top-N 選択。"""
+        return top_n(self.list(), order, limit)
+
+    def list_due(
+        self,
+        before: Optional[datetime] = None,
+        after: Optional[datetime] = None,
+        completed: Optional[bool] = None,
+    ) -> List[Todo]:
+        """期限範囲 (after <= dueDate < before) の Todo を期限昇順で。既定: 全件走査。"""
+        lo = to_utc(after) if after is not None else None
+        hi = to_utc(before) if before is not None else None
+        hits = [
+            t for t in self.list()
+            if t.dueDate is not None
+            and (lo is None or to_utc(t.dueDate) >= lo)
+            and (hi is None or to_utc(t.dueDate) < hi)
+            and (completed is None or t.completed == completed)
+        ]
+        hits.sort(key=lambda t: to_utc(t.dueDate))
+        return hits
+
+    def list_completed_before(self, cutoff: datetime, limit: Optional[int] = None) -> List[Todo]:
+        """完了済みかつ updatedAt < cutoff の Todo (アーカイブ移動対象)。既定: 全件走査。"""
+        hi = to_utc(cutoff)
+        hits = [t for t in self.list() if t.completed and to_utc(t.updatedAt) < hi]
+        return hits[:limit] if limit is not None else hits
+
+    def get_many(self, ids: List[str]) -> Dict[str, Todo]:
+        """id → Todo (見つかったもののみ)。既定: 1 件ずつ get()。"""
+        return {todo_id: todo for todo_id in ids if (todo := self.get(todo_id)) is not None}
+
+    def tag_counts(self) -> List[Tuple[str, bool, int]]:
+        """タグ × 完了状態ごとの件数 [(tag, completed, count), ...]。1 Todo 内の同一タグは 1 件。既定: 全件走査。"""
+        counts: Counter = Counter()
+        for todo in self.list():
+            for tag in set(todo.tags):
+                counts[(tag, todo.completed)] += 1
+        return [(tag, completed, n) for (tag, completed), n in counts.items()]
+
+    def update(
+        self,
+        todo_id: str,
+        change: Callable[[Todo], bool],
+        on_commit: Callable[[Todo, Todo], None] | None = None,
+    ) -> Optional[Todo]:
+        """read-modify-write。change(draft) がコピーを変更して True を返した場合のみ保存し on_commit(before, after)。
+
+        存在しなければ None、変更無しなら現行値。既定: get → save (アトミックではない)。
+        """
+        current = self.get(todo_id)
+        if current is None:
+            return None
+        draft = current.model_copy(deep=True)
+        if not change(draft):
+            return current
+        saved = self.save(draft)
+        if on_commit is not None:
+            on_commit(current, saved)
+        return saved
+
+    def pop(self, todo_id: str) -> Optional[Todo]:
+        """削除して削除前の値を返す (存在しなければ None)。既定: get → delete。"""
+        before = self.get(todo_id)
+        if before is None or not self.delete(todo_id):
+            return None
+        return before
+
+    def pop_if(self, todo_id: str, predicate: Callable[[Todo], bool]) -> Optional[Todo]:
+        """現行値が predicate を満たす場合のみ削除して削除前の値を返す (それ以外は None)。
+
+        既定: get → 判定 → pop (アトミックではない。判定後の更新も削除されうる)。
+        """
+        current = self.get(todo_id)
+        if current is None or not predicate(current):
+            return None
+        return self.pop(todo_id)
+
+    def scoped(self, scope: PartitionScope) -> TodoRepository:
+        """テナント / ユーザー範囲に限定したリポジトリ。既定: ScopedTodoRepository による絞り込み。"""
+        from domain.repositories.scoped_todo_repository import ScopedTodoRepository  # 循環 import 回避
+        return ScopedTodoRepository(self, scope)
+
+
+# 既定実装を持つ任意機能 (継承していない実装に無ければ as_repository() が補う)
+_OPTIONAL_METHODS = (
+    "list_sorted", "list_due", "list_completed_before", "get_many", "tag_counts", "update", "pop", "pop_if", "scoped",
+)
+_OPTIONAL_ATTRS = ("reports_request_charge", "last_request_charge", "data_version")
+
+
+def as_repository(repo: Any) -> TodoRepository:
+    """必須メソッドだけを持つリポジトリにも任意機能を揃える。全て持っていればそのまま返す。"""
+    if all(getattr(repo, name, None) is not None for name in _OPTIONAL_METHODS) and all(
+        hasattr(repo, name) for name in _OPTIONAL_ATTRS
+    ):
+        return repo
+    return _DefaultedRepository(repo)
+
+
+class _DefaultedRepository(TodoRepository):
+    """継承していないリポジトリのアダプタ。実装済みのメソッドはそのまま使い、無いもの (または None) は既定実装。"""
+
+    def __init__(self, base: Any):
+        self._base = base
+        for name in ("add", "list", "get", "save", "delete", *_OPTIONAL_METHODS):
+            method = getattr(base, name, None)
+            if method is not None:
+                setattr(self, name, method)
+        self.reports_request_charge = bool(getattr(base, "reports_request_charge", False))
+
+    def __getattr__(self, name: str) -> Any:
+        # is_ready 等の実装固有の属性
+        return getattr(self._base, name)
+
+    @property
+    def last_request_charge(self) -> Optional[float]:
+        return getattr(self._base, "last_request_charge", None)
+
+    @property
+    def data_version(self) -> Optional[int]:
+        return getattr(self._base, "data_version", None)
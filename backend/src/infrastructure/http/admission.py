@@ -0,0 +1,135 @@
+from __future__ import annotations
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from .profiling import current_profile
+
+
+class OverloadedError(Exception):
+    """受付上限超過。ハンドラで 503 + Retry-After に変換する。"""
+
+    def __init__(self, route: str, reason: str, retry_after: int):
+        super().__init__(f"{route}: {reason}")
+        self.route = route
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _parse_route_limits(raw: str | None) -> Dict[str, int]:
+    """`GET /api/todos=16;POST /api/todos=4` 形式を dict へ。不正な要素は無視。"""
+    limits: Dict[str, int] = {}
+    for part in (raw or "").split(";"):
+        name, sep, value = part.rpartition("=")
+        if sep and name.strip() and value.strip().isdigit():
+            limits[name.strip()] = int(value)
+    return limits
+
+
+class BoundedExecutor:
+    """リポジトリ I/O (ブロッキング呼び出し) 専用の有界スレッドプール + 受付制御。
+
+    - max_workers: 同時実行スレッド数
+    - max_queue: 実行中 + 待機中の上限。超過時は即座に OverloadedError (待たせずに捨てる)
+    - route_limits: ルート単位の同時実行上限 (未指定ルートは無制限 = max_queue に従う)
+    イベントループ上でのみ呼び出す前提のため、カウンタ更新にロックは不要。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        max_queue: int = 64,
+        route_limits: Dict[str, int] | None = None,
+        retry_after: int = 1,
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.route_limits = dict(route_limits or {})
+        self.retry_after = retry_after
+        self._pool: ThreadPoolExecutor | None = None
+        self._pending = 0
+        self._per_route: Dict[str, int] = {}
+        # 観測値
+        self.completed = 0
+        self.rejected = 0
+        self.wait_ms_last = 0.0
+        self.wait_ms_max = 0.0
+        self.wait_ms_ewma = 0.0
+
+    @classmethod
+    def from_env(cls) -> BoundedExecutor:
+        """REPO_IO_WORKERS / REPO_IO_QUEUE / REPO_IO_RETRY_AFTER / REPO_IO_ROUTE_LIMITS から生成。"""
+        return cls(
+            max_workers=int(os.getenv("REPO_IO_WORKERS", "8")),
+            max_queue=int(os.getenv("REPO_IO_QUEUE", "64")),
+            route_limits=_parse_route_limits(os.getenv("REPO_IO_ROUTE_LIMITS")),
+            retry_after=int(os.getenv("REPO_IO_RETRY_AFTER", "1")),
+        )
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="repo-io")
+        return self._pool
+
+    async def run(self, route: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """fn を専用プールで実行。上限超過なら実行せずに OverloadedError。"""
+        if self._pending >= self.max_queue:
+            self.rejected += 1
+            raise OverloadedError(route, "queue_full", self.retry_after)
+        limit = self.route_limits.get(route)
+        in_route = self._per_route.get(route, 0)
+        if limit is not None and in_route >= limit:
+            self.rejected += 1
+            raise OverloadedError(route, "route_limit", self.retry_after)
+
+        self._pending += 1
+        self._per_route[route] = in_route + 1
+        enqueued = time.perf_counter()
+        profile = current_profile.get()  # 計測中リクエストならワーカー側のスタックも同じプロファイルへ
+
+        def call():
+            self._record_wait((time.perf_counter() - enqueued) * 1000.0)
+            if profile is not None:
+                return profile.run_attached("repo-io", fn, *args, **kwargs)
+            return fn(*args, **kwargs)
+
+        try:
+            # contextvars (トレースの現在スパン等) をワーカースレッドへ引き継ぐ
+            return await asyncio.get_running_loop().run_in_executor(self._executor(), contextvars.copy_context().run, call)
+        finally:
+            self._pending -= 1
+            self._per_route[route] -= 1
+            self.completed += 1
+
+    def _record_wait(self, ms: float) -> None:
+        # ワーカースレッドから呼ばれる。浮動小数の代入のみで整合性は観測用途として許容
+        self.wait_ms_last = ms
+        if ms > self.wait_ms_max:
+            self.wait_ms_max = ms
+        self.wait_ms_ewma = ms if self.wait_ms_ewma == 0.0 else self.wait_ms_ewma * 0.9 + ms * 0.1
+
+    def stats(self) -> dict:
+        """キュー深さ / 待ち時間などのスナップショット。"""
+        return {
+            "maxWorkers": self.max_workers,
+            "maxQueue": self.max_queue,
+            "queueDepth": max(0, self._pending - self.max_workers),
+            "pending": self._pending,
+            "perRoute": {k: v for k, v in self._per_route.items() if v},
+            "routeLimits": self.route_limits,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "waitMs": {
+                "last": round(self.wait_ms_last, 3),
+                "max": round(self.wait_ms_max, 3),
+                "ewma": round(self.wait_ms_ewma, 3),
+            },
+        }
+
+    def shutdown(self) -> None:
+        """lifespan 終了時にプールを停止 (次回 run で再生成される)。"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
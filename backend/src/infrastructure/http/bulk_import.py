@@ -0,0 +1,225 @@
+from __future__ import annotations
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+from pydantic import ValidationError
+from starlette.responses import StreamingResponse
+from domain.models.todo import Todo
+from infrastructure.repositories.in_memory_todo_repository import DuplicateTodoIdError
+from .admission import OverloadedError
+
+MAX_LINE_BYTES = 1024 * 1024
+
+
+class RuThrottle:
+    """RU/s のトークンバケット。書き込み前に推定 RU を予約し、実測 RU (x-ms-request-charge) で補正する。
+
+    429 (Request rate too large) を受けてから待つのではなく、プロビジョニング RU/s 以下に事前に抑える。
+    推定値は実測の指数移動平均 (ドキュメントサイズ / 索引数で変わるため固定値にしない)。
+    """
+
+    def __init__(self, ru_per_sec: float, burst: Optional[float] = None, initial_estimate: float = 10.0):
+        self.rate = ru_per_sec
+        self.burst = burst if burst is not None else ru_per_sec
+        self.estimate = initial_estimate
+        self._tokens = self.burst
+        self._last = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    async def acquire(self) -> float:
+        """推定 RU 分のトークンを予約する (不足時は溜まるまで待つ)。予約した RU を返す。"""
+        cost = self.estimate
+        self._refill()
+        while self._tokens < cost:
+            await asyncio.sleep((cost - self._tokens) / self.rate)
+            self._refill()
+        self._tokens -= cost
+        return cost
+
+    def observe(self, reserved: float, charge: float) -> None:
+        """実測 RU との差分を精算し、推定値を更新する。"""
+        self._tokens -= charge - reserved
+        self.estimate = 0.8 * self.estimate + 0.2 * charge
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line: int = MAX_LINE_BYTES) -> AsyncIterator[Optional[bytes]]:
+    """ストリームを改行で分割して 1 行ずつ返す (空行は除外)。max_line を超える行は None (読み捨て)。
+
+    保持するのは未完の 1 行分のみのため、ボディ全体のサイズに関係なくメモリは一定。
+    分割はチャンクごとに 1 回 (split) で行い、チャンクをまたぐ行の断片は行末が来た時点で 1 回だけ連結する。
+    """
+    pending: List[bytes] = []  # チャンクをまたいで未完の行の断片
+    size = 0
+    oversized = False
+    async for chunk in chunks:
+        pieces = chunk.split(b"\n")
+        tail = pieces.pop()
+        for piece in pieces:
+            if oversized:  # 読み捨て中の行がここで終わる
+                oversized = False
+                yield None
+                continue
+            line = b"".join(pending) + piece if pending else piece
+            pending, size = [], 0
+            if line.strip():
+                yield line
+        if tail and not oversized:
+            pending.append(tail)
+            size += len(tail)
+            if size > max_line:
+                pending, size, oversized = [], 0, True
+    if oversized:
+        yield None
+    elif pending:
+        line = b"".join(pending)
+        if line.strip():
+            yield line
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """リクエストボディを読みながら応答を返す (全二重) StreamingResponse。
+
+    標準実装は応答中に receive() で切断を監視し、未読のボディを読み捨ててしまうため、
+    切断検知はボディを読む側 (request.stream() の ClientDisconnect) に任せる。
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def _validation_errors(e: ValidationError) -> list:
+    errors = []
+    for err in e.errors():
+        loc = err.get("loc", [])
+        errors.append({"field": loc[-1] if loc else None, "message": err.get("msg"), "errorType": err.get("type")})
+    return errors
+
+
+class BulkImporter:
+    """NDJSON 一括取り込み: 行単位で検証し、同時実行数を制限した書き込みパイプラインへ流す。
+
+    - parse(line) → Todo (pydantic ValidationError / JSON 不正 (ValueError) は 422 行結果)
+    - write(todo) → (作成済み Todo, 消費 RU または None) を返す awaitable
+    - 同時書き込みは concurrency 件まで。結果キューも有界のため、クライアントが結果を読まなければ読み込みも止まる
+    - throttle 指定時は RU/s を超えないよう書き込み前に待つ。429 / 過負荷 (503) は待ってから再試行
+    結果は完了順に 1 行 1 JSON ({"line", "status", ...})、最後に {"summary": {...}}。
+    """
+
+    def __init__(
+        self,
+        parse: Callable[[bytes], Todo],
+        write: Callable[[Todo], Awaitable[Tuple[Todo, Optional[float]]]],
+        concurrency: int = 8,
+        throttle: Optional[RuThrottle] = None,
+        max_retries: int = 5,
+    ):
+        self._parse = parse
+        self._write = write
+        self._concurrency = max(1, concurrency)
+        self._throttle = throttle
+        self._max_retries = max_retries
+
+    async def _write_one(self, n: int, todo: Todo) -> dict:
+        for attempt in range(self._max_retries + 1):
+            reserved = await self._throttle.acquire() if self._throttle else 0.0
+            try:
+                created, charge = await self._write(todo)
+            except DuplicateTodoIdError as e:
+                return {"line": n, "status": 409, "type": "duplicate_todo_id", "id": e.todo_id}
+            except OverloadedError as e:
+                if attempt == self._max_retries:
+                    return {"line": n, "status": 503, "type": "overloaded", "id": todo.id}
+                await asyncio.sleep(e.retry_after)
+                continue
+            except Exception as e:  # noqa: BLE001
+                if getattr(e, "status_code", None) == 429 and attempt < self._max_retries:
+                    await asyncio.sleep(_retry_after_sec(e, attempt))
+                    continue
+                return {"line": n, "status": 500, "type": "write_failed", "id": todo.id, "message": str(e)}
+            if self._throttle and charge is not None:
+                self._throttle.observe(reserved, charge)
+            return {"line": n, "status": 201, "id": created.id}
+        return {"line": n, "status": 429, "type": "throttled", "id": todo.id}
+
+    async def run(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        results: asyncio.Queue = asyncio.Queue(maxsize=self._concurrency * 4)
+        slots = asyncio.Semaphore(self._concurrency)
+        counts = {"lines": 0, "created": 0, "failed": 0}
+        started = time.perf_counter()
+
+        async def write(n: int, todo: Todo) -> None:
+            try:
+                await results.put(await self._write_one(n, todo))
+            finally:
+                slots.release()
+
+        async def produce() -> None:
+            tasks = set()
+            n = 0
+            error: Optional[Exception] = None
+            try:
+                async for line in iter_lines(chunks):
+                    n += 1
+                    if line is None:
+                        await results.put({"line": n, "status": 413, "type": "line_too_long"})
+                        continue
+                    try:
+                        todo = self._parse(line)
+                    except ValidationError as e:
+                        await results.put({"line": n, "status": 422, "type": "validation_error", "errors": _validation_errors(e)})
+                        continue
+                    except ValueError:  # JSON として不正
+                        await results.put({"line": n, "status": 422, "type": "json_invalid"})
+                        continue
+                    await slots.acquire()
+                    task = asyncio.create_task(write(n, todo))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                if tasks:
+                    await asyncio.gather(*tasks)
+            except asyncio.CancelledError:
+                for task in tasks:
+                    task.cancel()
+                raise
+            except Exception as e:  # noqa: BLE001  受信途中の切断等: 実行中の書き込みを止めて終端を通知
+                for task in tasks:
+                    task.cancel()
+                error = e
+            await results.put(None)
+            if error is not None:
+                raise error
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                counts["lines"] += 1
+                counts["created" if result["status"] == 201 else "failed"] += 1
+                yield json.dumps(result).encode() + b"\n"
+            await producer  # 読み込み側の例外を伝播
+            counts["elapsedMs"] = round((time.perf_counter() - started) * 1000.0, 1)
+            yield json.dumps({"summary": counts}).encode() + b"\n"
+        finally:
+            if not producer.done():  # クライアント切断時は読み込み / 書き込みを中止
+                producer.cancel()
+
+
+def _retry_after_sec(e: Exception, attempt: int) -> float:
+    """429 の x-ms-retry-after-ms があれば従い、無ければ指数バックオフ。"""
+    headers = getattr(e, "headers", None) or {}
+    ms = headers.get("x-ms-retry-after-ms") if hasattr(headers, "get") else None
+    if ms:
+        try:
+            return float(ms) / 1000.0
+        except ValueError:
+            pass
+    return min(5.0, 0.1 * (2 ** attempt))
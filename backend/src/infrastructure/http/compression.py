@@ -0,0 +1,240 @@
+"""レスポンス圧縮 (Accept-Encoding ネゴシエーション: zstd / br / gzip)。
+
+zstd / br は対応パッケージ (zstandard / brotli) がインストールされている場合のみ使う。gzip は標準ライブラリ。
+"""
+from __future__ import annotations
+import asyncio
+import os
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+try:  # 任意依存
+    import brotli  # type: ignore
+except Exception:  # pragma: no cover - 未インストール時は br を提示しない
+    brotli = None  # type: ignore
+
+try:  # 任意依存
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+# この大きさを超える一括レスポンスはイベントループを塞がないようスレッドで圧縮する
+OFFLOAD_BYTES = 256 * 1024
+
+# 圧縮強度 (1〜9, gzip のレベルと同じ尺度) → 各方式のレベル
+_BROTLI_QUALITY = (1, 2, 3, 4, 4, 5, 6, 8, 11)
+_ZSTD_LEVEL = (1, 1, 2, 3, 3, 4, 6, 9, 19)
+
+
+class _GzipCodec:
+    def __init__(self, effort: int):
+        self._c = zlib.compressobj(effort, zlib.DEFLATED, 31)  # wbits=31: gzip ヘッダ付き
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        """ここまでの入力をクライアントが展開できる位置で区切る (ストリーミング用)。"""
+        return self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+class _BrotliCodec:
+    def __init__(self, effort: int):
+        self._c = brotli.Compressor(quality=_BROTLI_QUALITY[effort - 1])
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class _ZstdCodec:
+    def __init__(self, effort: int):
+        self._c = zstandard.ZstdCompressor(level=_ZSTD_LEVEL[effort - 1]).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+def available_codecs() -> Dict[str, type]:
+    """サーバ側の優先順 (圧縮率 / 速度の良い順)。"""
+    codecs: Dict[str, type] = {}
+    if zstandard is not None:
+        codecs["zstd"] = _ZstdCodec
+    if brotli is not None:
+        codecs["br"] = _BrotliCodec
+    codecs["gzip"] = _GzipCodec
+    return codecs
+
+
+def negotiate(accept_encoding: Optional[str], offered: List[str]) -> Optional[str]:
+    """Accept-Encoding (q 値付き) から使う方式を選ぶ。q が同じならサーバの優先順 (offered の順)。"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in offered:
+        q = weights.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def _parse_route_levels(raw: Optional[str]) -> Dict[str, int]:
+    """`GET /api/todos=6;POST /api/todos/import=1` 形式 (1〜9)。範囲外 / 不正な要素は無視。"""
+    levels: Dict[str, int] = {}
+    for part in (raw or "").split(";"):
+        name, sep, value = part.rpartition("=")
+        if sep and name.strip() and value.strip().isdigit() and 1 <= int(value) <= 9:
+            levels[name.strip()] = int(value)
+    return levels
+
+
+class CompressionMiddleware:
+    """Accept-Encoding に応じてレスポンスを圧縮する ASGI ミドルウェア。
+
+    - 一括レスポンス (more_body なし): minimum_size 未満は無圧縮。大きいものはスレッドで圧縮
+    - ストリーミング (more_body あり): チャンクごとに圧縮してフラッシュ (NDJSON の行がすぐクライアントへ届く)
+    - 圧縮強度 (1〜9) はルート単位 (`METHOD /path/{param}` = ルーティング後のテンプレート) で指定でき、未指定は level
+    - 既に Content-Encoding があるもの / 圧縮に向かない Content-Type / 204・304 はそのまま
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        level: int = 6,
+        route_levels: Optional[Dict[str, int]] = None,
+        codecs: Optional[Dict[str, type]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+        self.route_levels = dict(route_levels or {})
+        self.codecs = codecs if codecs is not None else available_codecs()
+        self._offered = list(self.codecs)
+
+    @classmethod
+    def options_from_env(cls) -> dict:
+        """COMPRESSION_MIN_BYTES / COMPRESSION_LEVEL / COMPRESSION_ROUTE_LEVELS → add_middleware の引数。"""
+        return {
+            "minimum_size": int(os.getenv("COMPRESSION_MIN_BYTES", "1024")),
+            "level": min(9, max(1, int(os.getenv("COMPRESSION_LEVEL", "6")))),
+            # 一括取り込みの結果ストリームは行ごとにフラッシュするため既定で最速
+            "route_levels": {"POST /api/todos/import": 1, **_parse_route_levels(os.getenv("COMPRESSION_ROUTE_LEVELS"))},
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept, self._offered)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+        await self.app(scope, receive, _CompressingSend(self, scope, encoding, send))
+
+    def effort_for(self, scope) -> int:
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        return self.route_levels.get(f"{scope['method']} {route}", self.level)
+
+
+class _CompressingSend:
+    """レスポンス開始を最初のボディまで保留し、圧縮するかどうかを決めてから送る。"""
+
+    def __init__(self, owner: CompressionMiddleware, scope, encoding: str, send):
+        self.owner = owner
+        self.scope = scope
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[dict] = None
+        self.codec = None
+        self.passthrough = False
+
+    def _compressible(self, headers: List[Tuple[bytes, bytes]], status: int) -> bool:
+        if status < 200 or status in (204, 304):
+            return False
+        content_type = b""
+        for name, value in headers:
+            lname = name.lower()
+            if lname == b"content-encoding":
+                return False
+            if lname == b"content-type":
+                content_type = value
+        ct = content_type.decode("latin-1").lower()
+        return any(ct.startswith(t) for t in COMPRESSIBLE_TYPES)
+
+    def _headers(self, length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+        headers = [(k, v) for k, v in self.start["headers"] if k.lower() not in (b"content-length", b"vary")]
+        vary = [v for k, v in self.start["headers"] if k.lower() == b"vary"]
+        headers.append((b"vary", b", ".join([*vary, b"Accept-Encoding"]) if vary else b"Accept-Encoding"))
+        headers.append((b"content-encoding", self.encoding.encode()))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return headers
+
+    async def __call__(self, message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            self.start = message
+            self.passthrough = not self._compressible(list(message.get("headers", [])), message["status"])
+            if self.passthrough:
+                await self.send(message)
+            return
+        if kind != "http.response.body" or self.passthrough:
+            return await self.send(message)
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.codec is None:
+            if not more:  # 一括レスポンス
+                if len(body) < self.owner.minimum_size:
+                    self.passthrough = True
+                    await self.send(self.start)
+                    return await self.send(message)
+                codec = self.owner.codecs[self.encoding](self.owner.effort_for(self.scope))
+                if len(body) > OFFLOAD_BYTES:
+                    data = await asyncio.to_thread(lambda: codec.compress(body) + codec.finish())
+                else:
+                    data = codec.compress(body) + codec.finish()
+                await self.send({**self.start, "headers": self._headers(len(data))})
+                return await self.send({"type": "http.response.body", "body": data, "more_body": False})
+            self.codec = self.owner.codecs[self.encoding](self.owner.effort_for(self.scope))
+            await self.send({**self.start, "headers": self._headers(None)})
+
+        if more:
+            data = self.codec.compress(body) + self.codec.flush() if body else b""
+        else:
+            data = self.codec.compress(body) + self.codec.finish()
+        if data or not more:
+            await self.send({"type": "http.response.body", "body": data, "more_body": more})
@@ -0,0 +1,178 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Protocol, Tuple
+
+IDEMPOTENT_METHODS = ("POST", "PATCH")
+MAX_KEY_LENGTH = 255
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    """初回実行のレスポンス (再送時にそのまま返す)。fingerprint はリクエストボディのハッシュ。"""
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    fingerprint: str
+
+
+class IdempotencyStore(Protocol):
+    """Idempotency-Key → 初回レスポンスの保存先。
+
+    既定はプロセス内 LRU。複数ワーカー / レプリカ間で共有する場合は同じインターフェースで
+    Redis 等の共有ストアを実装して IdempotencyMiddleware に渡す。
+    """
+
+    def get(self, key: str) -> Optional[StoredResponse]: ...
+    def put(self, key: str, response: StoredResponse) -> None: ...
+
+
+class InMemoryIdempotencyStore:
+    """件数上限 + TTL 付きの LRU ストア (スレッドセーフ)。"""
+
+    def __init__(self, max_entries: int = 10000, ttl_sec: float = 86400.0):
+        self._max = max(1, max_entries)
+        self._ttl = ttl_sec
+        self._items: "OrderedDict[str, Tuple[float, StoredResponse]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            expires, response = entry
+            if expires <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return response
+
+    def put(self, key: str, response: StoredResponse) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic() + self._ttl, response)
+            self._items.move_to_end(key)
+            while len(self._items) > self._max:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+def _error(status: int, detail: dict) -> StoredResponse:
+    body = json.dumps({"detail": {**detail, "status": status}}).encode()
+    return StoredResponse(status, [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())], body, "")
+
+
+class IdempotencyMiddleware:
+    """POST / PATCH の Idempotency-Key 対応 (ASGI ミドルウェア)。
+
+    - 初回の 2xx / 4xx レスポンスをストアへ保存し、同じキーの再送にはリポジトリに触れず byte 単位で同一のレスポンスを返す
+      (5xx / 503 過負荷は保存しない → 再送で再実行される)
+    - 同一キーの同時実行は初回の完了を待って結果を共有 (プロセス内)
+    - 同じキーで異なるボディが送られた場合は 422 (idempotency_key_reused)
+    - キーはメソッド + パス + テナント / ユーザーヘッダ単位 (範囲をまたいだ衝突を防ぐ)
+    ヘッダの無いリクエストは素通し (追加コスト無し)。
+    """
+
+    def __init__(self, app, store: IdempotencyStore, exclude_paths: tuple = ()):
+        self.app = app
+        self.store = store
+        self.exclude_paths = frozenset(exclude_paths)  # ストリーミング系 (ボディ全体を保持できない) は対象外
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS or scope["path"] in self.exclude_paths:
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        raw_key = headers.get(b"idempotency-key")
+        if raw_key is None:
+            return await self.app(scope, receive, send)
+        if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+            return await self._send(send, _error(422, {
+                "type": "validation_error",
+                "errors": [{"field": "Idempotency-Key", "message": f"must be 1-{MAX_KEY_LENGTH} characters", "errorType": "invalid_idempotency_key"}],
+            }))
+
+        body = await _read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        key = b"|".join((
+            scope["method"].encode(), scope["path"].encode(),
+            headers.get(b"x-tenant-id", b""), headers.get(b"x-user-id", b""), raw_key,
+        )).decode("latin-1")
+
+        while True:
+            stored = self.store.get(key)
+            if stored is not None:
+                if stored.fingerprint != fingerprint:
+                    return await self._send(send, _error(422, {"type": "idempotency_key_reused", "key": raw_key.decode("latin-1")}))
+                return await self._send(send, stored, replayed=True)
+            fut = self._inflight.get(key)
+            if fut is None:
+                break
+            await asyncio.shield(fut)  # 初回実行の完了待ち (保存されなかった場合は自分が実行)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            captured = await self._execute(scope, receive, send, body)
+            if captured is not None and captured.status < 500:
+                self.store.put(key, StoredResponse(captured.status, captured.headers, captured.body, fingerprint))
+        finally:
+            del self._inflight[key]
+            fut.set_result(None)
+
+    async def _execute(self, scope, receive, send, body: bytes) -> Optional[StoredResponse]:
+        """下流アプリを実行しつつレスポンスを送信・記録する。"""
+        sent = False
+
+        async def replay_receive():  # 読み込み済みボディを 1 回だけ渡し、以降は元の receive (切断検知) へ
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status, headers, chunks = 0, [], []
+
+        async def capture_send(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status, headers = message["status"], list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, replay_receive, capture_send)
+        if not status:
+            return None
+        return StoredResponse(status, headers, b"".join(chunks), "")
+
+    @staticmethod
+    async def _send(send, response: StoredResponse, replayed: bool = False) -> None:
+        headers = list(response.headers)
+        if replayed:
+            headers.append((b"idempotency-replayed", b"true"))
+        await send({"type": "http.response.start", "status": response.status, "headers": headers})
+        await send({"type": "http.response.body", "body": response.body})
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
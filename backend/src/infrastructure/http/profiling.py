@@ -0,0 +1,267 @@
+from __future__ import annotations
+import hmac
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from types import CodeType, FrameType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PROFILE_HEADER = b"x-profile-token"
+
+# 計測中リクエストのプロファイル。BoundedExecutor はこれを見てワーカースレッドを同じプロファイルへ登録する
+current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+# ファイルパスによる区間分類。サンプルごとに葉側から最初に一致したフレームの区間へ計上する
+_PHASES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("repository", ("/infrastructure/repositories/", "/azure/cosmos/")),
+    ("service", ("/application/services/",)),
+    ("validation", ("/pydantic/", "/pydantic_core/", "/fastapi/dependencies/", "/fastapi/_compat")),
+    ("serialization", ("/fastapi/encoders", "/json/", "/starlette/responses")),
+)
+_describe_cache: Dict[CodeType, Tuple[str, Optional[str]]] = {}
+
+
+def _describe(code: CodeType) -> Tuple[str, Optional[str]]:
+    """コードオブジェクト → (フレームラベル `module:qualname`, 区間名)。コードオブジェクト単位でキャッシュ。"""
+    found = _describe_cache.get(code)
+    if found is None:
+        path = code.co_filename.replace("\\", "/")
+        module = os.path.splitext(os.path.basename(path))[0]
+        label = f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+        phase = next((name for name, parts in _PHASES if any(p in path for p in parts)), None)
+        found = _describe_cache[code] = (label.replace(";", ","), phase)
+    return found
+
+
+class RequestProfile:
+    """1 リクエスト分のサンプル (collapsed stack ごとの件数) と区間別の内訳。
+
+    計測対象スレッドごとに起点フレーム (marker) を登録し、サンプル時にそのフレームまで辿れたスタックだけを計上する。
+    イベントループは他のリクエストと共有されるため、起点フレームを含まないスタック (別リクエストの処理中) は除外される。
+    """
+
+    def __init__(self, profile_id: str, method: str, path: str, interval: float):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.started_at = time.time()
+        self.status = 0
+        self.duration_ms = 0.0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.phases: Counter = Counter()
+        self._started = time.perf_counter()
+        self._marks: Dict[int, Tuple[str, FrameType]] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, role: str, marker: FrameType) -> None:
+        """呼び出し元スレッドを計測対象に加える (marker より葉側のフレームを計上)。"""
+        with self._lock:
+            self._marks[threading.get_ident()] = (role, marker)
+
+    def detach(self) -> None:
+        with self._lock:
+            self._marks.pop(threading.get_ident(), None)
+
+    def run_attached(self, role: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """ワーカースレッドで fn を計測対象として実行する。"""
+        self.attach(role, sys._getframe())
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.detach()
+
+    def sample(self, frames: Dict[int, FrameType]) -> None:
+        """サンプラースレッドから呼ばれる。登録スレッドの現在のスタックを 1 件ずつ計上する。"""
+        with self._lock:
+            marks = list(self._marks.items())
+        for tid, (role, marker) in marks:
+            frame = frames.get(tid)
+            stack: List[str] = []
+            phase = None
+            while frame is not None and frame is not marker:
+                label, frame_phase = _describe(frame.f_code)
+                stack.append(label)
+                phase = phase or frame_phase
+                frame = frame.f_back
+            if frame is None or not stack:  # このリクエストの処理中ではない
+                continue
+            stack.append(role)
+            self.stacks[";".join(reversed(stack))] += 1
+            self.phases[phase or "other"] += 1
+            self.samples += 1
+
+    def finish(self, status: int) -> None:
+        self.status = status
+        self.duration_ms = (time.perf_counter() - self._started) * 1000.0
+
+    def summary(self) -> dict:
+        """一覧用の要約。phasesMs はサンプル数 × 間隔 (スレッドをまたいで重なり得るため合計は壁時計時間と一致しない)。"""
+        per = self.interval * 1000.0
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "startedAt": self.started_at,
+            "durationMs": round(self.duration_ms, 3),
+            "samples": self.samples,
+            "intervalMs": per,
+            "phasesMs": {name: round(n * per, 3) for name, n in self.phases.most_common()},
+        }
+
+    def collapsed(self) -> str:
+        """flamegraph.pl / speedscope が読める collapsed stack 形式 (`root;...;leaf 件数` の行)。"""
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+class StackSampler:
+    """sys._current_frames() による統計的サンプラー (計測中のプロファイルがある間だけ動く単一スレッド)。
+
+    CPU を使い続けるスレッドがあるとサンプラーは GIL の切り替え間隔 (既定 5ms) ごとにしか動けないため、
+    計測中だけ sys.setswitchinterval() をサンプリング間隔まで短くし、計測対象が無くなれば元の値へ戻す。
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: List[RequestProfile] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._saved_switch: Optional[float] = None  # 計測開始前の切り替え間隔 (計測中のみ)
+
+    def start(self, profile: RequestProfile) -> None:
+        with self._cond:
+            if not self._active:
+                self._saved_switch = sys.getswitchinterval()
+                sys.setswitchinterval(min(self._saved_switch, self.interval))
+            self._active.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def stop(self, profile: RequestProfile) -> None:
+        with self._cond:
+            self._active.remove(profile)
+            if not self._active and self._saved_switch is not None:
+                sys.setswitchinterval(self._saved_switch)
+                self._saved_switch = None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._active:
+                    self._cond.wait()
+                active = list(self._active)
+            frames = sys._current_frames()
+            for profile in active:
+                profile.sample(frames)
+            del frames
+            time.sleep(self.interval)
+
+
+class Profiler:
+    """リクエスト単位のオンデマンドプロファイラ。
+
+    - admin_token: `X-Profile-Token` ヘッダが一致したリクエストを計測 (/debug/profiles の閲覧にも必要。未設定なら閲覧不可)
+    - sample_rate: 0〜1 の確率で通常リクエストも計測
+    - 結果は最新 capacity 件のリングバッファに保持
+    """
+
+    def __init__(self, sample_rate: float = 0.0, admin_token: Optional[str] = None, interval_ms: float = 5.0, capacity: int = 32):
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token.encode() if admin_token else None
+        self.interval = max(0.001, interval_ms / 1000.0)
+        self._sampler = StackSampler(self.interval)
+        self._done: deque = deque(maxlen=max(1, capacity))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional[Profiler]:
+        """PROFILE_ADMIN_TOKEN / PROFILE_SAMPLE_RATE / PROFILE_INTERVAL_MS / PROFILE_BUFFER から生成。どちらも未設定なら None (無効)。"""
+        token = os.getenv("PROFILE_ADMIN_TOKEN") or None
+        rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        if token is None and rate <= 0:
+            return None
+        return cls(
+            sample_rate=rate,
+            admin_token=token,
+            interval_ms=float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+            capacity=int(os.getenv("PROFILE_BUFFER", "32")),
+        )
+
+    def authorized(self, token: Optional[bytes]) -> bool:
+        """/debug/profiles の閲覧可否。トークン未設定 (サンプリングのみ) の場合は常に不可。"""
+        if self.admin_token is None:
+            return False
+        return token is not None and hmac.compare_digest(token, self.admin_token)
+
+    def should_profile(self, scope) -> bool:
+        if scope["path"].startswith("/debug/"):
+            return False
+        if self.admin_token is not None:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.admin_token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def begin(self, method: str, path: str) -> RequestProfile:
+        profile = RequestProfile(secrets.token_hex(6), method, path, self.interval)
+        self._sampler.start(profile)
+        return profile
+
+    def finish(self, profile: RequestProfile, status: int) -> None:
+        self._sampler.stop(profile)
+        profile.finish(status)
+        with self._lock:
+            self._done.append(profile)
+
+    def list(self) -> List[dict]:
+        """保持中のプロファイル要約 (新しい順)。"""
+        with self._lock:
+            return [p.summary() for p in reversed(self._done)]
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return next((p for p in self._done if p.id == profile_id), None)
+
+
+class ProfilingMiddleware:
+    """対象リクエストをスタックサンプラーで計測する ASGI ミドルウェア。
+
+    イベントループ側はこのミドルウェアのフレームを起点に、リポジトリ I/O プール側は BoundedExecutor 経由の呼び出しを起点に計上し、
+    レスポンスに `X-Profile-Id` を付ける (結果は /debug/profiles/{id})。
+    Profiler 未設定時は main でミドルウェア自体を登録しないため、無効時のコストは無い。
+    """
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.should_profile(scope):
+            return await self.app(scope, receive, send)
+        profile = self.profiler.begin(scope["method"], scope["path"])
+        token = current_profile.set(profile)
+        profile.attach("loop", sys._getframe())
+        status = 0
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.detach()
+            current_profile.reset(token)
+            self.profiler.finish(profile, status)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+from infrastructure.repositories.cosmos_session import MAX_TOKEN_LENGTH, SessionTokens, session_tokens
+
+SESSION_HEADER = b"x-session-token"
+
+
+class SessionTokenMiddleware:
+    """`X-Session-Token` の受け渡し (ASGI ミドルウェア)。
+
+    - リクエストのトークンをリポジトリの読み取り (Cosmos の session_token) に渡す
+    - 書き込みで得たトークンを受け取ったトークンとまとめてレスポンスヘッダで返す
+    クライアントは最後に受け取った値を次のリクエストに付ければ、整合性レベルが Session / Eventual でも自分の書き込みを読める。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        incoming = None
+        for name, value in scope["headers"]:
+            if name == SESSION_HEADER:
+                if 0 < len(value) <= MAX_TOKEN_LENGTH:
+                    incoming = value.decode("latin-1")
+                break
+        state = SessionTokens(incoming)
+        token = session_tokens.set(state)
+
+        async def send_with_token(message):
+            if message["type"] == "http.response.start" and state.write_token is not None:
+                message = {**message, "headers": [*message.get("headers", []), (SESSION_HEADER, state.current().encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_token)
+        finally:
+            session_tokens.reset(token)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+import asyncio
+from typing import Awaitable, Callable, Dict, Set, Tuple
+
+
+class SingleFlight:
+    """同一キーの同時読み取りを 1 回のバックエンド呼び出しにまとめる (request coalescing)。
+
+    - 最初の呼び出し元だけが loader を実行し、同じキーで待機中の呼び出し元は結果 (シリアライズ済み bytes) を共有
+    - 完了後はエントリを破棄するため結果のキャッシュはしない (古いデータを返し続けない)
+    - invalidate() は世代番号を進め、実行中の結果へ以降の呼び出し元が相乗りしないようにする
+      (書き込み前に開始済みの読み取りはその結果を受け取る)
+    - loader は呼び出し元から切り離したタスクで実行する。先頭の呼び出し元がキャンセル (クライアント切断) されても
+      読み込みは続き、相乗りした呼び出し元は結果を受け取る (キーはタスク完了時に破棄)
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, Tuple[int, asyncio.Task]] = {}
+        self._tasks: Set[asyncio.Task] = set()  # invalidate() 後も完了まで参照を保持 (GC で中断させない)
+        self._generation = 0
+        # 観測用カウンタ
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: str, loader: Callable[[], Awaitable[bytes]]) -> bytes:
+        entry = self._inflight.get(key)
+        if entry is not None and entry[0] == self._generation:
+            self.shared += 1
+            return await asyncio.shield(entry[1])
+        task = asyncio.ensure_future(loader())
+        self._inflight[key] = (self._generation, task)
+        self._tasks.add(task)
+        task.add_done_callback(lambda t: self._release(key, t))
+        self.calls += 1
+        return await asyncio.shield(task)
+
+    def _release(self, key: str, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if self._inflight.get(key, (None, None))[1] is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # 待機者不在時の "never retrieved" 警告抑止
+
+    def invalidate(self) -> None:
+        """書き込み発生時に呼ぶ。実行中の読み取り結果を以降の呼び出し元へ共有しない。"""
+        self._generation += 1
+        self._inflight.clear()
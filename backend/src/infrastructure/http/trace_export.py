@@ -0,0 +1,148 @@
+"""スパンのバッチ送信 (OTLP/HTTP JSON と、オフライン確認用のローカルファイル)。"""
+from __future__ import annotations
+import json
+import logging
+import os
+import threading
+import urllib.request
+from collections import deque
+from typing import Any, Dict, List, Protocol
+
+logger = logging.getLogger(__name__)
+
+
+class SpanExporter(Protocol):
+    def export(self, payload: dict) -> None: ...
+
+
+def _attr_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}  # OTLP/JSON の int64 は文字列
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attrs: Dict[str, Any]) -> List[dict]:
+    return [{"key": k, "value": _attr_value(v)} for k, v in attrs.items()]
+
+
+def to_otlp(spans: List[Any], service_name: str) -> dict:
+    """スパン列 → OTLP/JSON の ExportTraceServiceRequest (trace / span id は 16 進文字列)。"""
+    out = []
+    for s in spans:
+        span = {
+            "traceId": s.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": s.kind,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": _attributes(s.attributes),
+            "status": {"code": 2, "message": s.error} if s.error is not None else {"code": 0},
+        }
+        if s.parent_id:
+            span["parentSpanId"] = s.parent_id
+        out.append(span)
+    return {"resourceSpans": [{
+        "resource": {"attributes": _attributes({"service.name": service_name})},
+        "scopeSpans": [{"scope": {"name": "todo-api"}, "spans": out}],
+    }]}
+
+
+class OtlpHttpExporter:
+    """OTLP/HTTP (JSON) で Collector へ送る。endpoint は OTEL_EXPORTER_OTLP_ENDPOINT と同じくベース URL (/v1/traces を付与)。"""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.timeout = timeout
+
+    def export(self, payload: dict) -> None:
+        req = urllib.request.Request(
+            self.url, data=json.dumps(payload).encode(), method="POST",
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as res:
+            res.read()
+
+
+class FileSpanExporter:
+    """1 バッチ 1 行の OTLP/JSON を追記する (そのまま Collector の /v1/traces へ POST し直せる)。"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, payload: dict) -> None:
+        line = json.dumps(payload, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class BatchSpanProcessor:
+    """採用されたトレースのスパンを溜め、バックグラウンドスレッドでまとめて送る。
+
+    submit() はリクエスト処理側から呼ばれるため待たない (キュー満杯時は捨てて dropped を数える)。
+    interval 秒ごと、または batch_size 件溜まった時点で送信。送信失敗はログのみ (リクエストには影響させない)。
+    """
+
+    def __init__(
+        self,
+        exporters: List[SpanExporter],
+        service_name: str = "todo-api",
+        max_queue: int = 4096,
+        batch_size: int = 512,
+        interval: float = 5.0,
+    ):
+        self.exporters = list(exporters)
+        self.service_name = service_name
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._queue: deque = deque()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="span-export", daemon=True)
+        self._thread.start()
+
+    def submit(self, spans: List[Any]) -> None:
+        if len(self._queue) + len(spans) > self.max_queue:
+            self.dropped += len(spans)
+            return
+        self._queue.extend(spans)
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+
+    def _drain(self) -> None:
+        while self._queue:
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                batch.append(self._queue.popleft())
+            payload = to_otlp(batch, self.service_name)
+            for exporter in self.exporters:
+                try:
+                    exporter.export(payload)
+                except Exception as e:  # noqa: BLE001
+                    logger.warning("スパン送信に失敗 (%s): %s", type(exporter).__name__, e)
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._drain()
+
+    def force_flush(self) -> None:
+        """キューに残っているスパンをこのスレッドで送る (テスト / 停止時用)。"""
+        self._drain()
+
+    def shutdown(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        self._thread.join(timeout=self.interval + 5.0)
+        self._drain()
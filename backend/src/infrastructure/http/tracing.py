@@ -0,0 +1,295 @@
+"""OpenTelemetry 互換の分散トレーシング (W3C Trace Context + OTLP/JSON)。
+
+- TracingMiddleware: `traceparent` を引き継いでリクエストごとにサーバスパンを開始する
+- TracedProxy: TodoService / リポジトリの公開メソッド呼び出しを子スパンにする (消費 RU / 件数を属性に付与)
+- child_span(): 任意区間 (作成ペイロードの検証など) の子スパン。トレース外では何もしない
+スパンはトレース単位でメモリに溜め、ルート (サーバスパン) 終了時に tail sampling で採否を決めてから
+BatchSpanProcessor (trace_export) へ渡す。エラー / 遅いリクエスト / 上流で sampled 指定されたものは常に残す。
+"""
+from __future__ import annotations
+import os
+import random
+import time
+from contextvars import ContextVar
+from contextlib import nullcontext
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+# トレースに含めないメソッド (呼び出し元の補助 / 値参照のみ)
+_UNTRACED = frozenset({"for_scope", "last_request_charge", "consumed_request_charge"})
+_NOOP = nullcontext()
+
+
+def parse_traceparent(value: Optional[bytes]) -> Optional[Tuple[str, str, bool]]:
+    """`00-<trace-id>-<parent-id>-<flags>` → (trace_id, parent_id, sampled)。不正値は None (新しいトレースを開始)。"""
+    if not value:
+        return None
+    parts = value.decode("latin-1").strip().lower().split("-")
+    if len(parts) < 4 or parts[0] == "ff" or len(parts[0]) != 2:
+        return None
+    _, trace_id, parent_id, flags = parts[:4]
+    if len(trace_id) != 32 or len(parent_id) != 16 or len(flags) != 2:
+        return None
+    try:
+        if int(trace_id, 16) == 0 or int(parent_id, 16) == 0:
+            return None
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    return trace_id, parent_id, sampled
+
+
+class _Trace:
+    """1 トレース (このプロセス内分) のスパン置き場。"""
+    __slots__ = ("trace_id", "tracer", "spans", "sampled")
+
+    def __init__(self, trace_id: str, tracer: "Tracer", sampled: bool):
+        self.trace_id = trace_id
+        self.tracer = tracer
+        self.spans: List[Span] = []
+        self.sampled = sampled
+
+    def start(self, name: str, kind: int, parent_id: Optional[str], attributes: Optional[Dict[str, Any]] = None) -> "Span":
+        return Span(self, name, kind, parent_id, attributes)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error", "is_root")
+
+    def __init__(self, trace: _Trace, name: str, kind: int, parent_id: Optional[str], attributes: Optional[Dict[str, Any]] = None):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = dict(attributes) if attributes else {}
+        self.error: Optional[str] = None
+        self.is_root = False
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def end(self, exc: Optional[BaseException] = None) -> None:
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.error = f"{type(exc).__name__}: {exc}"
+            self.attributes["exception.type"] = type(exc).__name__
+        self.trace.spans.append(self)  # list.append はスレッドセーフ (ワーカースレッドの子スパンも同じトレースへ)
+        if self.is_root:
+            self.trace.tracer._finish(self.trace, self)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class _SpanScope:
+    """子スパンを現在のスパンにして実行し、終了時に戻すコンテキストマネージャ。"""
+    __slots__ = ("_span", "_token")
+
+    def __init__(self, span: Span):
+        self._span = span
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _current_span.reset(self._token)
+        self._span.end(exc)
+        return False
+
+
+def child_span(name: str, kind: int = KIND_INTERNAL, **attributes: Any):
+    """現在のスパンの子スパン (トレース外 = トレーシング無効 / バックグラウンド処理では何もしない)。"""
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP
+    return _SpanScope(parent.trace.start(name, kind, parent.span_id, attributes))
+
+
+def _count(result: Any) -> Optional[int]:
+    """戻り値 → 件数属性 (一覧は件数、get_many の (items, missing) は items の件数、単一は 0 / 1)。"""
+    if isinstance(result, (list, dict)):
+        return len(result)
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        return len(result[0])
+    if result is None:
+        return 0
+    if hasattr(result, "id"):
+        return 1
+    return None
+
+
+def _traced_call(target: Any, name: str, kind: int, fn: Any, *args: Any, **kwargs: Any) -> Any:
+    parent = _current_span.get()
+    if parent is None:
+        return fn(*args, **kwargs)
+    charge_before = getattr(target, "consumed_request_charge", None)
+    with _SpanScope(parent.trace.start(name, kind, parent.span_id)) as span:
+        result = fn(*args, **kwargs)
+        count = _count(result)
+        if count is not None:
+            span.attributes["todo.count"] = count
+        if charge_before is not None:
+            span.attributes["db.cosmos.request_charge"] = round(target.consumed_request_charge - charge_before, 2)
+    return result
+
+
+class TracedProxy:
+    """対象の公開メソッド呼び出しを子スパン (`<prefix>.<method>`) で包むプロキシ。
+
+    属性 (reports_request_charge 等) はそのまま対象の値を返す。
+    scoped() が返す範囲限定リポジトリも同じくプロキシする。
+    """
+    __slots__ = ("_target", "_prefix", "_kind")
+
+    def __init__(self, target: Any, prefix: Optional[str] = None, kind: int = KIND_INTERNAL):
+        self._target = target
+        self._prefix = prefix or type(target).__name__
+        self._kind = kind
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if name.startswith("_") or name in _UNTRACED or not callable(attr):
+            return attr
+        if name == "scoped":
+            return lambda scope: TracedProxy(attr(scope), self._prefix, self._kind)
+        return partial(_traced_call, self._target, f"{self._prefix}.{name}", self._kind, attr)
+
+
+class Tracer:
+    """スパンの生成と tail sampling。
+
+    - sample_rate: 通常 (成功かつ slow_ms 未満) のトレースを残す確率
+    - slow_ms: これ以上かかったトレースは常に残す
+    - 5xx / 例外を含むトレース、上流の traceparent で sampled 指定されたトレースも常に残す
+    """
+
+    def __init__(self, processor: Any, sample_rate: float = 0.01, slow_ms: float = 500.0):
+        self.processor = processor
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.kept = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_env(cls) -> Optional[Tracer]:
+        """OTEL_EXPORTER_OTLP_ENDPOINT / TRACE_FILE のどちらかが指定されていれば有効 (未指定なら None)。
+
+        TRACE_SAMPLE_RATE / TRACE_SLOW_MS / OTEL_SERVICE_NAME / TRACE_EXPORT_INTERVAL_SEC で調整。
+        """
+        from .trace_export import BatchSpanProcessor, FileSpanExporter, OtlpHttpExporter  # 無効時は読み込まない
+
+        exporters: List[Any] = []
+        endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+        if endpoint:
+            exporters.append(OtlpHttpExporter(endpoint))
+        trace_file = os.getenv("TRACE_FILE")
+        if trace_file:
+            exporters.append(FileSpanExporter(trace_file))
+        if not exporters:
+            return None
+        processor = BatchSpanProcessor(
+            exporters,
+            service_name=os.getenv("OTEL_SERVICE_NAME", "todo-api"),
+            interval=float(os.getenv("TRACE_EXPORT_INTERVAL_SEC", "5")),
+        )
+        return cls(
+            processor,
+            sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0.01")),
+            slow_ms=float(os.getenv("TRACE_SLOW_MS", "500")),
+        )
+
+    def start_trace(self, name: str, traceparent: Optional[bytes], attributes: Optional[Dict[str, Any]] = None) -> Span:
+        """サーバスパン (このプロセス内のルート) を開始する。"""
+        parent = parse_traceparent(traceparent)
+        if parent is None:
+            trace, parent_id = _Trace(os.urandom(16).hex(), self, False), None
+        else:
+            trace, parent_id = _Trace(parent[0], self, parent[2]), parent[1]
+        span = trace.start(name, KIND_SERVER, parent_id, attributes)
+        span.is_root = True
+        return span
+
+    def _keep(self, trace: _Trace, root: Span) -> bool:
+        if trace.sampled or root.duration_ms >= self.slow_ms:
+            return True
+        if any(s.error is not None for s in trace.spans):
+            return True
+        return random.random() < self.sample_rate
+
+    def _finish(self, trace: _Trace, root: Span) -> None:
+        if self._keep(trace, root):
+            self.kept += 1
+            self.processor.submit(trace.spans)
+        else:
+            self.dropped += 1
+
+    def wrap(self, target: Any, prefix: Optional[str] = None, kind: int = KIND_INTERNAL) -> TracedProxy:
+        return TracedProxy(target, prefix, kind)
+
+    def shutdown(self) -> None:
+        """未送信のスパンを送ってから停止する (lifespan 終了時)。"""
+        self.processor.shutdown()
+
+
+class TracingMiddleware:
+    """リクエストごとのサーバスパン (ASGI ミドルウェア)。
+
+    スパン名はルーティング後のパステンプレート (`GET /api/todos/{todo_id}`)。5xx はエラーとして記録する。
+    Tracer 未設定時は main でミドルウェア自体を登録しない。
+    """
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value
+                break
+        method = scope["method"]
+        root = self.tracer.start_trace(f"{method} {scope['path']}", traceparent, {
+            "http.request.method": method,
+            "url.path": scope["path"],
+        })
+        token = _current_span.set(root)
+        status = 0
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        exc: Optional[BaseException] = None
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as e:
+            exc = e
+            raise
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                root.name = f"{method} {route}"
+                root.attributes["http.route"] = route
+            root.attributes["http.response.status_code"] = status or 500
+            if status >= 500 and root.error is None:
+                root.error = f"HTTP {status}"
+            _current_span.reset(token)
+            root.end(exc)
@@ -0,0 +1,64 @@
+"""Cosmos DB のセッショントークン (read-your-writes) をリクエスト単位で受け渡す。
+
+アカウントを Session / Eventual 整合性で運用しても、クライアントが直前の書き込みで受け取ったトークンを
+次の読み取りで渡せば、そのトークンの LSN まで追いついたレプリカから読まれる (別レプリカ / 別インスタンス経由でも)。
+トークン形式: `<pkRangeId>:<version>#<globalLsn>[#<region>=<lsn>...]` (V1 は `<pkRangeId>:<lsn>`)、
+複数パーティションキー範囲はカンマ区切り。
+"""
+from __future__ import annotations
+import threading
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+MAX_TOKEN_LENGTH = 8192
+
+
+def _lsn(value: str) -> int:
+    parts = value.split("#")
+    try:
+        return int(parts[1] if len(parts) > 1 else parts[0])
+    except ValueError:
+        return -1
+
+
+def merge_session_tokens(*tokens: Optional[str]) -> Optional[str]:
+    """複数のトークンをパーティションキー範囲ごとに LSN の大きい方へまとめる (範囲の出現順は維持)。"""
+    merged: Dict[str, Tuple[int, str]] = {}
+    for token in tokens:
+        for part in (token or "").split(","):
+            rid, sep, value = part.strip().partition(":")
+            if not sep or not rid:
+                continue
+            lsn = _lsn(value)
+            if rid not in merged or lsn > merged[rid][0]:
+                merged[rid] = (lsn, part.strip())
+    return ",".join(p for _, p in merged.values()) or None
+
+
+class SessionTokens:
+    """1 リクエスト分: クライアントから受け取ったトークンと、このリクエストの書き込みで得たトークン。
+
+    リポジトリ I/O はワーカースレッドで実行されるため更新はロック下で行う。
+    """
+
+    def __init__(self, read_token: Optional[str] = None):
+        self.read_token = read_token
+        self.write_token: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def observe(self, token: Optional[str]) -> None:
+        """書き込み応答の x-ms-session-token を取り込む。"""
+        if token:
+            with self._lock:
+                self.write_token = merge_session_tokens(self.write_token, token)
+
+    def current(self) -> Optional[str]:
+        """読み取りに渡すトークン (受け取ったもの + 同じリクエスト内の書き込み分)。"""
+        with self._lock:
+            if self.write_token is None:
+                return self.read_token
+            return merge_session_tokens(self.read_token, self.write_token)
+
+
+# 現在のリクエストのセッショントークン (SessionTokenMiddleware が設定。リクエスト外では None)
+session_tokens: ContextVar[Optional[SessionTokens]] = ContextVar("session_tokens", default=None)
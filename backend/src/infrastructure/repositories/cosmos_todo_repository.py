@@ -1,31 +1,264 @@
 from __future__ import annotations
-from typing import List, Any
-from fastapi.encoders import jsonable_encoder
-from domain.models.todo import Todo
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Any, Optional
+from domain.models.todo import Todo, PRIORITY_RANK, to_utc
+from domain.models.partition import PartitionScope
+from domain.models.todo_sort import top_n
 from domain.repositories.todo_repository import TodoRepository
 from .in_memory_todo_repository import DuplicateTodoIdError
+from .cosmos_session import session_tokens
 
 try:  # 型ヒント用 (azure-cosmos が無いテスト環境でも失敗しない)
     from azure.cosmos.exceptions import CosmosHttpResponseError  # type: ignore
 except Exception:  # pragma: no cover
     CosmosHttpResponseError = Exception  # type: ignore
 
+try:
+    from azure.core import MatchConditions  # type: ignore
+except Exception:  # pragma: no cover
+    MatchConditions = None  # type: ignore
+
+# sort フィールド → Cosmos ドキュメントパス (priority は数値順位で並べる)
+_SORT_PATHS = {
+    "priority": "c.priorityRank",
+    "dueDate": "c.dueDate",
+    "createdAt": "c.createdAt",
+    "updatedAt": "c.updatedAt",
+    "title": "c.title",
+}
+
+# cosmos.bicep の compositeIndexes (並び替え用) と一致させる: ((パス, 降順), ...)。
+# 複数プロパティの ORDER BY は完全一致 (または全反転) する複合インデックスが無いと Cosmos が 400 を返すため、
+# ここに無い並びは list_sorted でメモリ上の top-N へフォールバックする
+_COMPOSITE_INDEXES = frozenset({
+    (("c.priorityRank", False), ("c.dueDate", True), ("c.createdAt", False), ("c.id", False)),
+    (("c.priorityRank", True), ("c.dueDate", False), ("c.id", False)),
+    (("c.priorityRank", False), ("c.id", False)),
+    (("c.dueDate", False), ("c.id", False)),
+    (("c.createdAt", False), ("c.id", False)),
+    (("c.updatedAt", True), ("c.id", False)),
+    (("c.title", False), ("c.id", False)),
+})
+
+
+# list_due の ORDER BY c.completed, c.dueDate (completed 等価 + dueDate 範囲) 用
+_DUE_INDEX = (("c.completed", False), ("c.dueDate", False))
+
+logger = logging.getLogger("todo-api")
+
+
+def _composite(index) -> List[dict]:
+    return [{"path": "/" + path[len("c."):], "order": "descending" if desc else "ascending"} for path, desc in index]
+
+
+def indexing_policy() -> dict:
+    """Todo コンテナの索引ポリシー (cosmos.bicep と同じ)。アプリがコンテナを作成する場合 (エミュレータ等) に指定する。"""
+    return {
+        "indexingMode": "consistent",
+        "automatic": True,
+        "includedPaths": [{"path": "/*"}],
+        "excludedPaths": [{"path": '/"_etag"/?'}],
+        "compositeIndexes": [_composite(index) for index in (_DUE_INDEX, *sorted(_COMPOSITE_INDEXES))],
+    }
+
+
+def archive_indexing_policy() -> dict:
+    """アーカイブ (コールド) コンテナの索引ポリシー (cosmos.bicep と同じ。一覧の updatedAt 降順と範囲指定のみ)。"""
+    return {
+        "indexingMode": "consistent",
+        "automatic": True,
+        "includedPaths": [{"path": "/updatedAt/?"}, {"path": "/tenantId/?"}, {"path": "/userId/?"}],
+        "excludedPaths": [{"path": "/*"}],
+        "compositeIndexes": [_composite((("c.updatedAt", True), ("c.id", False)))],
+    }
+
+
+def _missing_index(e: Exception) -> bool:
+    """複合インデックスの無い ORDER BY に対する 400 (コンテナが bicep 以外で作られ索引ポリシーが異なる場合)。"""
+    return getattr(e, "status_code", None) == 400
+
+
+def _indexed_order(order: List[tuple]) -> Optional[List[tuple]]:
+    """order + c.id (安定化) の ORDER BY 項のうち複合インデックスで処理できるもの (無ければ None)。
+
+    c.id は昇順を優先し、一致しなければ降順 (= 全反転したインデックスとの一致) を試す
+    (単一フィールドの降順 `-dueDate` 等は [dueDate ASC, id ASC] の全反転で処理し、同値の並びは id 降順になる)。
+    """
+    terms = [(_SORT_PATHS[name], desc) for name, desc in order]
+    for id_desc in (False, True):
+        candidate = (*terms, ("c.id", id_desc))
+        inverted = tuple((path, not desc) for path, desc in candidate)
+        if candidate in _COMPOSITE_INDEXES or inverted in _COMPOSITE_INDEXES:
+            return list(candidate)
+    return None
+
+# 直近の書き込みで消費した RU (x-ms-request-charge)。書き込みを実行したスレッドごとに保持
+_charges = threading.local()
+
+
+def _record_write(headers, _result) -> None:
+    """書き込みの response_hook: 消費 RU と、リクエスト中ならセッショントークン (read-your-writes 用) を記録。"""
+    try:
+        _charges.value = float(headers.get("x-ms-request-charge"))
+    except (TypeError, ValueError):
+        _charges.value = None
+    state = session_tokens.get()
+    if state is not None:
+        state.observe(headers.get("x-ms-session-token"))
+
+
+def request_charge_hook(pipeline_response) -> None:
+    """CosmosClient(raw_response_hook=...) 用。HTTP 応答ごと (クエリはページごと) の RU をスレッド単位で積算する。"""
+    try:
+        charge = float(pipeline_response.http_response.headers.get("x-ms-request-charge"))
+    except (AttributeError, TypeError, ValueError):
+        return
+    _charges.total = getattr(_charges, "total", 0.0) + charge
+
+
+# パーティションキーパス → Todo フィールド (複数指定 = 階層パーティションキー)
+_PARTITION_FIELDS = {"/id": "id", "/tenantId": "tenantId", "/userId": "userId"}
+
+
+def parse_partition_key_paths(spec: str | None) -> List[str]:
+    """COSMOS_PARTITION_KEY ("/tenantId,/userId" 等) → パスのリスト。未指定は ["/id"]。"""
+    paths = [p.strip() for p in (spec or "").split(",") if p.strip()] or ["/id"]
+    unknown = [p for p in paths if p not in _PARTITION_FIELDS]
+    if unknown:
+        raise ValueError(f"unsupported partition key path: {', '.join(unknown)}")
+    if len(paths) > 3:
+        raise ValueError("hierarchical partition keys support up to 3 levels")
+    return paths
+
+
+def _to_doc(todo: Todo) -> dict:
+    """Todo → Cosmos ドキュメント。ORDER BY 用に priorityRank を付与。
+
+    フィールドは str / bool / list[str] / datetime のみのため、model_dump + jsonable_encoder を経由せず
+    属性辞書から直接変換する。datetime は UTC に正規化した isoformat 文字列で保存する
+    (Cosmos は範囲述語 / ORDER BY を文字列として比較するため、クライアントのオフセットのままだと時刻順にならない)。
+    """
+    doc = {k: (to_utc(v).isoformat() if isinstance(v, datetime) else v) for k, v in todo.__dict__.items()}
+    doc["tags"] = list(dict.fromkeys(todo.tags))  # 部分更新 (属性代入) は検証を通らないため保存時にも重複除去 (tag_counts と一致させる)
+    doc["priorityRank"] = PRIORITY_RANK.get(todo.priority, -1)
+    return doc
+
+
 class CosmosTodoRepository(TodoRepository):
-    def __init__(self, container: Any):
+    reports_request_charge = True
+
+    def __init__(
+        self,
+        container: Any,
+        partition_key_paths: Optional[List[str]] = None,
+        scope: Optional[PartitionScope] = None,
+    ):
         """Cosmos DB コンテナを利用したTodoリポジトリ実装（簡易版）。
 
         container: Azure Cosmos のコンテナオブジェクト (SDK stub / 本物どちらも想定)
+        partition_key_paths: コンテナのパーティションキーパス (既定 ["/id"]、複数指定で階層キー)
+        scope: テナント / ユーザー範囲 (scoped() で生成)。
+            キー値が範囲から決まる場合、クエリは partition_key 指定の単一パーティション (階層キーはプレフィックス)、
+            get / delete は正しいキーでの point read / point delete になる。
         """
         self._c = container
+        self._pk_paths = partition_key_paths or ["/id"]
+        self._pk_fields = [_PARTITION_FIELDS[p] for p in self._pk_paths]
+        self._scope = scope or PartitionScope()
         # readiness 判定用フラグ
         self.is_ready = True
 
+    @property
+    def last_request_charge(self) -> Optional[float]:
+        """このスレッドで直前に実行した add() の消費 RU (取得できなければ None)。一括取り込みの RU 制御用。"""
+        return getattr(_charges, "value", None)
+
+    @property
+    def consumed_request_charge(self) -> float:
+        """このスレッドで積算した消費 RU (request_charge_hook 設定時)。呼び出し前後の差分がその呼び出しの RU。"""
+        return getattr(_charges, "total", 0.0)
+
+    def scoped(self, scope: PartitionScope) -> "CosmosTodoRepository":
+        """同一コンテナをテナント / ユーザー範囲に限定したリポジトリ。"""
+        return CosmosTodoRepository(self._c, self._pk_paths, scope)
+
+    # --- パーティションキー ---------------------------------------------------
+
+    def _pk(self, values: List[Any]) -> Any:
+        return values[0] if len(values) == 1 else values
+
+    def _pk_of(self, doc: dict) -> Any:
+        """ドキュメント自身のパーティションキー値。"""
+        return self._pk([doc.get(f) for f in self._pk_fields])
+
+    def _key_value(self, field: str, todo_id: Optional[str] = None) -> Optional[str]:
+        if field == "id":
+            return todo_id
+        return self._scope.tenant_id if field == "tenantId" else self._scope.user_id
+
+    def _pk_for_id(self, todo_id: str) -> Any:
+        """id + 範囲から完全なキー値が決まれば返す (point read 可)。決まらなければ None。"""
+        values = []
+        for f in self._pk_fields:
+            v = self._key_value(f, todo_id)
+            if v is None:
+                return None
+            values.append(v)
+        return self._pk(values)
+
+    def _query_options(self) -> dict:
+        """範囲からキー (階層キーは先頭からのプレフィックス) が決まれば単一パーティション、無ければクロスパーティション。"""
+        prefix = []
+        for f in self._pk_fields:
+            v = self._key_value(f)
+            if v is None:
+                break
+            prefix.append(v)
+        if not prefix:
+            return {"enable_cross_partition_query": True, **self._session_options()}
+        return {"partition_key": prefix[0] if len(self._pk_fields) == 1 else prefix, **self._session_options()}
+
+    def _session_options(self) -> dict:
+        """リクエストにセッショントークンがあれば読み取りに渡す (そのトークンの書き込みまで反映済みのレプリカから読む)。"""
+        state = session_tokens.get()
+        token = state.current() if state is not None else None
+        return {"session_token": token} if token else {}
+
+    def _write_options(self) -> dict:
+        # SDK の ContainerProxy のみ response_hook を受け付ける
+        return {"response_hook": _record_write} if hasattr(self._c, "client_connection") else {}
+
+    def _scope_filter(self, where: List[str], params: List[dict]) -> None:
+        """範囲の絞り込み条件を追加 (パーティション外キーでの範囲指定も正しく絞るため常に付与)。"""
+        if self._scope.tenant_id is not None:
+            where.append("c.tenantId = @tenantId")
+            params.append({"name": "@tenantId", "value": self._scope.tenant_id})
+        if self._scope.user_id is not None:
+            where.append("c.userId = @userId")
+            params.append({"name": "@userId", "value": self._scope.user_id})
+
+    def _query(self, query: str, params: Optional[List[dict]] = None):
+        if params:
+            return self._c.query_items(query, parameters=params, **self._query_options())
+        return self._c.query_items(query, **self._query_options())
+
+    def _find(self, todo_id: str) -> Optional[dict]:
+        """id によるクエリ検索 (キー値が決まらず point read できない場合)。"""
+        where, params = ["c.id = @id"], [{"name": "@id", "value": todo_id}]
+        self._scope_filter(where, params)
+        for doc in self._query("SELECT * FROM c WHERE " + " AND ".join(where), params):
+            return doc
+        return None
+
     def add(self, todo: Todo) -> Todo:
         """新規追加。ID 重複は DuplicateTodoIdError。
 
         優先: create_item で直接追加 → 409 (Conflict) なら重複と判定。
         FakeContainer 等で create_item 以外メソッドが無い場合は従来挙動。
         """
+        todo = self._scope.apply(todo)
         create = getattr(self._c, "create_item", None)
         if not create:
             # フォールバック (テスト用フェイク)
@@ -37,9 +270,9 @@ class CosmosTodoRepository(TodoRepository):
                 raise DuplicateTodoIdError(todo.id)
             self._c.create_item(todo.model_dump())
             return todo
+        _charges.value = None
         try:
-            doc = jsonable_encoder(todo.model_dump())
-            create(doc)
+            create(_to_doc(todo), **self._write_options())
         except CosmosHttpResponseError as e:  # type: ignore
             # azure-cosmos Conflict -> status_code 409 or sub_status
             if getattr(e, "status_code", None) == 409:
@@ -51,41 +284,161 @@ class CosmosTodoRepository(TodoRepository):
         """全件取得。規模拡大時は paging / continuation token 対応が必要。
 
         NOTE: 現状は SELECT *。本番では必要フィールド限定 & continuation token を活用。
+        範囲指定時は単一パーティション (RU / レイテンシはそのテナントの件数のみに依存)。
         """
-        return [
-            Todo(**doc)
-            for doc in self._c.query_items(
-                "SELECT * FROM c",
-                enable_cross_partition_query=True,
-            )
-        ]
+        where: List[str] = []
+        params: List[dict] = []
+        self._scope_filter(where, params)
+        query = "SELECT * FROM c" + (" WHERE " + " AND ".join(where) if where else "")
+        return [Todo(**doc) for doc in self._query(query, params)]
+
+    def list_sorted(self, order: List[tuple], limit: Optional[int] = None) -> List[Todo]:
+        """ORDER BY (+ TOP) による並び替え取得。末尾に c.id を加え全順序にする。
+
+        複数フィールドの ORDER BY には一致する複合インデックスが必要 (cosmos.bicep / _COMPOSITE_INDEXES)。
+        宣言されていない並びは範囲内の全件を取得してメモリ上で top-N 選択する (結果は同じ、RU は件数に比例)。
+        """
+        if not order:
+            indexed = [("c.id", False)]  # 単一プロパティの ORDER BY は範囲インデックスで処理できる
+        else:
+            indexed = _indexed_order(order)
+            if indexed is None:
+                return top_n(self.list(), order, limit)
+        terms = [f"{path} {'DESC' if desc else 'ASC'}" for path, desc in indexed]
+        params: List[dict] = []
+        top = ""
+        if limit is not None:
+            top = "TOP @limit "
+            params.append({"name": "@limit", "value": int(limit)})
+        where: List[str] = []
+        self._scope_filter(where, params)
+        query = f"SELECT {top}* FROM c " + ("WHERE " + " AND ".join(where) + " " if where else "") + "ORDER BY " + ", ".join(terms)
+        try:
+            return [Todo(**doc) for doc in self._c.query_items(query, parameters=params, **self._query_options())]
+        except CosmosHttpResponseError as e:  # type: ignore
+            if not _missing_index(e):
+                raise
+            logger.warning("複合インデックスが無いため並び替えをメモリ上で行います: %s", ", ".join(terms))
+            return top_n(self.list(), order, limit)
+
+    def list_due(
+        self,
+        before: Optional[datetime] = None,
+        after: Optional[datetime] = None,
+        completed: Optional[bool] = None,
+    ) -> List[Todo]:
+        """期限範囲 (after <= dueDate < before) の Todo を期限昇順で取得。
+
+        範囲述語 + ORDER BY c.dueDate は cosmos.bicep の複合インデックス
+        (completed ASC, dueDate ASC) で処理されるため全件スキャンにならない。
+        dueDate は UTC の ISO8601 文字列で保存される (_to_doc) ため、境界値も UTC ISO 文字列で比較する。
+        正規化前に保存されたドキュメントは tools/backfill_documents.py で書き直す。
+        """
+        where = ["IS_DEFINED(c.dueDate)", "NOT IS_NULL(c.dueDate)"]
+        params: List[dict] = []
+        if after is not None:
+            where.append("c.dueDate >= @after")
+            params.append({"name": "@after", "value": to_utc(after).isoformat()})
+        if before is not None:
+            where.append("c.dueDate < @before")
+            params.append({"name": "@before", "value": to_utc(before).isoformat()})
+        if completed is not None:
+            where.append("c.completed = @completed")
+            params.append({"name": "@completed", "value": completed})
+        self._scope_filter(where, params)
+        query = "SELECT * FROM c WHERE " + " AND ".join(where) + " ORDER BY c.completed ASC, c.dueDate ASC"
+        try:
+            todos = [Todo(**doc) for doc in self._c.query_items(query, parameters=params, **self._query_options())]
+        except CosmosHttpResponseError as e:  # type: ignore
+            if not _missing_index(e):
+                raise
+            logger.warning("期限の複合インデックスが無いため範囲内の全件から絞り込みます")
+            return TodoRepository.list_due(self, before=before, after=after, completed=completed)
+        if completed is None:  # completed 混在時は複合インデックス順 (completed 優先) を期限順に並べ直す
+            todos.sort(key=lambda t: to_utc(t.dueDate))
+        return todos
+
+    def list_completed_before(self, cutoff: datetime, limit: Optional[int] = None) -> List[Todo]:
+        """完了済みかつ updatedAt < cutoff の Todo (アーカイブ移動対象)。TOP で 1 回の取得件数を抑える。"""
+        where = ["c.completed = true", "c.updatedAt < @cutoff"]
+        params: List[dict] = [{"name": "@cutoff", "value": to_utc(cutoff).isoformat()}]
+        self._scope_filter(where, params)
+        top = ""
+        if limit is not None:
+            top = "TOP @limit "
+            params.append({"name": "@limit", "value": int(limit)})
+        query = f"SELECT {top}* FROM c WHERE " + " AND ".join(where)
+        return [Todo(**doc) for doc in self._c.query_items(query, parameters=params, **self._query_options())]
+
+    def tag_counts(self) -> List[tuple]:
+        """タグ × 完了状態ごとの件数を 1 回の集計クエリで取得 (タグカタログ再構築用)。
+
+        JOIN はタグの出現ごとに数えるが、保存時 (_to_doc) に重複を除いているため Todo 単位の件数と一致する。
+        戻り値: [(tag, completed, count), ...]
+        """
+        where: List[str] = []
+        params: List[dict] = []
+        self._scope_filter(where, params)
+        rows = self._query(
+            "SELECT t AS tag, c.completed AS completed, COUNT(1) AS n FROM c JOIN t IN c.tags "
+            + ("WHERE " + " AND ".join(where) + " " if where else "")
+            + "GROUP BY t, c.completed",
+            params,
+        )
+        return [(r["tag"], bool(r.get("completed")), int(r.get("n", 0))) for r in rows]
 
     def get(self, todo_id: str):
-        """ID 取得。存在しなければ None。point read 優先。"""
+        """ID 取得。存在しなければ None。
+
+        キー値が id + 範囲から決まれば point read (1 RU)。
+        決まらない場合 (例: /tenantId キーで範囲指定なし) は id クエリで検索する。
+        """
         read_item = getattr(self._c, "read_item", None)
-        if read_item:
+        pk = self._pk_for_id(todo_id)
+        if read_item and pk is not None:
             try:
-                doc = read_item(item=todo_id, partition_key=todo_id)
-                return Todo(**doc)
+                doc = read_item(item=todo_id, partition_key=pk, **self._session_options())
             except Exception:  # NotFound 等は None 返却
                 return None
-        # フォールバック (フェイクコンテナ)
-        for doc in self._c.query_items(
-            "SELECT * FROM c WHERE c.id = @id",
-            parameters=[{"name": "@id", "value": todo_id}],
-            enable_cross_partition_query=True,
-        ):
-            return Todo(**doc)
-        return None
+            todo = Todo(**doc)
+            return todo if self._scope.matches(todo) else None
+        # フォールバック (キー値不明 / フェイクコンテナ)
+        doc = self._find(todo_id)
+        return Todo(**doc) if doc is not None else None
+
+    def get_many(self, ids: List[str]) -> Dict[str, Todo]:
+        """複数 ID を 1 往復で取得。見つかったものだけ id -> Todo で返す。
+
+        SDK が read_many_items を持ち全キー値が決まる場合はそれを利用 (point read の束)、
+        それ以外 (azure-cosmos 4.6 等) は ARRAY_CONTAINS による 1 回のクエリ
+        (範囲指定時は単一パーティション)。
+        """
+        if not ids:
+            return {}
+        read_many = getattr(self._c, "read_many_items", None)
+        keys = [self._pk_for_id(todo_id) for todo_id in ids]
+        if read_many and all(k is not None for k in keys):
+            docs = read_many(items=list(zip(ids, keys)), **self._session_options())
+        else:
+            where, params = ["ARRAY_CONTAINS(@ids, c.id)"], [{"name": "@ids", "value": list(ids)}]
+            self._scope_filter(where, params)
+            docs = self._query("SELECT * FROM c WHERE " + " AND ".join(where), params)
+        found = {}
+        for doc in docs:
+            todo = Todo(**doc)
+            if self._scope.matches(todo):
+                found[todo.id] = todo
+        return found
 
     def save(self, todo: Todo) -> Todo:
         """更新 (簡易 upsert)。本来は replace_item / upsert_item を利用。"""
         # Cosmos では create_item は重複 id で 409 となるため upsert_item を利用
+        todo = self._scope.apply(todo)
         try:
             upsert = getattr(self._c, "upsert_item", None)
-            doc = jsonable_encoder(todo.model_dump())
+            doc = _to_doc(todo)
             if upsert:
-                upsert(doc)
+                upsert(doc, **self._write_options())
             else:  # フォールバック (古いSDK) - 楽観的に create -> 失敗時は置換を試行
                 try:
                     self._c.create_item(doc)
@@ -101,25 +454,49 @@ class CosmosTodoRepository(TodoRepository):
         return todo
 
     def delete(self, todo_id: str) -> bool:
-        """削除。存在すれば True。point delete 優先。"""
+        """削除。存在すれば True。キー値が決まれば point delete、決まらなければ検索してからキー指定で削除。"""
         delete_item = getattr(self._c, "delete_item", None)
-        if delete_item:
+        pk = self._pk_for_id(todo_id)
+        if delete_item and pk is not None:
+            if not self._scope.is_empty and self.get(todo_id) is None:  # 範囲外 (キー外の項目が不一致) は削除しない
+                return False
             try:
-                delete_item(item=todo_id, partition_key=todo_id)
+                delete_item(item=todo_id, partition_key=pk, **self._write_options())
                 return True
             except Exception:
                 return False
-        # フォールバック: クエリして削除 (フェイク用)
-        to_delete = []
-        for doc in self._c.query_items(
-            "SELECT * FROM c WHERE c.id = @id",
-            parameters=[{"name": "@id", "value": todo_id}],
-            enable_cross_partition_query=True,
-        ):
-            to_delete.append(doc)
-        for d in to_delete:
+        # キー値不明 / フェイク: 検索してドキュメント自身のキーで削除
+        doc = self._find(todo_id)
+        if doc is None:
+            return False
+        try:
+            self._c.delete_item(doc, partition_key=self._pk_of(doc), **self._write_options())
+        except Exception:
+            return False
+        return True
+
+    def pop_if(self, todo_id: str, predicate: Callable[[Todo], bool]) -> Optional[Todo]:
+        """predicate を満たす場合のみ削除。読み取った _etag を if-match に指定し、判定後に更新されていれば 412 で削除しない。"""
+        read_item = getattr(self._c, "read_item", None)
+        pk = self._pk_for_id(todo_id)
+        if read_item and pk is not None:
             try:
-                self._c.delete_item(d, partition_key=d.get("id"))
-            except Exception:
-                pass
-        return len(to_delete) > 0
+                doc = read_item(item=todo_id, partition_key=pk, **self._session_options())
+            except Exception:  # NotFound 等
+                return None
+        else:
+            doc = self._find(todo_id)
+            if doc is None:
+                return None
+            pk = self._pk_of(doc)
+        todo = Todo(**doc)
+        if not self._scope.matches(todo) or not predicate(todo):
+            return None
+        options = self._write_options()
+        if doc.get("_etag") and MatchConditions is not None:
+            options.update(etag=doc["_etag"], match_condition=MatchConditions.IfNotModified)
+        try:
+            self._c.delete_item(todo_id, partition_key=pk, **options)
+        except Exception:  # 412 (判定後に更新された) / 404 (削除済み)
+            return None
+        return todo
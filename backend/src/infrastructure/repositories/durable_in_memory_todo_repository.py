@@ -0,0 +1,155 @@
+from __future__ import annotations
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from domain.models.todo import Todo
+from .in_memory_todo_repository import InMemoryTodoRepository
+from .snapshot_store import SnapshotStore, SnapshotView
+
+logger = logging.getLogger("todo-api")
+
+
+class DurableInMemoryTodoRepository(InMemoryTodoRepository):
+    """スナップショット + WAL で再起動をまたいで状態を保持する InMemory リポジトリ。
+
+    - 書き込みは確定後に WAL へ追記 (_on_put / _on_delete フック)
+    - snapshot() で全件をバイナリスナップショットへ書き出し WAL を切り替え
+    - warm_start() はスナップショットを mmap し WAL を読むだけで即座に戻り、全件の展開はバックグラウンドで行う
+      展開完了前の get() はスナップショットの二分探索 + WAL 差分で応答し、その他の操作は展開完了を待つ
+    """
+
+    def __init__(self, directory: str, stripes: int = 64, fsync: bool = False):
+        super().__init__(stripes=stripes)
+        self._store = SnapshotStore(directory, fsync=fsync)
+        self._loaded = threading.Event()
+        self._start_lock = threading.Lock()
+        self._started = False
+        self._view: Optional[SnapshotView] = None
+        self._overlay: Dict[str, Optional[Todo]] = {}
+        self._snapshot_lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    @property
+    def pending_log_entries(self) -> int:
+        """前回スナップショット以降の WAL 件数 (定期スナップショットの要否判定用)。"""
+        return self._store.wal_entries
+
+    def warm_start(self) -> None:
+        """スナップショットの遅延ロードを開始する (冪等)。"""
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+            self._view = self._store.open_snapshot()
+            self._overlay = self._store.replay(self._view.wal_gen if self._view else 0)
+        threading.Thread(target=self._materialize, name="snapshot-loader", daemon=True).start()
+
+    def _materialize(self) -> None:
+        try:
+            items: Dict[str, Todo] = {}
+            if self._view is not None:
+                for todo in self._view:
+                    items[todo.id] = todo
+            for todo_id, todo in self._overlay.items():
+                if todo is None:
+                    items.pop(todo_id, None)
+                else:
+                    items[todo_id] = todo
+            with self._all_locked():
+                self._load(items)
+            logger.info("snapshot loaded: %d items", len(items))
+        except Exception as e:  # noqa: BLE001
+            logger.exception("スナップショットの読み込みに失敗: %s", e)
+        finally:
+            view, self._view, self._overlay = self._view, None, {}
+            self._loaded.set()
+            if view is not None:
+                view.close()
+
+    def _wait(self) -> None:
+        if not self._loaded.is_set():
+            self.warm_start()
+            self._loaded.wait()
+
+    # --- 永続化フック ------------------------------------------------------
+
+    def _on_put(self, todo: Todo) -> None:
+        self._store.append_put(todo)
+
+    def _on_delete(self, todo_id: str) -> None:
+        self._store.append_delete(todo_id)
+
+    def snapshot(self) -> int:
+        """現在の全件をスナップショットへ書き出す。書き出し件数を返す。
+
+        全シャードの構造ロック下で一覧取得と WAL 世代切り替えを同時に行うため、
+        以降の書き込みは必ず新世代の WAL に残る (旧世代と重複しても再生は冪等)。
+        """
+        self._wait()
+        with self._snapshot_lock:
+            with self._all_locked():
+                todos = [todo for shard in self._shards for todo in shard.items.values()]
+                gen = self._store.rotate()
+            return self._store.write_snapshot(todos, wal_gen=gen)
+
+    def close(self) -> None:
+        self._store.close()
+
+    # --- 読み書き (展開完了待ち) --------------------------------------------
+
+    def get(self, todo_id: str):
+        if not self._loaded.is_set():
+            with self._start_lock:
+                view, overlay = self._view, self._overlay
+            if todo_id in overlay:
+                return overlay[todo_id]
+            if view is not None and not self._loaded.is_set():
+                try:
+                    return view.get(todo_id)
+                except ValueError:  # 展開完了と同時に close された
+                    pass
+            self._wait()
+        return super().get(todo_id)
+
+    def get_many(self, ids: List[str]) -> Dict[str, Todo]:
+        if not self._loaded.is_set():  # 展開中はスナップショット参照の get() を利用
+            found = {todo_id: self.get(todo_id) for todo_id in ids}
+            return {k: v for k, v in found.items() if v is not None}
+        return super().get_many(ids)
+
+    def add(self, todo: Todo) -> Todo:
+        self._wait()
+        return super().add(todo)
+
+    def list(self) -> List[Todo]:
+        self._wait()
+        return super().list()
+
+    def list_due(
+        self,
+        before: Optional[datetime] = None,
+        after: Optional[datetime] = None,
+        completed: Optional[bool] = None,
+    ) -> List[Todo]:
+        self._wait()
+        return super().list_due(before=before, after=after, completed=completed)
+
+    def update(self, todo_id, change, on_commit=None):
+        self._wait()
+        return super().update(todo_id, change, on_commit)
+
+    def save(self, todo: Todo) -> Todo:
+        self._wait()
+        return super().save(todo)
+
+    def pop(self, todo_id: str):
+        self._wait()
+        return super().pop(todo_id)
+
+    def pop_if(self, todo_id: str, predicate):
+        self._wait()
+        return super().pop_if(todo_id, predicate)
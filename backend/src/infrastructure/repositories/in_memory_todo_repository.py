@@ -1,37 +1,228 @@
 from __future__ import annotations
-from typing import Dict, List
-from domain.models.todo import Todo
+import heapq
+import itertools
+import threading
+from bisect import bisect_left, insort
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from domain.models.todo import Todo, to_utc
 from domain.repositories.todo_repository import TodoRepository
+from domain.models.todo_sort import top_n
 
 class DuplicateTodoIdError(Exception):
     def __init__(self, todo_id: str):
         self.todo_id = todo_id
 
-class InMemoryTodoRepository(TodoRepository):
+class _Shard:
+    """ストライプ 1 本分のデータ: id ハッシュで振り分けた Todo の辞書と期限インデックス。
+
+    lock: 同一ストライプの read-modify-write を直列化 (コピー / 変更の間も保持)
+    struct: 辞書 / 期限インデックスの構造変更と読み取りスナップショット用の短いロック
+    """
+    __slots__ = ("lock", "struct", "items", "seqs", "due", "due_keys")
+
     def __init__(self):
-        """メモリ上にTodoを保持する簡易実装。テスト / ローカル用。"""
-        self._items: Dict[str, Todo] = {}
+        self.lock = threading.Lock()
+        self.struct = threading.Lock()
+        self.items: Dict[str, Todo] = {}
+        self.seqs: Dict[str, int] = {}  # id -> 追加順の通し番号 (list() をシャードをまたいで追加順に戻す)
+        # 期限インデックス: (dueDate UTC, id) のソート済み配列 + id -> 登録済みキー
+        self.due: List[Tuple[datetime, str]] = []
+        self.due_keys: Dict[str, Tuple[datetime, str]] = {}
+
+    def index_due(self, todo: Todo) -> None:
+        """期限インデックスを最新の dueDate に合わせる (変更が無ければ何もしない)。struct 保持前提。"""
+        old = self.due_keys.get(todo.id)
+        new = (to_utc(todo.dueDate), todo.id) if todo.dueDate is not None else None
+        if old == new:
+            return
+        if old is not None:
+            self.unindex_due(todo.id)
+        if new is not None:
+            insort(self.due, new)
+            self.due_keys[todo.id] = new
+
+    def unindex_due(self, todo_id: str) -> None:
+        key = self.due_keys.pop(todo_id, None)
+        if key is None:
+            return
+        pos = bisect_left(self.due, key)
+        if pos < len(self.due) and self.due[pos] == key:
+            del self.due[pos]
+
+
+class InMemoryTodoRepository(TodoRepository):
+    def __init__(self, stripes: int = 64):
+        """メモリ上にTodoを保持する簡易実装。テスト / ローカル用。
+
+        スレッドプール / free-threaded Python での並行アクセスに対応:
+          - Todo を id ハッシュで stripes 本のシャードへ分割し、辞書 / 期限インデックスもシャードごとに持つ
+            (異なるシャードへの書き込みは共有ロックを一切取らない)
+          - シャードのロックで同一 id の read-modify-write を直列化し、構造変更は同シャードの短い struct ロック内で行う
+          - 保存済み Todo は不変として扱い、更新はコピーに適用してから差し替える (copy-on-write)
+            → list() 等は各シャードの struct ロック下で取った参照をそのまま返せる
+        """
+        self._shards = [_Shard() for _ in range(max(1, stripes))]
+        self._seq = itertools.count()
+
+    def _shard(self, todo_id: str) -> _Shard:
+        return self._shards[hash(todo_id) % len(self._shards)]
+
+    @contextmanager
+    def _all_locked(self) -> Iterator[None]:
+        """全シャードの struct ロック (一定順で取得)。全件の一貫したスナップショット / 入れ替え用。"""
+        with ExitStack() as stack:
+            for shard in self._shards:
+                stack.enter_context(shard.struct)
+            yield
+
+    def _load(self, items: Dict[str, Todo]) -> None:
+        """全件を入れ替える (_all_locked 保持前提)。items の順序を追加順とする。"""
+        for shard in self._shards:
+            shard.items, shard.seqs, shard.due, shard.due_keys = {}, {}, [], {}
+        for todo in items.values():
+            shard = self._shard(todo.id)
+            shard.items[todo.id] = todo
+            shard.seqs[todo.id] = next(self._seq)
+            if todo.dueDate is not None:
+                key = (to_utc(todo.dueDate), todo.id)
+                shard.due.append(key)
+                shard.due_keys[todo.id] = key
+        for shard in self._shards:
+            shard.due.sort()
+
+    def _on_put(self, todo: Todo) -> None:
+        """追加 / 更新の確定後フック (同一 id のシャードロック保持中に呼ばれる)。永続化用サブクラスで利用。"""
+
+    def _on_delete(self, todo_id: str) -> None:
+        """削除の確定後フック (同一 id のシャードロック保持中に呼ばれる)。"""
+
+    def _publish(self, shard: _Shard, todo: Todo) -> None:
+        with shard.struct:
+            if todo.id not in shard.items:
+                shard.seqs[todo.id] = next(self._seq)
+            shard.items[todo.id] = todo
+            shard.index_due(todo)
+
+    def _remove(self, shard: _Shard, todo_id: str) -> Optional[Todo]:
+        with shard.struct:
+            shard.unindex_due(todo_id)
+            shard.seqs.pop(todo_id, None)
+            return shard.items.pop(todo_id, None)
 
     def add(self, todo: Todo) -> Todo:
         """新規追加。ID 重複時は DuplicateTodoIdError。シンプルな辞書登録。"""
-        if todo.id in self._items:
-            raise DuplicateTodoIdError(todo.id)
-        self._items[todo.id] = todo
+        shard = self._shard(todo.id)
+        with shard.lock:
+            if todo.id in shard.items:
+                raise DuplicateTodoIdError(todo.id)
+            self._publish(shard, todo)
+            self._on_put(todo)
         return todo
 
     def list(self) -> List[Todo]:
-        """全件取得。"""
-        return list(self._items.values())
+        """全件取得 (シャードごとのスナップショットを追加順にマージ)。"""
+        parts = []
+        for shard in self._shards:
+            with shard.struct:
+                seqs = shard.seqs
+                parts.append([(seqs[todo_id], todo) for todo_id, todo in shard.items.items()])
+        return [todo for _, todo in heapq.merge(*parts, key=lambda pair: pair[0])]
+
+    def list_sorted(self, order: List[tuple], limit: Optional[int] = None) -> List[Todo]:
+        """並び替え取得。limit 指定時はヒープで先頭 limit 件のみ選択。"""
+        return top_n(self.list(), order, limit)
+
+    def list_due(
+        self,
+        before: Optional[datetime] = None,
+        after: Optional[datetime] = None,
+        completed: Optional[bool] = None,
+    ) -> List[Todo]:
+        """期限範囲 (after <= dueDate < before) の Todo を期限昇順で取得。
+
+        ソート済み配列 (シャードごと) を bisect で範囲特定してマージするため O(stripes · log n + k log stripes)。
+        """
+        lo_key = (to_utc(after), "") if after is not None else None
+        hi_key = (to_utc(before), "") if before is not None else None
+        parts = []
+        for shard in self._shards:
+            with shard.struct:
+                due = shard.due
+                lo = bisect_left(due, lo_key) if lo_key is not None else 0
+                hi = bisect_left(due, hi_key) if hi_key is not None else len(due)
+                parts.append([(key, shard.items[key[1]]) for key in due[lo:hi]])
+        hits = [todo for _, todo in heapq.merge(*parts, key=lambda pair: pair[0])]
+        return [t for t in hits if completed is None or t.completed == completed]
 
     def get(self, todo_id: str):
-        """ID 取得。存在しなければ None。"""
-        return self._items.get(todo_id)
+        """ID 取得。存在しなければ None。返却値は共有インスタンスのため直接変更しないこと (update を利用)。"""
+        return self._shard(todo_id).items.get(todo_id)
+
+    def get_many(self, ids: List[str]) -> Dict[str, Todo]:
+        """複数 ID を辞書引きで取得。見つかったものだけ id -> Todo で返す。"""
+        found = {}
+        for todo_id in ids:
+            todo = self._shard(todo_id).items.get(todo_id)
+            if todo is not None:
+                found[todo_id] = todo
+        return found
+
+    def update(
+        self,
+        todo_id: str,
+        change: Callable[[Todo], bool],
+        on_commit: Callable[[Todo, Todo], None] | None = None,
+    ) -> Todo | None:
+        """アトミックな read-modify-write。
+
+        change(draft) がコピーを変更して True を返した場合のみ差し替える。
+        on_commit(before, after) は同一 id のシャードロック保持中に呼ばれる (集計の差分反映用)。
+        存在しなければ None、変更無しなら現行値を返す。
+        """
+        shard = self._shard(todo_id)
+        with shard.lock:
+            current = shard.items.get(todo_id)
+            if current is None:
+                return None
+            draft = current.model_copy(deep=True)
+            if not change(draft):
+                return current
+            self._publish(shard, draft)
+            self._on_put(draft)
+            if on_commit is not None:
+                on_commit(current, draft)
+            return draft
 
     def save(self, todo: Todo) -> Todo:
         """更新（存在しない場合も upsert 的に保持）。"""
-        self._items[todo.id] = todo
+        shard = self._shard(todo.id)
+        with shard.lock:
+            self._publish(shard, todo)
+            self._on_put(todo)
         return todo
 
+    def pop(self, todo_id: str) -> Todo | None:
+        """削除して削除前の値を返す (存在しなければ None)。"""
+        shard = self._shard(todo_id)
+        with shard.lock:
+            before = self._remove(shard, todo_id)
+            if before is not None:
+                self._on_delete(todo_id)
+            return before
+
+    def pop_if(self, todo_id: str, predicate: Callable[[Todo], bool]) -> Todo | None:
+        """判定と削除を同一 id のシャードロック下で行う (update との間で判定後の更新を消さない)。"""
+        shard = self._shard(todo_id)
+        with shard.lock:
+            current = shard.items.get(todo_id)
+            if current is None or not predicate(current):
+                return None
+            self._remove(shard, todo_id)
+            self._on_delete(todo_id)
+            return current
+
     def delete(self, todo_id: str) -> bool:
         """削除。存在した場合 True。"""
-        return self._items.pop(todo_id, None) is not None
+        return self.pop(todo_id) is not None
@@ -0,0 +1,83 @@
+"""既存コンテナ → 新しいパーティションキーのコンテナへのデータ移行と、既存ドキュメントの保存形式の書き直し。
+
+Cosmos DB はコンテナのパーティションキーを変更できないため、新コンテナを作成して全件をコピーする。
+upsert で書き込むため途中で中断しても再実行で続きから (冪等に) 移行できる。
+"""
+from __future__ import annotations
+import logging
+from typing import Any, Callable, Dict, List, Optional
+from domain.models.todo import Todo
+from .cosmos_todo_repository import _PARTITION_FIELDS, _to_doc
+
+logger = logging.getLogger("todo-api")
+
+# Cosmos が付与するシステムプロパティ (新コンテナへは持ち込まない)
+_SYSTEM_PROPS = ("_rid", "_self", "_etag", "_attachments", "_ts")
+
+
+def migrate_container(
+    source: Any,
+    target: Any,
+    partition_key_paths: List[str],
+    default_tenant: Optional[str] = None,
+    default_user: Optional[str] = None,
+    dry_run: bool = False,
+    progress: Optional[Callable[[Dict[str, int]], None]] = None,
+    progress_every: int = 1000,
+) -> Dict[str, int]:
+    """source の全ドキュメントを target へ upsert する。
+
+    tenantId / userId が無いドキュメントには default_tenant / default_user を補完する
+    (旧 models.Todo の userId はそのまま引き継ぐ)。補完後もキー値が欠けるドキュメントは移行せず skipped に数える。
+    戻り値: {"read": 読込件数, "written": 書込件数, "skipped": スキップ件数}
+    """
+    fields = [_PARTITION_FIELDS[p] for p in partition_key_paths]
+    stats = {"read": 0, "written": 0, "skipped": 0}
+    for doc in source.query_items("SELECT * FROM c", enable_cross_partition_query=True):
+        stats["read"] += 1
+        body = {k: v for k, v in doc.items() if k not in _SYSTEM_PROPS}
+        if body.get("tenantId") is None and default_tenant is not None:
+            body["tenantId"] = default_tenant
+        if body.get("userId") is None and default_user is not None:
+            body["userId"] = default_user
+        if any(body.get(f) is None for f in fields):
+            stats["skipped"] += 1
+            logger.warning("partition key value missing, skipped: id=%s", body.get("id"))
+        else:
+            if not dry_run:
+                target.upsert_item(body)
+            stats["written"] += 1
+        if progress is not None and stats["read"] % progress_every == 0:
+            progress(stats)
+    return stats
+
+
+def backfill_documents(
+    container: Any,
+    dry_run: bool = False,
+    progress: Optional[Callable[[Dict[str, int]], None]] = None,
+    progress_every: int = 1000,
+) -> Dict[str, int]:
+    """既存ドキュメントを現在の保存形式 (_to_doc) で書き直す。
+
+    日時の UTC 正規化 (範囲クエリ / ORDER BY の文字列比較用)・priorityRank の付与・タグの重複除去を行う。
+    形式が既に一致するドキュメントは書き込まない (再実行しても RU を消費しない)。Todo として読めないものは skipped。
+    戻り値: {"read": 読込件数, "written": 書込件数, "skipped": スキップ件数}
+    """
+    stats = {"read": 0, "written": 0, "skipped": 0}
+    for doc in container.query_items("SELECT * FROM c", enable_cross_partition_query=True):
+        stats["read"] += 1
+        body = {k: v for k, v in doc.items() if k not in _SYSTEM_PROPS}
+        try:
+            normalized = {**body, **_to_doc(Todo(**body))}
+        except ValueError:
+            stats["skipped"] += 1
+            logger.warning("invalid todo document, skipped: id=%s", body.get("id"))
+            continue
+        if normalized != body:
+            if not dry_run:
+                container.upsert_item(normalized)
+            stats["written"] += 1
+        if progress is not None and stats["read"] % progress_every == 0:
+            progress(stats)
+    return stats
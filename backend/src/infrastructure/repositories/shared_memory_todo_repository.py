@@ -0,0 +1,324 @@
+from __future__ import annotations
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+from domain.models.todo import Todo
+from domain.models.todo_sort import top_n
+from domain.repositories.todo_repository import TodoRepository
+from .in_memory_todo_repository import DuplicateTodoIdError
+from .todo_record import REC, STATE_OFF, LIVE, DEAD, encode, decode, record_id
+
+try:  # POSIX のみ (コンテナ実行前提)。Windows ローカルでは InMemory を利用
+    import fcntl  # type: ignore
+except Exception:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+_MAGIC = b"TODOSHM1"
+_VERSION = 1
+# magic, version, reserved, seq (seqlock), data_end, generation (compaction 回数), live_count
+_HEADER = struct.Struct("<8sIIQQQQ")
+_HEADER_SIZE = 64
+_SEQ_OFF = 16
+
+
+def _try_flock(fd: int) -> bool:
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+class RepositoryFullError(Exception):
+    """コンパクション後も共有領域に収まらない場合に送出。"""
+
+
+class SharedMemoryTodoRepository(TodoRepository):
+    """mmap ファイルを複数 uvicorn ワーカーで共有する Todo リポジトリ (ローカル / エッジ用)。
+
+    レイアウト: 64 byte ヘッダ + 追記型レコード列。更新は新レコード追記 + 旧レコードの state を DEAD に反転、
+    削除は state 反転のみ。領域不足時は LIVE レコードだけを詰め直す (generation を進め各プロセスが再走査)。
+
+    同期:
+      - 書き込み: プロセス内 Lock + fcntl.flock (プロセス間排他) の下で seq を奇数→偶数に進める (seqlock)
+      - 読み取り: ロック無し。seq が偶数かつ前後で不変なら採用、変化していれば再試行
+      - 固定長ヘッダ (completed / priority / 各日時) は struct.unpack_from で mmap から直接読む (コピー無し)
+    各プロセスは id -> offset の索引を持ち、data_end までの追記分だけをインクリメンタルに取り込む。
+    """
+
+    def __init__(self, path: str, capacity: int = 64 * 1024 * 1024):
+        if fcntl is None:
+            raise RuntimeError("SharedMemoryTodoRepository は POSIX (fcntl) 環境でのみ利用可能です。")
+        self._path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._lock = threading.RLock()
+        with self._flock():
+            size = os.fstat(self._fd).st_size
+            if size < capacity:
+                os.ftruncate(self._fd, capacity)
+            self._mm = mmap.mmap(self._fd, max(size, capacity))
+            magic = self._mm[:8]
+            if magic != _MAGIC:
+                self._mm[:_HEADER_SIZE] = b"\0" * _HEADER_SIZE
+                _HEADER.pack_into(self._mm, 0, _MAGIC, _VERSION, 0, 0, _HEADER_SIZE, 0, 0)
+        self._capacity = len(self._mm)
+        self._index: Dict[str, int] = {}
+        self._scanned = _HEADER_SIZE
+        self._generation = -1
+        # data_version 用: このハンドルが最後に確認した seq と、それ以降の他ハンドル (他プロセス) の書き込みの検知回数
+        self._seen_seq = self._seq() & ~1
+        self._foreign = 0
+
+    # --- ヘッダ / ロック -------------------------------------------------
+
+    def _header(self):
+        _, _, _, seq, data_end, generation, live = _HEADER.unpack_from(self._mm, 0)
+        return seq, data_end, generation, live
+
+    def _seq(self) -> int:
+        return struct.unpack_from("<Q", self._mm, _SEQ_OFF)[0]
+
+    @property
+    def data_version(self) -> int:
+        """他ハンドル (他プロセス) の書き込みを検知した回数。
+
+        自身の書き込みは呼び出し側 (タグカタログの差分反映) で追従済みのため数えない。
+        seq が自身の最後の書き込み / 確認時点から進んでいれば、その間に他の書き手がいたとみなす。
+        """
+        with self._lock:
+            self._observe((self._seq() + 1) & ~1)
+            return self._foreign
+
+    def _observe(self, seq: int) -> None:
+        if seq != self._seen_seq:
+            self._foreign += 1
+            self._seen_seq = seq
+
+    def _set_header(self, data_end: int, generation: int, live: int) -> None:
+        struct.pack_into("<QQQ", self._mm, _SEQ_OFF + 8, data_end, generation, live)
+
+    @contextmanager
+    def _flock(self) -> Iterator[None]:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _write(self) -> Iterator[None]:
+        """書き込み区間: プロセス内 + プロセス間排他、seq を奇数にして読み手へ変更中を通知。"""
+        with self._lock, self._flock():
+            seq = self._seq()
+            odd = seq if seq & 1 else seq + 1  # 既に奇数 = 前の書き手が異常終了。そのまま引き継ぐ
+            self._observe(seq)  # 前回以降の他の書き手を検知してから、この書き込みの分を自身のものとして進める
+            struct.pack_into("<Q", self._mm, _SEQ_OFF, odd)
+            try:
+                self._sync()
+                yield
+            finally:
+                struct.pack_into("<Q", self._mm, _SEQ_OFF, odd + 1)
+                self._seen_seq = odd + 1
+
+    def _read(self, fn: Callable[[], object]):
+        """seqlock 読み取り。書き込み中 / 読み取り中に更新があれば再試行。"""
+        odd_since = None
+        while True:
+            s1 = self._seq()
+            if s1 & 1:
+                now = time.monotonic()
+                odd_since = odd_since or now
+                if now - odd_since > 0.05:
+                    self._repair_seq()
+                    odd_since = None
+                time.sleep(0)
+                continue
+            with self._lock:
+                try:
+                    self._sync()
+                    result = fn()
+                except (struct.error, UnicodeDecodeError, ValueError, KeyError, IndexError):
+                    result = _RETRY
+                    self._generation = -1  # 途中でコンパクションされた可能性 → 次回は全走査
+                if result is not _RETRY and self._seq() == s1:
+                    return result
+                if self._header()[2] != self._generation:
+                    self._generation = -1
+
+    def _repair_seq(self) -> None:
+        """奇数のまま残った seq (書き手の異常終了) を、排他を取れた場合に偶数へ戻す。"""
+        with self._lock:
+            if not _try_flock(self._fd):
+                return  # 書き手が実際に処理中
+            try:
+                seq = self._seq()
+                if seq & 1:
+                    struct.pack_into("<Q", self._mm, _SEQ_OFF, seq + 1)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    # --- 索引 -------------------------------------------------------------
+
+    def _sync(self) -> None:
+        """他プロセスの追記分を索引へ取り込む。コンパクション検知時は全走査し直す。"""
+        _, data_end, generation, _ = self._header()
+        if generation != self._generation:
+            self._index = {}
+            self._scanned = _HEADER_SIZE
+            self._generation = generation
+        off = self._scanned
+        while off < data_end:
+            total, state = struct.unpack_from("<IB", self._mm, off)
+            if total < REC.size:
+                raise ValueError("torn record")
+            if state == LIVE:
+                self._index[record_id(self._mm, off)] = off
+            off += total
+        self._scanned = off
+
+    def _live_offset(self, todo_id: str) -> Optional[int]:
+        off = self._index.get(todo_id)
+        if off is None:
+            return None
+        if self._mm[off + STATE_OFF] != LIVE:  # 他プロセスで削除 / 更新済み
+            del self._index[todo_id]
+            return None
+        return off
+
+    def _decode(self, off: int) -> Todo:
+        return decode(self._mm, off)
+
+    # --- 書き込み補助 (書き込み区間内で呼ぶ) -------------------------------
+
+    def _append(self, todo: Todo) -> None:
+        rec = encode(todo)
+        _, data_end, generation, live = self._header()
+        if data_end + len(rec) > self._capacity:
+            self._compact()
+            _, data_end, generation, live = self._header()
+            if data_end + len(rec) > self._capacity:
+                raise RepositoryFullError(f"shared repository full ({self._capacity} bytes)")
+        self._mm[data_end:data_end + len(rec)] = rec
+        old = self._live_offset(todo.id)
+        # 新レコードを data_end で公開してから旧レコードを DEAD にする。
+        # 間で書き手が異常終了しても同じ id の LIVE が 2 件残るだけで、索引は後勝ち (新しい方) になり Todo は失われない
+        self._set_header(data_end + len(rec), generation, live if old is not None else live + 1)
+        if old is not None:
+            self._mm[old + STATE_OFF] = DEAD
+        self._index[todo.id] = data_end
+        self._scanned = data_end + len(rec)
+
+    def _kill(self, todo_id: str) -> Optional[Todo]:
+        off = self._live_offset(todo_id)
+        if off is None:
+            return None
+        before = self._decode(off)
+        self._mm[off + STATE_OFF] = DEAD
+        del self._index[todo_id]
+        _, data_end, generation, live = self._header()
+        self._set_header(data_end, generation, live - 1)
+        return before
+
+    def _compact(self) -> None:
+        """LIVE レコードのみを先頭から詰め直す。"""
+        live_recs = []
+        for off in sorted(self._index.values()):
+            if self._mm[off + STATE_OFF] == LIVE:
+                total = struct.unpack_from("<I", self._mm, off)[0]
+                live_recs.append(self._mm[off:off + total])
+        data = b"".join(live_recs)
+        self._mm[_HEADER_SIZE:_HEADER_SIZE + len(data)] = data
+        _, _, generation, _ = self._header()
+        self._set_header(_HEADER_SIZE + len(data), generation + 1, len(live_recs))
+        self._generation = -1
+        self._sync()
+
+    # --- TodoRepository ---------------------------------------------------
+
+    def add(self, todo: Todo) -> Todo:
+        """新規追加。ID 重複時は DuplicateTodoIdError。"""
+        with self._write():
+            if self._live_offset(todo.id) is not None:
+                raise DuplicateTodoIdError(todo.id)
+            self._append(todo)
+        return todo
+
+    def list(self) -> List[Todo]:
+        """全件取得 (seqlock によるスナップショット)。"""
+        return self._read(lambda: [self._decode(off) for off in list(self._index.values()) if self._mm[off + STATE_OFF] == LIVE])
+
+    def list_sorted(self, order: List[tuple], limit: Optional[int] = None) -> List[Todo]:
+        """並び替え取得。limit 指定時はヒープで先頭 limit 件のみ選択。"""
+        return top_n(self.list(), order, limit)
+
+    def get(self, todo_id: str) -> Optional[Todo]:
+        """ID 取得。存在しなければ None。"""
+        def read():
+            off = self._live_offset(todo_id)
+            return self._decode(off) if off is not None else None
+        return self._read(read)
+
+    def get_many(self, ids: List[str]) -> Dict[str, Todo]:
+        """複数 ID を 1 回の seqlock 読み取りで取得。見つかったものだけ id -> Todo で返す。"""
+        def read():
+            found = {}
+            for todo_id in ids:
+                off = self._live_offset(todo_id)
+                if off is not None:
+                    found[todo_id] = self._decode(off)
+            return found
+        return self._read(read)
+
+    def update(
+        self,
+        todo_id: str,
+        change: Callable[[Todo], bool],
+        on_commit: Callable[[Todo, Todo], None] | None = None,
+    ) -> Todo | None:
+        """プロセス間でアトミックな read-modify-write (InMemoryTodoRepository.update と同じ契約)。"""
+        with self._write():
+            off = self._live_offset(todo_id)
+            if off is None:
+                return None
+            current = self._decode(off)
+            draft = current.model_copy(deep=True)
+            if not change(draft):
+                return current
+            self._append(draft)
+            if on_commit is not None:
+                on_commit(current, draft)
+            return draft
+
+    def save(self, todo: Todo) -> Todo:
+        """更新 (存在しない場合も upsert)。"""
+        with self._write():
+            self._append(todo)
+        return todo
+
+    def pop(self, todo_id: str) -> Optional[Todo]:
+        """削除して削除前の値を返す (存在しなければ None)。"""
+        with self._write():
+            return self._kill(todo_id)
+
+    def pop_if(self, todo_id: str, predicate: Callable[[Todo], bool]) -> Optional[Todo]:
+        """判定と削除を同じ書き込み区間 (プロセス間排他) で行う。"""
+        with self._write():
+            off = self._live_offset(todo_id)
+            if off is None or not predicate(self._decode(off)):
+                return None
+            return self._kill(todo_id)
+
+    def delete(self, todo_id: str) -> bool:
+        """削除。存在した場合 True。"""
+        return self.pop(todo_id) is not None
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+
+_RETRY = object()
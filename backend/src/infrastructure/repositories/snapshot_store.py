@@ -0,0 +1,182 @@
+from __future__ import annotations
+import glob
+import mmap
+import os
+import re
+import struct
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from domain.models.todo import Todo
+from .todo_record import encode, decode, record_id, record_size
+
+# magic, version, wal_gen (このスナップショット以降の WAL 世代), count, index_off
+_SNAP_HEADER = struct.Struct("<8sIIQQ")
+_SNAP_MAGIC = b"TODOSNP1"
+_VERSION = 1
+_OFFSET = struct.Struct("<Q")
+# WAL エントリ: op (b"P" = put / b"D" = delete), payload_len
+_WAL_ENTRY = struct.Struct("<cI")
+_WAL_NAME = re.compile(r"wal\.(\d+)\.log$")
+
+
+class SnapshotView:
+    """mmap したスナップショットへの読み取り専用ビュー。
+
+    レコード列の後ろに id 昇順のオフセット表を持つため、全件デコード前でも get() は二分探索 (O(log n))。
+    """
+
+    def __init__(self, path: str):
+        self._f = open(path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.wal_gen, self.count, self._index_off = _SNAP_HEADER.unpack_from(self._mm, 0)
+        if magic != _SNAP_MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f"unsupported snapshot: {path}")
+
+    def _offset(self, i: int) -> int:
+        return _OFFSET.unpack_from(self._mm, self._index_off + i * _OFFSET.size)[0]
+
+    def get(self, todo_id: str) -> Optional[Todo]:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            off = self._offset(mid)
+            key = record_id(self._mm, off)
+            if key < todo_id:
+                lo = mid + 1
+            elif key > todo_id:
+                hi = mid
+            else:
+                return decode(self._mm, off)
+        return None
+
+    def __iter__(self) -> Iterator[Todo]:
+        off = _SNAP_HEADER.size
+        end = self._index_off
+        mm = self._mm
+        while off < end:
+            yield decode(mm, off)
+            off += record_size(mm, off)
+
+    def close(self) -> None:
+        self._mm.close()
+        self._f.close()
+
+
+class SnapshotStore:
+    """スナップショット (snapshot.bin) + 追記型ログ (wal.<世代>.log) のファイル管理。
+
+    - スナップショットは一時ファイルへ書いて fsync 後に rename (アトミック差し替え)
+    - WAL は世代ごとに分割。rotate() で新世代へ切り替え、スナップショット確定後に古い世代を削除
+    - 復元はスナップショット + wal_gen 以降の WAL を順に再生 (put / delete は冪等)
+    """
+
+    def __init__(self, directory: str, fsync: bool = False):
+        os.makedirs(directory, exist_ok=True)
+        self._dir = directory
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        gens = self._wal_generations()
+        self._gen = gens[-1] if gens else 0
+        self._fd = self._open_wal(self._gen)
+        self.wal_entries = 0
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self._dir, "snapshot.bin")
+
+    def _wal_path(self, gen: int) -> str:
+        return os.path.join(self._dir, f"wal.{gen}.log")
+
+    def _wal_generations(self) -> List[int]:
+        gens = []
+        for p in glob.glob(os.path.join(self._dir, "wal.*.log")):
+            m = _WAL_NAME.search(p)
+            if m:
+                gens.append(int(m.group(1)))
+        return sorted(gens)
+
+    def _open_wal(self, gen: int) -> int:
+        return os.open(self._wal_path(gen), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+
+    # --- WAL ---------------------------------------------------------------
+
+    def _append(self, op: bytes, payload: bytes) -> None:
+        entry = _WAL_ENTRY.pack(op, len(payload)) + payload
+        with self._lock:
+            os.write(self._fd, entry)  # 1 エントリ 1 write (O_APPEND)
+            if self._fsync:
+                os.fsync(self._fd)
+            self.wal_entries += 1
+
+    def append_put(self, todo: Todo) -> None:
+        self._append(b"P", encode(todo))
+
+    def append_delete(self, todo_id: str) -> None:
+        self._append(b"D", todo_id.encode())
+
+    def rotate(self) -> int:
+        """新しい WAL 世代へ切り替え、その世代番号を返す。"""
+        with self._lock:
+            os.close(self._fd)
+            self._gen += 1
+            self._fd = self._open_wal(self._gen)
+            self.wal_entries = 0
+            return self._gen
+
+    def replay(self, from_gen: int) -> Dict[str, Optional[Todo]]:
+        """from_gen 以降の WAL を再生し id -> Todo (削除は None) を返す。末尾の書きかけエントリは無視。"""
+        overlay: Dict[str, Optional[Todo]] = {}
+        for gen in self._wal_generations():
+            if gen < from_gen:
+                continue
+            with open(self._wal_path(gen), "rb") as f:
+                data = f.read()
+            off = 0
+            while off + _WAL_ENTRY.size <= len(data):
+                op, n = _WAL_ENTRY.unpack_from(data, off)
+                start = off + _WAL_ENTRY.size
+                if start + n > len(data):
+                    break
+                if op == b"P":
+                    todo = decode(data, start)
+                    overlay[todo.id] = todo
+                elif op == b"D":
+                    overlay[data[start:start + n].decode()] = None
+                off = start + n
+        return overlay
+
+    # --- スナップショット ---------------------------------------------------
+
+    def write_snapshot(self, todos: Iterable[Todo], wal_gen: int) -> int:
+        """スナップショットを書き出し、wal_gen より古い WAL を削除する。書き出し件数を返す。"""
+        tmp = self.snapshot_path + ".tmp"
+        entries: List[Tuple[str, int]] = []
+        with open(tmp, "wb") as f:
+            f.write(b"\0" * _SNAP_HEADER.size)
+            off = _SNAP_HEADER.size
+            for todo in todos:
+                rec = encode(todo)
+                f.write(rec)
+                entries.append((todo.id, off))
+                off += len(rec)
+            entries.sort()
+            f.write(b"".join(_OFFSET.pack(o) for _, o in entries))
+            f.seek(0)
+            f.write(_SNAP_HEADER.pack(_SNAP_MAGIC, _VERSION, wal_gen, len(entries), off))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        for gen in self._wal_generations():
+            if gen < wal_gen:
+                os.remove(self._wal_path(gen))
+        return len(entries)
+
+    def open_snapshot(self) -> Optional[SnapshotView]:
+        if not os.path.exists(self.snapshot_path):
+            return None
+        return SnapshotView(self.snapshot_path)
+
+    def close(self) -> None:
+        with self._lock:
+            os.close(self._fd)
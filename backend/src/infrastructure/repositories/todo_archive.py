@@ -0,0 +1,110 @@
+"""完了済み Todo のコールド層 (アーカイブ) 実装。
+
+- NdjsonTodoArchive: ローカルの gzip 圧縮 NDJSON (月別ファイル、追記ごとに gzip メンバーを連結)
+- CosmosTodoArchive: 別コンテナ (コールドコンテナ) への upsert
+どちらも put_many() は冪等 (同一 id の再投入は後勝ち) なので、移動処理はアーカイブ書き込み → ホット側削除の順で
+途中失敗しても再実行で整合する。
+"""
+from __future__ import annotations
+import glob
+import gzip
+import heapq
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Protocol
+from domain.models.todo import Todo, to_utc
+from domain.models.partition import PartitionScope
+from .cosmos_todo_repository import CosmosTodoRepository
+
+
+class TodoArchive(Protocol):
+    def put_many(self, todos: List[Todo]) -> None: ...
+    def list(self, scope: Optional[PartitionScope] = None, limit: Optional[int] = None) -> List[Todo]: ...
+
+
+def _newest_first(todos: List[Todo], limit: Optional[int]) -> List[Todo]:
+    """updatedAt 降順 (同時刻は id 昇順 = Cosmos の ORDER BY c.updatedAt DESC, c.id ASC と同順)。"""
+    todos.sort(key=lambda t: t.id)
+    todos.sort(key=lambda t: to_utc(t.updatedAt), reverse=True)
+    return todos[:limit] if limit is not None else todos
+
+
+def _month_end(path: str) -> Optional[datetime]:
+    """archive-YYYY-MM.ndjson.gz の翌月初 (UTC)。その月に書き込まれた Todo の updatedAt はこれより前。"""
+    m = re.match(r"archive-(\d{4})-(\d{2})\.ndjson\.gz$", os.path.basename(path))
+    if m is None:
+        return None
+    year, month = int(m.group(1)), int(m.group(2))
+    return datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+class NdjsonTodoArchive:
+    """gzip 圧縮 NDJSON のローカルアーカイブ (archive-YYYY-MM.ndjson.gz)。"""
+
+    def __init__(self, directory: str, compresslevel: int = 6):
+        os.makedirs(directory, exist_ok=True)
+        self._dir = directory
+        self._level = compresslevel
+        self._lock = threading.Lock()
+
+    def _path(self, now: datetime) -> str:
+        return os.path.join(self._dir, f"archive-{now:%Y-%m}.ndjson.gz")
+
+    def put_many(self, todos: List[Todo]) -> None:
+        if not todos:
+            return
+        data = b"".join(t.model_dump_json().encode() + b"\n" for t in todos)
+        with self._lock:
+            # "ab" は新しい gzip メンバーを追記する (gzip.open での読み込みは連結メンバーを透過的に扱う)
+            with gzip.open(self._path(datetime.now(timezone.utc)), "ab", compresslevel=self._level) as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileobj.fileno())  # type: ignore[union-attr]
+
+    def list(self, scope: Optional[PartitionScope] = None, limit: Optional[int] = None) -> List[Todo]:
+        """更新日時の新しい順に返す (同一 id は後から書かれたものを採用)。
+
+        月別ファイルを新しい月から読み、limit 件目の updatedAt が次に読むファイルの上限 (その月の翌月初。
+        アーカイブ時点で updatedAt は書き込み日時より前) 以上になった時点で、古い月のファイルを読まずに打ち切る。
+        """
+        if limit is not None and limit <= 0:
+            return []
+        latest: Dict[str, Todo] = {}
+        paths = sorted(glob.glob(os.path.join(self._dir, "archive-*.ndjson.gz")), reverse=True)
+        for i, path in enumerate(paths):
+            written: Dict[str, Todo] = {}  # ファイル内は後の行が新しい
+            with gzip.open(path, "rb") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    todo = Todo.model_validate_json(line)
+                    if scope is None or scope.matches(todo):
+                        written[todo.id] = todo
+            for todo_id, todo in written.items():
+                latest.setdefault(todo_id, todo)  # より新しい月のファイルに書かれたものを優先
+            if limit is None or len(latest) < limit or i + 1 == len(paths):
+                continue
+            bound = _month_end(paths[i + 1])
+            if bound is not None and heapq.nlargest(limit, (to_utc(t.updatedAt) for t in latest.values()))[-1] >= bound:
+                break
+        return _newest_first(list(latest.values()), limit)
+
+
+class CosmosTodoArchive:
+    """コールドコンテナ (例: TodosArchive) へのアーカイブ。
+
+    ホット側と同じパーティションキー構成を想定し、範囲指定時の一覧は単一パーティションクエリになる。
+    """
+
+    def __init__(self, container: Any, partition_key_paths: Optional[List[str]] = None):
+        self._repo = CosmosTodoRepository(container, partition_key_paths)
+
+    def put_many(self, todos: List[Todo]) -> None:
+        for todo in todos:
+            self._repo.save(todo)
+
+    def list(self, scope: Optional[PartitionScope] = None, limit: Optional[int] = None) -> List[Todo]:
+        repo = self._repo.scoped(scope) if scope is not None else self._repo
+        return repo.list_sorted([("updatedAt", True)], limit)
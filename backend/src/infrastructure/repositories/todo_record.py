@@ -0,0 +1,106 @@
+"""Todo のコンパクトなバイナリレコード表現 (共有メモリ / スナップショット / WAL 共通)。
+
+レイアウト (リトルエンディアン):
+    固定長ヘッダ REC: total_len u32, state u8, priority u8, completed u8, flags u8,
+                      createdAt i64, updatedAt i64, dueDate i64 (UTC µs), id_len u16, title_len u32, desc_len u32, tags_len u32
+    可変長部: id / title / description (utf-8) / tags (u16 長さ + utf-8 の繰り返し)
+              / [tenantId] / [userId] (flags で有無を示す u16 長さ + utf-8。旧レコードには無く total_len で読み飛ばせる)
+固定長部分は struct.unpack_from でバッファ (mmap 等) から直接読めるため、フィルタ判定にデコードは不要。
+"""
+from __future__ import annotations
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import List
+from domain.models.todo import Todo, PRIORITY_RANK, to_utc
+
+REC = struct.Struct("<IBBBBqqqHIII")
+STATE_OFF = 4
+ID_LEN_OFF = 32
+LIVE, DEAD = 1, 0
+
+_TAG_LEN = struct.Struct("<H")
+_ID_LEN = struct.Struct("<H")
+_HAS_DUE, _HAS_DESC, _HAS_TENANT, _HAS_USER = 0x1, 0x2, 0x4, 0x8
+_PRIORITIES = {v: k for k, v in PRIORITY_RANK.items()}
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+
+
+def _us(dt: datetime) -> int:
+    return (to_utc(dt) - _EPOCH) // _US
+
+
+def _dt(us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=us)
+
+
+def _str(value: str) -> bytes:
+    b = value.encode()
+    return _TAG_LEN.pack(len(b)) + b
+
+
+def _read_str(buf, p: int):
+    n = _TAG_LEN.unpack_from(buf, p)[0]
+    return str(buf[p + 2:p + 2 + n], "utf-8"), p + 2 + n
+
+
+def encode(todo: Todo) -> bytes:
+    """Todo → レコード bytes (state は LIVE)。"""
+    id_b = todo.id.encode()
+    title_b = todo.title.encode()
+    desc_b = todo.description.encode() if todo.description is not None else b""
+    tags_b = b"".join(_TAG_LEN.pack(len(t)) + t for t in (tag.encode() for tag in todo.tags))
+    flags = (_HAS_DUE if todo.dueDate is not None else 0) | (_HAS_DESC if todo.description is not None else 0)
+    keys_b = b""
+    if todo.tenantId is not None:
+        flags |= _HAS_TENANT
+        keys_b += _str(todo.tenantId)
+    if todo.userId is not None:
+        flags |= _HAS_USER
+        keys_b += _str(todo.userId)
+    total = REC.size + len(id_b) + len(title_b) + len(desc_b) + len(tags_b) + len(keys_b)
+    head = REC.pack(
+        total, LIVE, PRIORITY_RANK[todo.priority], int(todo.completed), flags,
+        _us(todo.createdAt), _us(todo.updatedAt), _us(todo.dueDate) if todo.dueDate is not None else 0,
+        len(id_b), len(title_b), len(desc_b), len(tags_b),
+    )
+    return head + id_b + title_b + desc_b + tags_b + keys_b
+
+
+def record_size(buf, off: int) -> int:
+    return struct.unpack_from("<I", buf, off)[0]
+
+
+def record_id(buf, off: int) -> str:
+    """レコードの id のみを取り出す (索引構築用)。"""
+    n = _ID_LEN.unpack_from(buf, off + ID_LEN_OFF)[0]
+    start = off + REC.size
+    return str(buf[start:start + n], "utf-8")
+
+
+def decode(buf, off: int) -> Todo:
+    """buf[off:] のレコード → Todo。
+
+    model_validate (pydantic-core) は Python 実装の model_construct より高速なため、検証付きで生成する。
+    """
+    (_, _, prio, completed, flags, created, updated, due,
+     id_len, title_len, desc_len, tags_len) = REC.unpack_from(buf, off)
+    p = off + REC.size
+    todo_id = str(buf[p:p + id_len], "utf-8"); p += id_len
+    title = str(buf[p:p + title_len], "utf-8"); p += title_len
+    desc = str(buf[p:p + desc_len], "utf-8") if flags & _HAS_DESC else None; p += desc_len
+    tags: List[str] = []
+    end = p + tags_len
+    while p < end:
+        tag, p = _read_str(buf, p)
+        tags.append(tag)
+    tenant = user = None
+    if flags & _HAS_TENANT:
+        tenant, p = _read_str(buf, p)
+    if flags & _HAS_USER:
+        user, p = _read_str(buf, p)
+    return Todo.model_validate({
+        "id": todo_id, "title": title, "description": desc, "priority": _PRIORITIES[prio],
+        "dueDate": _dt(due) if flags & _HAS_DUE else None, "tags": tags, "completed": bool(completed),
+        "createdAt": _dt(created), "updatedAt": _dt(updated), "tenantId": tenant, "userId": user,
+    })
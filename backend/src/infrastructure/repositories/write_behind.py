@@ -0,0 +1,423 @@
+"""更新の write-behind (同一 Todo への短時間の連続更新をメモリ上でまとめ、1 回の書き込みにする)。
+
+complete / reopen の連打やタイトル編集の連続 PATCH は、それぞれ get → upsert (Cosmos なら書き込み RU) になる。
+有効時は update() の結果を保留バッファに置いて即座に返し、以下のいずれかで保存 (repo.save) する:
+- window: 同じ Todo への最後の更新から window 秒、次の更新が無い
+- max_delay: 最初の未保存更新から max_delay 秒 (更新が続いても保存を先送りしすぎない)
+- max_items: 保留件数が上限を超えた (超えた分を呼び出し元スレッドで古い順に保存)
+- flush() / close(): テスト / リポジトリ差し替え / 停止時 (lifespan)
+読み取り (get / get_many / list / list_sorted) は保留中の状態を重ねて返す。期限 / 完了日時 / タグ集計の
+クエリは重ねられないため、実行前に保留分を保存する。追加 (add) / 削除は従来どおり即時書き込み。
+保留中の変更は他インスタンスからは見えない (最大 max_delay 遅れる) ため、既定では無効。
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from domain.models.todo import Todo
+from domain.models.partition import PartitionScope
+from domain.models.todo_sort import top_n
+from domain.repositories.todo_repository import TodoRepository
+
+logger = logging.getLogger("todo-api")
+
+
+class _Pending:
+    """未保存の 1 件: 最新状態と、保存に使うリポジトリ (範囲限定リポジトリなら範囲付きで保存する)。"""
+    __slots__ = ("todo", "repo", "since", "touched")
+
+    def __init__(self, todo: Todo, repo: Any, now: float):
+        self.todo = todo
+        self.repo = repo
+        self.since = now
+        self.touched = now
+
+
+class WriteBehindBuffer:
+    """保留中の更新 (id → 最新状態) と、期限の来たものを保存するバックグラウンドスレッド。
+
+    保存中 (in-flight) の id は次の保存を待たせ、同一 Todo の書き込み順序を保つ。
+    update() が基底から読んでいる間の削除は墓標 (tombstone) として記録し、読み取り後に保留して削除済みの Todo を
+    (後の保存の upsert で) 復活させないようにする。
+    保存失敗はログのみ行い、より新しい更新が無ければ保留に戻して次の期限で再試行する。
+    """
+
+    def __init__(self, window: float = 0.2, max_delay: float = 1.0, max_items: int = 1000):
+        self.window = window
+        self.max_delay = max(max_delay, window)
+        self.max_items = max_items
+        self.buffered = 0  # 保留バッファに置いた更新の数
+        self.flushed = 0  # 実際に保存した回数 (buffered - flushed がまとめて省いた書き込み)
+        self._pending: Dict[str, _Pending] = {}  # 挿入順 = 最初の未保存更新の古い順
+        self._inflight: Dict[str, Todo] = {}
+        self._reading: Dict[str, int] = {}  # id → 基底から読み取り中の update() の数
+        self._popping: Set[str] = set()  # 基底で削除中の id
+        self._tombstones: Set[str] = set()  # 読み取り中に削除された id (読み取りが全て終われば消す)
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> Optional[WriteBehindBuffer]:
+        """WRITE_BEHIND_WINDOW_MS が正の値なら有効 (未指定 / 0 なら None)。"""
+        window_ms = float(os.getenv("WRITE_BEHIND_WINDOW_MS", "0") or 0)
+        if window_ms <= 0:
+            return None
+        return cls(
+            window=window_ms / 1000.0,
+            max_delay=float(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", "1000")) / 1000.0,
+            max_items=int(os.getenv("WRITE_BEHIND_MAX_ITEMS", "1000")),
+        )
+
+    def wrap(self, repo: TodoRepository) -> WriteBehindTodoRepository:
+        return WriteBehindTodoRepository(repo, self)
+
+    @property
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    # --- 保留 / 参照 (呼び出し側で self._cond を保持) ----------------------------
+
+    def _latest(self, todo_id: str) -> Optional[Todo]:
+        entry = self._pending.get(todo_id)
+        if entry is not None:
+            return entry.todo
+        return self._inflight.get(todo_id)
+
+    def _put(self, todo: Todo, repo: Any) -> None:
+        now = time.monotonic()
+        entry = self._pending.get(todo.id)
+        if entry is None:
+            self._pending[todo.id] = _Pending(todo, repo, now)
+        else:
+            entry.todo, entry.repo, entry.touched = todo, repo, now
+        self.buffered += 1
+        if self._thread is None and not self._stopped:
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+        self._cond.notify_all()
+
+    def _discard(self, todo_id: str) -> Optional[Todo]:
+        """保留分を捨て、保存中ならその完了を待つ (直後の即時書き込みを追い越させない)。"""
+        entry = self._pending.pop(todo_id, None)
+        while todo_id in self._inflight:
+            self._cond.wait()
+        return entry.todo if entry is not None else None
+
+    def _begin_read(self, todo_id: str) -> None:
+        self._reading[todo_id] = self._reading.get(todo_id, 0) + 1
+
+    def _end_read(self, todo_id: str) -> bool:
+        """基底からの読み取りを終える。読み取り中に削除された (削除中なら完了を待つ) 場合 True。"""
+        while todo_id in self._popping:
+            self._cond.wait()
+        deleted = todo_id in self._tombstones
+        count = self._reading[todo_id] - 1
+        if count:
+            self._reading[todo_id] = count
+        else:
+            del self._reading[todo_id]
+            self._tombstones.discard(todo_id)
+        return deleted
+
+    def _begin_pop(self, todo_id: str) -> Optional[Todo]:
+        """基底での削除を始める (同一 id の削除は直列化)。保留分は破棄し、破棄した最新状態を返す。"""
+        while todo_id in self._popping:
+            self._cond.wait()
+        self._popping.add(todo_id)
+        return self._discard(todo_id)
+
+    def _end_pop(self, todo_id: str, deleted: bool) -> None:
+        self._popping.discard(todo_id)
+        if deleted and todo_id in self._reading:
+            self._tombstones.add(todo_id)
+        self._cond.notify_all()
+
+    def _due(self, entry: _Pending, now: float) -> float:
+        return min(entry.touched + self.window, entry.since + self.max_delay) - now
+
+    # --- 保存 ------------------------------------------------------------------
+
+    def _take(self, select: Callable[[_Pending], bool], limit: Optional[int] = None) -> List[tuple]:
+        """select に合う保留分を古い順に取り出し in-flight にする (保存中の id は除く)。"""
+        taken = []
+        for todo_id, entry in list(self._pending.items()):
+            if limit is not None and len(taken) >= limit:
+                break
+            if todo_id in self._inflight or not select(entry):
+                continue
+            del self._pending[todo_id]
+            self._inflight[todo_id] = entry.todo
+            taken.append((todo_id, entry))
+        return taken
+
+    def _write(self, taken: List[tuple]) -> None:
+        for todo_id, entry in taken:
+            try:
+                entry.repo.save(entry.todo)
+                ok = True
+            except Exception as e:  # noqa: BLE001
+                logger.warning("write-behind の保存に失敗 (id=%s): %s", todo_id, e)
+                ok = False
+            with self._cond:
+                del self._inflight[todo_id]
+                if ok:
+                    self.flushed += 1
+                elif todo_id not in self._pending:  # より新しい更新が無ければ次の期限で再試行
+                    entry.touched = time.monotonic()
+                    self._pending[todo_id] = entry
+                self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                taken = self._take(lambda entry: self._due(entry, now) <= 0)
+                if not taken:
+                    waits = [self._due(e, now) for i, e in self._pending.items() if i not in self._inflight]
+                    self._cond.wait(min(waits) if waits else None)
+                    continue
+            self._write(taken)
+
+    def _shed(self) -> None:
+        """max_items を超えた分を古い順に呼び出し元スレッドで保存する (メモリ上限 + 書き込み側への背圧)。
+
+        close() 後はバックグラウンドスレッドが無いため、保留分をすべて保存する (= 即時書き込み)。
+        """
+        with self._cond:
+            excess = len(self._pending) - (0 if self._stopped else self.max_items)
+            taken = self._take(lambda _: True, excess) if excess > 0 else []
+        self._write(taken)
+
+    def flush(self, scope: Optional[PartitionScope] = None) -> int:
+        """保留分 (scope 指定時はその範囲のみ) をすべて保存し、保存中のものの完了も待つ。保存した件数を返す。"""
+        matches = (lambda _: True) if scope is None else scope.matches
+        written = 0
+        while True:
+            with self._cond:
+                taken = self._take(lambda entry: matches(entry.todo))
+                if not taken:
+                    if not any(matches(t) for t in self._inflight.values()):
+                        return written
+                    self._cond.wait()
+                    continue
+            self._write(taken)
+            written += len(taken)
+
+    def close(self) -> None:
+        """バックグラウンドスレッドを止め、残りを保存する (lifespan 終了時)。"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=self.max_delay + 5.0)
+        self.flush()
+
+
+class WriteBehindTodoRepository(TodoRepository):
+    """リポジトリの update() を WriteBehindBuffer 経由にするラッパー。
+
+    scoped() は同じバッファを共有した範囲限定ラッパーを返す。
+    """
+
+    def __init__(self, base: TodoRepository, buffer: WriteBehindBuffer, scope: Optional[PartitionScope] = None):
+        self._base = base
+        self._buffer = buffer
+        self._scope = scope
+        self.reports_request_charge = base.reports_request_charge
+
+    def __getattr__(self, name: str) -> Any:
+        # consumed_request_charge / is_ready 等はそのまま基底に従う
+        return getattr(self._base, name)
+
+    @property
+    def last_request_charge(self) -> Optional[float]:
+        return self._base.last_request_charge
+
+    @property
+    def data_version(self) -> Optional[int]:
+        return self._base.data_version
+
+    def scoped(self, scope: PartitionScope) -> WriteBehindTodoRepository:
+        return WriteBehindTodoRepository(self._base.scoped(scope), self._buffer, scope)
+
+    def _visible(self, todo: Optional[Todo]) -> Optional[Todo]:
+        return todo if todo is not None and (self._scope is None or self._scope.matches(todo)) else None
+
+    def _overlay(self, todos: List[Todo]) -> List[Todo]:
+        buffer = self._buffer
+        with buffer._cond:
+            if not buffer._pending and not buffer._inflight:
+                return todos
+            return [buffer._latest(t.id) or t for t in todos]
+
+    # --- 読み取り (保留中の状態を重ねる) --------------------------------------
+
+    def get(self, todo_id: str) -> Optional[Todo]:
+        with self._buffer._cond:
+            latest = self._visible(self._buffer._latest(todo_id))
+        return latest if latest is not None else self._base.get(todo_id)
+
+    def get_many(self, ids: List[str]) -> Dict[str, Todo]:
+        found = self._base.get_many(ids)
+        with self._buffer._cond:
+            for todo_id in ids:
+                latest = self._visible(self._buffer._latest(todo_id))
+                if latest is not None:
+                    found[todo_id] = latest
+        return found
+
+    def list(self) -> List[Todo]:
+        return self._overlay(self._base.list())
+
+    def list_sorted(self, order: List[tuple], limit: Optional[int] = None) -> List[Todo]:
+        """保留件数 k だけ多く取得し、保留中の状態に差し替えて並べ直す。
+
+        保留中でない Todo の順位は、保留中の Todo (最大 k 件) の並び替え前の位置によってのみ下がるため、
+        先頭 limit + k 件と保留中の Todo を合わせれば、差し替え後の先頭 limit 件を必ず含む。
+        """
+        buffer = self._buffer
+        with buffer._cond:
+            pending = [t for t in (self._visible(buffer._latest(i)) for i in [*buffer._pending, *buffer._inflight]) if t]
+        if not pending:
+            return self._base.list_sorted(order, limit)
+        fetched = self._base.list_sorted(order, None if limit is None else limit + len(pending))
+        merged = {t.id: t for t in self._overlay(fetched)}
+        stored = {t.id for t in fetched}
+        for todo in pending:  # 取得範囲外から順位が上がった Todo (削除済みのものは get_many / get で確認)
+            if todo.id not in stored:
+                merged.setdefault(todo.id, todo)
+        missing = [i for i in merged if i not in stored]
+        if missing:
+            present = self._base.get_many(missing)
+            for todo_id in missing:
+                if todo_id not in present:
+                    del merged[todo_id]
+        return top_n(merged.values(), order, limit)
+
+    # 以下のクエリ結果には保留中の状態を重ねられないため、範囲内の保留分を保存してから実行する
+
+    def list_due(
+        self,
+        before: Optional[datetime] = None,
+        after: Optional[datetime] = None,
+        completed: Optional[bool] = None,
+    ) -> List[Todo]:
+        self._buffer.flush(self._scope)
+        return self._base.list_due(before=before, after=after, completed=completed)
+
+    def list_completed_before(self, cutoff: datetime, limit: Optional[int] = None) -> List[Todo]:
+        self._buffer.flush(self._scope)
+        return self._base.list_completed_before(cutoff, limit)
+
+    def tag_counts(self) -> List[tuple]:
+        self._buffer.flush(self._scope)
+        return self._base.tag_counts()
+
+    # --- 書き込み ---------------------------------------------------------------
+
+    def update(
+        self,
+        todo_id: str,
+        change: Callable[[Todo], bool],
+        on_commit: Callable[[Todo, Todo], None] | None = None,
+    ) -> Todo | None:
+        """read-modify-write を保留バッファ上で行う (未保留なら基底から 1 回読む)。保存は後で 1 回にまとめる。
+
+        基底からの読み取り中に削除された場合は存在しないものとして None を返す (保留すると後の保存で復活するため)。
+        """
+        buffer = self._buffer
+        with buffer._cond:
+            current = self._visible(buffer._latest(todo_id))
+            if current is None:
+                buffer._begin_read(todo_id)
+            else:
+                result, over = self._apply(current, change, on_commit)
+        if current is None:
+            try:
+                stored = self._base.get(todo_id)
+            except BaseException:
+                with buffer._cond:
+                    buffer._end_read(todo_id)
+                raise
+            with buffer._cond:
+                # 読み取り終了と保留を同じ区間で行う (間に削除が完了すると墓標が残らない)
+                if buffer._end_read(todo_id) or stored is None:
+                    return None
+                latest = self._visible(buffer._latest(todo_id))  # 読み取り中に別リクエストが保留した場合はそちらを基にする
+                result, over = self._apply(latest if latest is not None else stored, change, on_commit)
+        if over:
+            buffer._shed()
+        return result
+
+    def _apply(
+        self,
+        current: Todo,
+        change: Callable[[Todo], bool],
+        on_commit: Callable[[Todo, Todo], None] | None,
+    ) -> Tuple[Todo, bool]:
+        """current のコピーに change を適用して保留する (self._buffer._cond を保持して呼ぶ)。
+
+        戻り値: (結果, 保留件数が上限を超えたか = 呼び出し元がロック外で _shed() する)。
+        """
+        buffer = self._buffer
+        draft = current.model_copy(deep=True)
+        if not change(draft):
+            return current, False
+        buffer._put(draft, self._base)
+        if on_commit is not None:
+            on_commit(current, draft)
+        return draft, buffer._stopped or len(buffer._pending) > buffer.max_items
+
+    def add(self, todo: Todo) -> Todo:
+        return self._base.add(todo)
+
+    def save(self, todo: Todo) -> Todo:
+        """即時保存。同じ id の保留分はこの値で置き換わるため破棄する。"""
+        with self._buffer._cond:
+            self._buffer._discard(todo.id)
+        return self._base.save(todo)
+
+    def pop(self, todo_id: str) -> Optional[Todo]:
+        """保留分を破棄して即時削除。戻り値は削除前の (保留中を含む) 最新状態。"""
+        buffer = self._buffer
+        with buffer._cond:
+            pending = self._visible(buffer._latest(todo_id))
+            if pending is None and self._scope is not None and buffer._latest(todo_id) is not None:
+                return None  # 範囲外の Todo の保留分は破棄しない
+            buffer._begin_pop(todo_id)
+        stored = None
+        try:
+            stored = self._base.pop(todo_id)
+        finally:
+            with buffer._cond:
+                buffer._end_pop(todo_id, stored is not None)
+        return pending if stored is not None and pending is not None else stored
+
+    def pop_if(self, todo_id: str, predicate: Callable[[Todo], bool]) -> Optional[Todo]:
+        """保留中の状態があればそれで判定し、満たせば保留分を破棄して削除。無ければ基底の pop_if。"""
+        buffer = self._buffer
+        with buffer._cond:
+            pending = self._visible(buffer._latest(todo_id))
+            if pending is not None and not predicate(pending):
+                return None
+            if pending is None and buffer._latest(todo_id) is not None:
+                return None  # 範囲外の Todo の保留分は破棄しない
+            buffer._begin_pop(todo_id)
+        stored = None
+        try:
+            stored = self._base.pop(todo_id) if pending is not None else self._base.pop_if(todo_id, predicate)
+        finally:
+            with buffer._cond:
+                buffer._end_pop(todo_id, stored is not None)
+        return pending if stored is not None and pending is not None else stored
+
+    def delete(self, todo_id: str) -> bool:
+        return self.pop(todo_id) is not None
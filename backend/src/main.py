@@ -1,12 +1,28 @@
-from fastapi import FastAPI, HTTPException, status, Path, Request
+from fastapi import FastAPI, HTTPException, status, Path, Query, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from fastapi.encoders import jsonable_encoder
+import asyncio
+import json
 import logging
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from datetime import datetime
-from domain.models.todo import Todo, PRIORITY_PATTERN
+from domain.models.todo import Todo, PRIORITY_PATTERN, new_todo_id, utc_now
 from infrastructure.repositories.in_memory_todo_repository import InMemoryTodoRepository, DuplicateTodoIdError
 from application.services.todo_service import TodoService
+from application.services.todo_archiver import TodoArchiver
+from infrastructure.http.single_flight import SingleFlight
+from infrastructure.http.admission import BoundedExecutor, OverloadedError
+from infrastructure.http.idempotency import IdempotencyMiddleware, InMemoryIdempotencyStore
+from infrastructure.http.compression import CompressionMiddleware
+from infrastructure.http.session_token import SessionTokenMiddleware
+from infrastructure.http.bulk_import import BulkImporter, DuplexStreamingResponse, RuThrottle
+from infrastructure.http.profiling import Profiler, ProfilingMiddleware
+from infrastructure.http.tracing import KIND_CLIENT, Tracer, TracingMiddleware, child_span
+from infrastructure.repositories.write_behind import WriteBehindBuffer
+from domain.models.todo_sort import parse_sort, InvalidSortError
+from domain.models.partition import PartitionScope
+from domain.repositories.todo_repository import as_repository
 import os
 from dotenv import load_dotenv
 
@@ -25,14 +41,133 @@ from contextlib import asynccontextmanager
 async def lifespan(app):
     # アプリ起動時に Cosmos 初期化を試行 (条件を満たす場合のみ)
     try_init_cosmos_repository()
+    # スナップショット対応リポジトリは遅延ロード開始のみ行い即座に起動を完了する
+    warm_start = getattr(repo, "warm_start", None)
+    if warm_start:
+        warm_start()
+    if getattr(repo, "is_loaded", True):  # 展開中は初回 /api/tags で遅延構築
+        try:
+            service.rebuild_tag_catalog()
+        except Exception as e:  # noqa: BLE001  失敗時は初回 /api/tags で遅延構築
+            logger.warning("タグカタログの初期構築に失敗: %s", e)
+    snapshot_task = asyncio.create_task(_periodic_snapshot()) if hasattr(repo, "snapshot") else None
+    archive_task = asyncio.create_task(_periodic_archive()) if archive is not None and os.getenv("ARCHIVE_AFTER_DAYS") else None
     yield
+    if archive_task:
+        archive_task.cancel()
+    if write_behind is not None:
+        await asyncio.to_thread(write_behind.close)  # 保留中の更新を書き出してから停止 (スナップショット / スパン送信より前)
+    if tracer is not None:
+        await asyncio.to_thread(tracer.shutdown)  # 未送信スパンを送ってから停止
+    if snapshot_task:
+        snapshot_task.cancel()
+        await asyncio.to_thread(repo.snapshot)  # 停止前に最終スナップショット
+    repo_io.shutdown()
+
+
+async def _periodic_snapshot():
+    """SNAPSHOT_INTERVAL_SEC ごとに、WAL に差分がある場合のみスナップショットを取得。"""
+    interval = float(os.getenv("SNAPSHOT_INTERVAL_SEC", "300"))
+    while True:
+        await asyncio.sleep(interval)
+        if getattr(repo, "pending_log_entries", 0) == 0:
+            continue
+        try:
+            n = await asyncio.to_thread(repo.snapshot)
+            logger.info("snapshot written: %d items", n)
+        except Exception as e:  # noqa: BLE001
+            logger.exception("スナップショット取得に失敗: %s", e)
+
+async def _periodic_archive():
+    """ARCHIVE_INTERVAL_SEC ごとに、完了から ARCHIVE_AFTER_DAYS 日以上経った Todo をアーカイブへ移動。"""
+    interval = float(os.getenv("ARCHIVE_INTERVAL_SEC", "3600"))
+    days = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+    batch = int(os.getenv("ARCHIVE_BATCH", "500"))
+    while True:
+        try:
+            archiver = TodoArchiver(service, archive, retention_days=days, batch_size=batch)
+            moved = await asyncio.to_thread(archiver.run)
+            if moved:
+                coalescer.invalidate()
+                logger.info("archived %d completed todos", moved)
+        except Exception as e:  # noqa: BLE001
+            logger.exception("アーカイブ移動に失敗: %s", e)
+        await asyncio.sleep(interval)
 
 app = FastAPI(title="Todo API", lifespan=lifespan)
+# X-Session-Token: 書き込みで得た Cosmos セッショントークンを返し、読み取りで受け付ける (Idempotency の再送応答にも含める)
+app.add_middleware(SessionTokenMiddleware)
+# POST / PATCH の Idempotency-Key: 初回レスポンスを保存し再送時はそのまま返す
+idempotency_store = InMemoryIdempotencyStore(
+    max_entries=int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000")),
+    ttl_sec=float(os.getenv("IDEMPOTENCY_TTL_SEC", "86400")),
+)
+app.add_middleware(IdempotencyMiddleware, store=idempotency_store, exclude_paths=("/api/todos/import",))
+# レスポンス圧縮 (Accept-Encoding: zstd / br / gzip)。Idempotency の外側なので再送時も保存済みの無圧縮レスポンスをその場で圧縮する
+if os.getenv("COMPRESSION_DISABLE") != "1":
+    app.add_middleware(CompressionMiddleware, **CompressionMiddleware.options_from_env())
+# オンデマンドプロファイリング: PROFILE_ADMIN_TOKEN / PROFILE_SAMPLE_RATE 未設定時はミドルウェア自体を登録しない
+profiler = Profiler.from_env()
+if profiler is not None:
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+# 分散トレーシング: OTEL_EXPORTER_OTLP_ENDPOINT / TRACE_FILE 未設定時は無効 (ミドルウェア / プロキシとも使わない)
+tracer = Tracer.from_env()
+if tracer is not None:
+    app.add_middleware(TracingMiddleware, tracer=tracer)
 
 _readiness = {"ready": False}
 
-repo = InMemoryTodoRepository()
-service = TodoService(repo)
+def _default_repository():
+    """起動時の既定リポジトリ。
+
+    SHM_REPO_PATH 指定時は複数ワーカー共有の mmap リポジトリ、
+    SNAPSHOT_DIR 指定時はスナップショット + WAL で再起動をまたぐ InMemory リポジトリを利用。
+    """
+    path = os.getenv("SHM_REPO_PATH")
+    if path and "PYTEST_CURRENT_TEST" not in os.environ:
+        from infrastructure.repositories.shared_memory_todo_repository import SharedMemoryTodoRepository  # 遅延 import
+        capacity = int(os.getenv("SHM_REPO_BYTES", str(64 * 1024 * 1024)))
+        return SharedMemoryTodoRepository(path, capacity=capacity)
+    snapshot_dir = os.getenv("SNAPSHOT_DIR")
+    if snapshot_dir and "PYTEST_CURRENT_TEST" not in os.environ:
+        from infrastructure.repositories.durable_in_memory_todo_repository import DurableInMemoryTodoRepository  # 遅延 import
+        return DurableInMemoryTodoRepository(snapshot_dir, fsync=os.getenv("SNAPSHOT_FSYNC") == "1")
+    return InMemoryTodoRepository()
+
+
+def _default_archive():
+    """ARCHIVE_DIR 指定時は gzip NDJSON のローカルアーカイブ (Cosmos 利用時は ARCHIVE_COSMOS_CONTAINER が優先)。"""
+    archive_dir = os.getenv("ARCHIVE_DIR")
+    if archive_dir and "PYTEST_CURRENT_TEST" not in os.environ:
+        from infrastructure.repositories.todo_archive import NdjsonTodoArchive  # 遅延 import
+        return NdjsonTodoArchive(archive_dir)
+    return None
+
+
+def _new_service(repo) -> TodoService:
+    """トレーシング有効時はリポジトリ呼び出しを子スパン (消費 RU / 件数付き) にする。
+
+    write-behind 有効時は更新をバッファ経由にする (バックグラウンドでまとめて保存する書き込みは子スパンにならない)。
+    """
+    repo = as_repository(repo)  # 任意機能の既定実装をトレース対象より内側で補う
+    if tracer is not None:
+        repo = tracer.wrap(repo, kind=KIND_CLIENT)
+    if write_behind is not None:
+        repo = write_behind.wrap(repo)
+    return TodoService(repo)
+
+
+# 同一 Todo への連続更新 (complete / reopen の連打、タイトル編集) をまとめて 1 回の書き込みにする
+# (WRITE_BEHIND_WINDOW_MS 未設定時は無効)
+write_behind = WriteBehindBuffer.from_env()
+repo = _default_repository()
+# 完了済み Todo のコールド層 (未設定なら None: アーカイブ移動 / GET /api/todos/archive 無効)
+archive = _default_archive()
+service = _new_service(repo)
+# 同一 GET (パス + クエリ) の同時実行を 1 回のバックエンド呼び出しに集約
+coalescer = SingleFlight()
+# ブロッキングなリポジトリ呼び出し専用の有界プール (超過時は 503 で即時拒否)
+repo_io = BoundedExecutor.from_env()
 
 logger = logging.getLogger("todo-api")
 if not logger.handlers:
@@ -49,7 +184,9 @@ def try_init_cosmos_repository():
       - azure-cosmos 未インストール
     成功時: CosmosTodoRepository を set_repo し readiness を ready に。
     失敗時: ログ出力のみ / readiness は変更しない。
+    ARCHIVE_COSMOS_CONTAINER 指定時はコールドコンテナを作成しアーカイブとして利用。
     """
+    global archive
     if os.getenv("COSMOS_DISABLE") == "1" or "PYTEST_CURRENT_TEST" in os.environ:
         logger.info("Cosmos initialization skipped (test or disabled).")
         return
@@ -64,27 +201,42 @@ def try_init_cosmos_repository():
     key = os.getenv("COSMOS_KEY")
     database_name = os.getenv("COSMOS_DATABASE", "TodoApp")
     container_name = os.getenv("COSMOS_CONTAINER", "Todos")
-    partition_key_path = os.getenv("COSMOS_PARTITION_KEY", "/id")
+    # "/tenantId" 等の単一キー、または "/tenantId,/userId" の階層パーティションキー
+    partition_key_spec = os.getenv("COSMOS_PARTITION_KEY", "/id")
 
     if not (conn_str or (endpoint and key)):
         logger.info("Cosmos 環境変数が未設定のため初期化をスキップします。")
         return
 
     try:
+        from infrastructure.repositories.cosmos_todo_repository import (  # 遅延 import
+            CosmosTodoRepository, archive_indexing_policy, indexing_policy, parse_partition_key_paths, request_charge_hook,
+        )
+        # 応答ごとの RU を積算 (トレースのリポジトリスパンに消費 RU を付与)
         if conn_str:
-            client = CosmosClient.from_connection_string(conn_str)
+            client = CosmosClient.from_connection_string(conn_str, raw_response_hook=request_charge_hook)
         else:
-            client = CosmosClient(endpoint, credential=key)
+            client = CosmosClient(endpoint, credential=key, raw_response_hook=request_charge_hook)
 
+        paths = parse_partition_key_paths(partition_key_spec)
         # DB / Container を存在しなければ作成 (学習/開発用途)。本番は存在前提・RBAC利用推奨。
         db = client.create_database_if_not_exists(id=database_name)
         container = db.create_container_if_not_exists(
             id=container_name,
-            partition_key=PartitionKey(path=partition_key_path),
+            partition_key=PartitionKey(path=paths[0]) if len(paths) == 1 else PartitionKey(path=paths, kind="MultiHash"),
+            indexing_policy=indexing_policy(),  # 並び替え / 期限クエリの複合インデックス (既存コンテナには適用されない)
             offer_throughput=400,
         )
-        from infrastructure.repositories.cosmos_todo_repository import CosmosTodoRepository  # 遅延 import
-        cosmos_repo = CosmosTodoRepository(container=container)
+        cosmos_repo = CosmosTodoRepository(container=container, partition_key_paths=paths)
+        archive_container = os.getenv("ARCHIVE_COSMOS_CONTAINER")
+        if archive_container:
+            from infrastructure.repositories.todo_archive import CosmosTodoArchive  # 遅延 import
+            cold = db.create_container_if_not_exists(
+                id=archive_container,
+                partition_key=PartitionKey(path=paths[0]) if len(paths) == 1 else PartitionKey(path=paths, kind="MultiHash"),
+                indexing_policy=archive_indexing_policy(),
+            )
+            archive = CosmosTodoArchive(cold, partition_key_paths=paths)
         set_repo(cosmos_repo)
         logger.info("Cosmos repository initialized (db=%s container=%s)", database_name, container_name)
     except Exception as e:  # noqa: BLE001
@@ -133,6 +285,16 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(status_code=exc.status_code, content={"detail": detail})
 
 
+@app.exception_handler(OverloadedError)
+async def overloaded_exception_handler(request: Request, exc: OverloadedError):
+    """受付上限超過時は待たせず 503 + Retry-After を返す (p99 悪化 / プローブ失敗を防ぐ)。"""
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+        content={"detail": {"type": "overloaded", "reason": exc.reason, "route": exc.route, "status": 503}},
+    )
+
+
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception):
     """想定外例外の捕捉。スタックはログのみ・レスポンスは汎用 500。"""
@@ -145,8 +307,11 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
 def set_repo(new_repo):  # type: ignore
     """テスト用にリポジトリ実装を差し替えるヘルパー。Cosmosスタブ注入などで使用。"""
     global repo, service
+    if write_behind is not None:
+        write_behind.flush()  # 保留分は差し替え前のリポジトリへ書き出す
     repo = new_repo
-    service = TodoService(repo)
+    service = _new_service(repo)
+    coalescer.invalidate()
     if getattr(repo, "is_ready", False):  # readiness フラグ伝播
         _readiness["ready"] = True
 
@@ -156,8 +321,45 @@ def reset_readiness():
     _readiness["ready"] = False
     # repo も初期化 (テスト用)
     global repo, service
+    if write_behind is not None:
+        write_behind.flush()
     repo = InMemoryTodoRepository()
-    service = TodoService(repo)
+    service = _new_service(repo)
+    coalescer.invalidate()
+    idempotency_store.clear()
+
+
+def _scope(request: Request) -> PartitionScope | None:
+    """X-Tenant-Id / X-User-Id ヘッダ → パーティション範囲 (どちらも無ければ範囲指定なし)。"""
+    tenant_id = request.headers.get("x-tenant-id") or None
+    user_id = request.headers.get("x-user-id") or None
+    if tenant_id is None and user_id is None:
+        return None
+    return PartitionScope(tenant_id=tenant_id, user_id=user_id)
+
+
+def _service(request: Request) -> TodoService:
+    svc = service.for_scope(_scope(request))
+    return svc if tracer is None else tracer.wrap(svc, "TodoService")
+
+
+def _read_key(request: Request) -> str:
+    """coalescing キー: セッショントークン + 範囲 + パス + ソート済みクエリ (パラメータ順序の違いを同一視)。"""
+    scope = _scope(request)
+    prefix = f"{scope.tenant_id or ''}/{scope.user_id or ''}|" if scope else ""
+    session = request.headers.get("x-session-token")
+    if session:  # トークン付きの読み取りはそのトークン以上の状態を返す必要があるため別キー
+        prefix = session + "|" + prefix
+    return prefix + request.url.path + "?" + "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+
+
+async def _coalesced_json(request: Request, route: str, load) -> Response:
+    """load() (ブロッキングなサービス呼び出し) を同一キーで共有し、シリアライズ済み JSON bytes を返す。"""
+    def run() -> bytes:
+        return JSONResponse(content=jsonable_encoder(load())).body
+
+    body = await coalescer.do(_read_key(request), lambda: repo_io.run(route, run))
+    return Response(content=body, media_type="application/json")
 
 @app.get("/health")
 async def health():
@@ -169,6 +371,33 @@ async def readiness():
     """Readiness チェック用エンドポイント。依存リソース準備状況を返す。"""
     return {"status": "ready" if _readiness["ready"] else "not-ready"}
 
+@app.get("/metrics/executor")
+async def executor_metrics():
+    """リポジトリ I/O プールのキュー深さ / 待ち時間 / 拒否数。"""
+    return repo_io.stats()
+
+def _require_profiler(request: Request) -> Profiler:
+    # 管理トークン未設定 (サンプリングのみ) では閲覧手段を公開しない
+    if profiler is None or profiler.admin_token is None:
+        raise HTTPException(status_code=404, detail={"type": "profiling_disabled"})
+    token = request.headers.get("x-profile-token")
+    if not profiler.authorized(token.encode() if token is not None else None):
+        raise HTTPException(status_code=403, detail={"type": "forbidden"})
+    return profiler
+
+@app.get("/debug/profiles")
+async def list_profiles(request: Request):
+    """計測済みリクエストの一覧 (新しい順)。区間別 (validation / service / repository ...) の内訳付き。"""
+    return _require_profiler(request).list()
+
+@app.get("/debug/profiles/{profile_id}")
+async def get_profile(request: Request, profile_id: str):
+    """collapsed stack 形式のフレームグラフ入力 (flamegraph.pl / speedscope でそのまま読める)。"""
+    profile = _require_profiler(request).get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail={"type": "profile_not_found", "id": profile_id})
+    return Response(content=profile.collapsed(), media_type="text/plain")
+
 # NOTE: 後で Cosmos 接続成功時に _readiness["ready"] = True を設定するフックを追加予定
 
 class CreateTodoModel(BaseModel):
@@ -181,54 +410,208 @@ class CreateTodoModel(BaseModel):
     tags: list[str] = []
 
 
-@app.post("/api/todos", status_code=status.HTTP_201_CREATED)
-async def create_todo(body: CreateTodoModel):
-    """Todo作成。ID重複時は 409 を返す。タイムスタンプと未指定IDはサーバ生成。"""
-    from datetime import datetime, timezone
-    now = datetime.now(timezone.utc)
-    import uuid
-    todo = Todo(
-        id=body.id or str(uuid.uuid4()),
-        title=body.title,
-        description=body.description,
-        priority=body.priority,
-        dueDate=body.dueDate,
-        tags=body.tags,
-        completed=False,
-        createdAt=now,
-        updatedAt=now,
-    )
+_CREATE_FIELDS = frozenset(CreateTodoModel.model_fields)
+_CREATE_BODY_SCHEMA = {
+    "requestBody": {"required": True, "content": {"application/json": {"schema": CreateTodoModel.model_json_schema()}}},
+}
+
+
+def _new_todo(payload) -> Todo:
+    """作成ペイロード (JSON を読み込んだ dict) → Todo。
+
+    CreateTodoModel で検証してから Todo を組み立てると同じ値を 2 回検証するため、
+    受け付けるフィールドだけを取り出してサーバ生成値 (id / completed / タイムスタンプ) を加え、Todo の検証 1 回で済ませる。
+    不正な値は pydantic.ValidationError (Todo のフィールド名で報告)。
+    """
+    if not isinstance(payload, dict):
+        return Todo.model_validate(payload)  # model_type エラーを送出
+    data = {k: v for k, v in payload.items() if k in _CREATE_FIELDS}
+    if not data.get("id"):
+        data["id"] = new_todo_id()
+    now = utc_now()
+    data["completed"] = False
+    data["createdAt"] = now
+    data["updatedAt"] = now
+    return Todo.model_validate(data)
+
+
+def _parse_new_todo(raw: bytes) -> Todo:
+    """リクエストボディ bytes → Todo。JSON として不正な場合も ValidationError と同じ 422 形式にするため RequestValidationError。"""
     try:
-        return service.create(todo)
+        payload = json.loads(raw)
+    except ValueError:
+        raise RequestValidationError([{"type": "json_invalid", "loc": ("body",), "msg": "JSON decode error"}])
+    try:
+        return _new_todo(payload)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+@app.post("/api/todos", status_code=status.HTTP_201_CREATED, openapi_extra=_CREATE_BODY_SCHEMA)
+async def create_todo(request: Request):
+    """Todo作成 (ボディは CreateTodoModel)。ID重複時は 409 を返す。タイムスタンプと未指定IDはサーバ生成。"""
+    raw = await request.body()
+    with child_span("validate CreateTodo"):
+        todo = _parse_new_todo(raw)
+    try:
+        created = await repo_io.run("POST /api/todos", _service(request).create, todo)
     except DuplicateTodoIdError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail={"type": "duplicate_todo_id", "id": e.todo_id})
+    coalescer.invalidate()
+    return created
+
+
+MAX_BATCH_IDS = 100
+
+
+_import_throttle: RuThrottle | None = None
+
+
+def _import_ru_throttle() -> RuThrottle | None:
+    """一括取り込み共通の RU 制御 (同時に複数の取り込みが走っても合計で IMPORT_RU_PER_SEC 以下)。
+
+    消費 RU を報告するリポジトリ (Cosmos) の場合のみ有効。
+    """
+    global _import_throttle
+    rate = float(os.getenv("IMPORT_RU_PER_SEC", "360"))
+    if rate <= 0 or not getattr(repo, "reports_request_charge", False):
+        return None
+    if _import_throttle is None or _import_throttle.rate != rate:
+        _import_throttle = RuThrottle(rate)
+    return _import_throttle
+
+
+@app.post("/api/todos/import")
+async def import_todos(request: Request):
+    """NDJSON (1 行 1 件の作成ペイロード) の一括取り込み。
+
+    ボディは受信しながら 1 行ずつ検証し、同時実行数 IMPORT_CONCURRENCY の書き込みパイプラインへ流す。
+    結果は完了順に NDJSON でストリーミング返却: `{"line": n, "status": 201|409|413|422|500, ...}`、最後に `{"summary": {...}}`。
+    """
+    svc = _service(request)
+
+    def write_sync(todo: Todo):
+        created = svc.create(todo)
+        return created, svc.last_request_charge()
+
+    async def write(todo: Todo):
+        return await repo_io.run("POST /api/todos/import", write_sync, todo)
+
+    importer = BulkImporter(
+        parse=lambda line: _new_todo(json.loads(line)),
+        write=write,
+        concurrency=int(os.getenv("IMPORT_CONCURRENCY", "8")),
+        throttle=_import_ru_throttle(),
+    )
+
+    async def results():
+        try:
+            async for chunk in importer.run(request.stream()):
+                yield chunk
+        finally:
+            coalescer.invalidate()
+
+    return DuplexStreamingResponse(results(), media_type="application/x-ndjson")
 
 
 @app.get("/api/todos")
-async def list_todos():
-    """Todo 一覧取得。"""
-    return service.list()
+async def list_todos(
+    request: Request,
+    sort: str | None = Query(default=None, description="例: priority,-dueDate,createdAt (- で降順)"),
+    limit: int | None = Query(default=None, ge=1, le=1000),
+    ids: str | None = Query(default=None, description=f"カンマ区切りの id (最大 {MAX_BATCH_IDS} 件) でまとめて取得"),
+):
+    """Todo 一覧取得。sort / limit 指定時はサーバ側で安定ソート (同順位は id 昇順) した先頭 limit 件。
+
+    ids 指定時は一括取得: `{"items": [要求順の Todo], "missing": [見つからなかった id]}` を返す。
+    """
+    if ids is not None:
+        return await _get_many(request, ids, combined=sort is not None or limit is not None)
+    try:
+        order = parse_sort(sort) if sort else None
+    except InvalidSortError as e:
+        raise HTTPException(status_code=422, detail={
+            "type": "validation_error",
+            "errors": [{"field": "sort", "message": str(e), "errorType": "invalid_sort_field"}],
+        })
+    return await _coalesced_json(request, "GET /api/todos", lambda: _service(request).list(order=order, limit=limit))
+
+async def _get_many(request: Request, ids: str, combined: bool) -> Response:
+    id_list = [i for i in (part.strip() for part in ids.split(",")) if i]
+    message = None
+    if combined:
+        message = "ids cannot be combined with sort / limit"
+    elif not id_list:
+        message = "ids must contain at least one id"
+    elif len(id_list) > MAX_BATCH_IDS:
+        message = f"ids accepts at most {MAX_BATCH_IDS} ids"
+    if message:
+        raise HTTPException(status_code=422, detail={
+            "type": "validation_error",
+            "errors": [{"field": "ids", "message": message, "errorType": "invalid_ids"}],
+        })
+
+    def load() -> dict:
+        items, missing = _service(request).get_many(id_list)
+        return {"items": items, "missing": missing}
+
+    return await _coalesced_json(request, "GET /api/todos?ids", load)
+
+@app.get("/api/todos/due")
+async def list_due_todos(
+    request: Request,
+    before: datetime | None = Query(default=None, description="この日時より前に期限 (排他)"),
+    after: datetime | None = Query(default=None, description="この日時以降に期限 (包含)"),
+    completed: bool | None = Query(default=None),
+):
+    """期限範囲で Todo を取得 (期限昇順)。
+
+    例: 期限切れ = `?before=<now>&completed=false` / N 日以内 = `?after=<now>&before=<now+N日>`
+    naive な日時は UTC とみなす。
+    """
+    return await _coalesced_json(request, "GET /api/todos/due", lambda: _service(request).due(before=before, after=after, completed=completed))
+
+@app.get("/api/todos/archive")
+async def list_archived_todos(
+    request: Request,
+    limit: int = Query(default=100, ge=1, le=1000),
+):
+    """アーカイブ (コールド層) の Todo を更新日時の新しい順に取得。アーカイブ未設定時は 404。"""
+    if archive is None:
+        raise HTTPException(status_code=404, detail={"type": "archive_disabled"})
+    return await _coalesced_json(request, "GET /api/todos/archive", lambda: archive.list(scope=_scope(request), limit=limit))
+
+@app.get("/api/tags")
+async def list_tags(
+    request: Request,
+    prefix: str | None = Query(default=None, description="前方一致 (オートコンプリート用)"),
+    limit: int | None = Query(default=None, ge=1, le=1000),
+):
+    """タグ一覧 (昇順)。各タグの未完了 / 完了件数を返す。"""
+    return await _coalesced_json(request, "GET /api/tags", lambda: _service(request).tags(prefix=prefix, limit=limit))
 
 @app.get("/api/todos/{todo_id}")
-async def get_todo(todo_id: str = Path(..., description="Todo ID")):
+async def get_todo(request: Request, todo_id: str = Path(..., description="Todo ID")):
     """ID 指定取得。存在しない場合 404。"""
-    todo = service.get(todo_id)
+    todo = await repo_io.run("GET /api/todos/{id}", _service(request).get, todo_id)
     if not todo:
         raise HTTPException(status_code=404, detail={"type": "not_found", "id": todo_id})
     return todo
 
 @app.patch("/api/todos/{todo_id}/complete")
-async def complete_todo(todo_id: str):
+async def complete_todo(request: Request, todo_id: str):
     """完了操作。既に完了でも成功扱い。"""
-    todo = service.complete(todo_id)
+    todo = await repo_io.run("PATCH /api/todos/{id}/complete", _service(request).complete, todo_id)
+    coalescer.invalidate()
     if not todo:
         raise HTTPException(status_code=404, detail={"type": "not_found", "id": todo_id})
     return todo
 
 @app.patch("/api/todos/{todo_id}/reopen")
-async def reopen_todo(todo_id: str):
+async def reopen_todo(request: Request, todo_id: str):
     """未完了へ戻す操作。既に未完了でも成功扱い。"""
-    todo = service.reopen(todo_id)
+    todo = await repo_io.run("PATCH /api/todos/{id}/reopen", _service(request).reopen, todo_id)
+    coalescer.invalidate()
     if not todo:
         raise HTTPException(status_code=404, detail={"type": "not_found", "id": todo_id})
     return todo
@@ -242,17 +625,20 @@ class PartialUpdateModel(BaseModel):
     tags: list[str] | None = None
 
 @app.patch("/api/todos/{todo_id}")
-async def update_partial(todo_id: str, body: PartialUpdateModel):
+async def update_partial(request: Request, todo_id: str, body: PartialUpdateModel):
     """部分更新エンドポイント。変更されたフィールドのみ更新。"""
-    updated = service.update_partial(todo_id, **{k: v for k, v in body.model_dump().items() if v is not None})
+    changes = {k: v for k, v in body.model_dump().items() if v is not None}
+    updated = await repo_io.run("PATCH /api/todos/{id}", _service(request).update_partial, todo_id, **changes)
+    coalescer.invalidate()
     if not updated:
         raise HTTPException(status_code=404, detail={"type": "not_found", "id": todo_id})
     return updated
 
 @app.delete("/api/todos/{todo_id}", status_code=204)
-async def delete_todo(todo_id: str):
+async def delete_todo(request: Request, todo_id: str):
     """削除エンドポイント。存在しなければ 404。成功時 204 (body 無し)。"""
-    ok = service.delete(todo_id)
+    ok = await repo_io.run("DELETE /api/todos/{id}", _service(request).delete, todo_id)
+    coalescer.invalidate()
     if not ok:
         raise HTTPException(status_code=404, detail={"type": "not_found", "id": todo_id})
     return None
@@ -0,0 +1,53 @@
+import asyncio
+import time
+import pytest
+from httpx import AsyncClient
+import main
+from infrastructure.http.admission import BoundedExecutor, _parse_route_limits
+
+
+class SlowGetRepo(main.InMemoryTodoRepository):
+    def get(self, todo_id):
+        time.sleep(0.1)
+        return super().get(todo_id)
+
+
+@pytest.mark.asyncio
+async def test_queue_full_sheds_load_with_503_and_retry_after(monkeypatch):
+    main.set_repo(SlowGetRepo())
+    monkeypatch.setattr(main, "repo_io", BoundedExecutor(max_workers=1, max_queue=1, retry_after=2))
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        await ac.post("/api/todos", json={"id": "adm-1", "title": "x", "priority": "low"})
+        resps = await asyncio.gather(ac.get("/api/todos/adm-1"), ac.get("/api/todos/adm-1"))
+        metrics = (await ac.get("/metrics/executor")).json()
+    codes = sorted(r.status_code for r in resps)
+    assert codes == [200, 503]
+    shed = next(r for r in resps if r.status_code == 503)
+    assert shed.headers["Retry-After"] == "2"
+    assert shed.json()["detail"]["type"] == "overloaded"
+    assert shed.json()["detail"]["reason"] == "queue_full"
+    assert metrics["rejected"] == 1
+    assert metrics["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_per_route_limit_rejects_only_that_route(monkeypatch):
+    main.set_repo(SlowGetRepo())
+    monkeypatch.setattr(main, "repo_io", BoundedExecutor(max_workers=4, max_queue=16, route_limits={"GET /api/todos/{id}": 1}))
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        await ac.post("/api/todos", json={"id": "adm-2", "title": "x", "priority": "low"})
+        resps = await asyncio.gather(
+            ac.get("/api/todos/adm-2"),
+            ac.get("/api/todos/adm-2"),
+            ac.get("/api/todos"),
+        )
+    assert sorted(r.status_code for r in resps) == [200, 200, 503]
+    assert resps[2].status_code == 200
+    assert any(r.json()["detail"].get("reason") == "route_limit" for r in resps if r.status_code == 503)
+
+
+def test_parse_route_limits():
+    assert _parse_route_limits("GET /api/todos=16; POST /api/todos=4;broken") == {
+        "GET /api/todos": 16,
+        "POST /api/todos": 4,
+    }
@@ -0,0 +1,123 @@
+import gzip
+import os
+from datetime import datetime, timedelta, timezone
+import pytest
+from httpx import AsyncClient
+import main
+from application.services.todo_archiver import TodoArchiver
+from domain.models.todo import Todo
+from infrastructure.repositories import todo_archive
+from infrastructure.repositories.cosmos_todo_repository import CosmosTodoRepository
+from infrastructure.repositories.todo_archive import NdjsonTodoArchive
+
+NOW = datetime(2025, 10, 1, tzinfo=timezone.utc)
+
+
+def _todo(todo_id, completed, days_ago, tenant=None):
+    ts = NOW - timedelta(days=days_ago)
+    return Todo(id=todo_id, title=todo_id, priority="low", tags=["t"], completed=completed,
+                createdAt=ts, updatedAt=ts, tenantId=tenant)
+
+
+@pytest.mark.asyncio
+async def test_archiver_moves_old_completed_todos_to_ndjson_tier(tmp_path):
+    main.reset_readiness()
+    for t in (_todo("old", True, 40, "t1"), _todo("old2", True, 35, "t2"), _todo("recent", True, 5), _todo("open", False, 90)):
+        main.service.create(t)
+    main.service.tags()  # カタログ構築済みでも移動で件数が減ること
+    archive = NdjsonTodoArchive(str(tmp_path))
+    archiver = TodoArchiver(main.service, archive, retention_days=30, batch_size=1)
+
+    assert archiver.run(now=NOW) == 2
+    assert sorted(t.id for t in main.service.list()) == ["open", "recent"]
+    assert main.service.tags() == [{"tag": "t", "open": 1, "completed": 1}]
+    assert archiver.run(now=NOW) == 0
+
+    main.archive = archive
+    try:
+        async with AsyncClient(app=main.app, base_url="http://test") as ac:
+            r = await ac.get("/api/todos/archive")
+            scoped = await ac.get("/api/todos/archive", headers={"X-Tenant-Id": "t1"})
+    finally:
+        main.archive = None
+    assert [t["id"] for t in r.json()] == ["old2", "old"]
+    assert [t["id"] for t in scoped.json()] == ["old"]
+
+
+def test_archiver_keeps_todos_reopened_after_selection(tmp_path):
+    main.reset_readiness()
+    main.service.create(_todo("flip", True, 40))
+
+    class ReopeningArchive(NdjsonTodoArchive):
+        def put_many(self, todos):
+            super().put_many(todos)
+            main.service.reopen("flip")  # アーカイブ書き込みと削除の間に更新された
+
+    assert TodoArchiver(main.service, ReopeningArchive(str(tmp_path)), retention_days=30).run_once(now=NOW) == 0
+    assert main.service.get("flip") is not None
+
+
+@pytest.mark.asyncio
+async def test_archive_endpoint_disabled_without_cold_tier():
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        r = await ac.get("/api/todos/archive")
+    assert r.status_code == 404
+    assert r.json()["detail"]["type"] == "archive_disabled"
+
+
+def test_ndjson_list_reads_newest_months_first_and_stops_at_limit(tmp_path, monkeypatch):
+    def write(month, *todos):
+        with gzip.open(tmp_path / f"archive-{month}.ndjson.gz", "ab") as f:
+            f.write(b"".join(t.model_dump_json().encode() + b"\n" for t in todos))
+
+    write("2025-07", _todo("july", True, 80), _todo("moved", True, 79))
+    write("2025-08", _todo("aug", True, 50))
+    write("2025-09", _todo("sep1", True, 20), _todo("sep2", True, 25), _todo("moved", True, 70))
+    opened = []
+    real_open = gzip.open
+    monkeypatch.setattr(todo_archive.gzip, "open", lambda path, *a, **k: opened.append(path) or real_open(path, *a, **k))
+    archive = NdjsonTodoArchive(str(tmp_path))
+
+    assert [t.id for t in archive.list(limit=2)] == ["sep1", "sep2"]
+    assert [os.path.basename(p) for p in opened] == ["archive-2025-09.ndjson.gz"]  # 2 件目 (9/6) が 8 月ファイルの上限 (9/1) 以降
+    opened.clear()
+    # 9 月ファイルの moved は 7 月時点の updatedAt だが、後から書かれた方を採用し古い月の重複は無視
+    assert [t.id for t in archive.list(limit=4)] == ["sep1", "sep2", "aug", "moved"]
+    assert len(opened) == 3
+    assert [t.id for t in archive.list()] == ["sep1", "sep2", "aug", "moved", "july"]
+
+
+class EtagContainer:
+    """_etag と if-match (IfNotModified) を模したフェイクコンテナ。"""
+
+    def __init__(self):
+        self.docs = {}
+        self.version = 0
+
+    def upsert_item(self, body):
+        self.version += 1
+        self.docs[body["id"]] = {**body, "_etag": f"e{self.version}"}
+
+    def read_item(self, item, partition_key):
+        return dict(self.docs[item])
+
+    def delete_item(self, item, partition_key, etag=None, match_condition=None):
+        if etag is not None and self.docs[item]["_etag"] != etag:
+            raise RuntimeError("412 precondition failed")
+        del self.docs[item]
+
+
+def test_cosmos_delete_if_unchanged_uses_etag_precondition():
+    container = EtagContainer()
+    repo = CosmosTodoRepository(container=container)
+    todo = _todo("c1", True, 40)
+    repo.save(todo)
+
+    def updated_meanwhile(current):
+        container.upsert_item(dict(container.docs["c1"]))  # 判定と削除の間に別の書き込み (_etag が変わる)
+        return True
+
+    assert repo.pop_if("c1", updated_meanwhile) is None
+    assert "c1" in container.docs
+    assert repo.pop_if("c1", lambda current: current.updatedAt == todo.updatedAt).id == "c1"
+    assert container.docs == {}
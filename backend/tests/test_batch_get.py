@@ -0,0 +1,57 @@
+import pytest
+from httpx import AsyncClient
+import main
+from domain.models.todo import Todo
+from domain.models.partition import PartitionScope
+from infrastructure.repositories.cosmos_todo_repository import CosmosTodoRepository
+
+
+@pytest.mark.asyncio
+async def test_get_many_keeps_request_order_and_reports_missing():
+    main.reset_readiness()
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        for i in ("b1", "b2", "b3"):
+            await ac.post("/api/todos", json={"id": i, "title": i, "priority": "low"})
+        r = await ac.get("/api/todos", params={"ids": "b3,nope,b1,b3"})
+        assert r.status_code == 200
+        body = r.json()
+        assert [t["id"] for t in body["items"]] == ["b3", "b1"]
+        assert body["missing"] == ["nope"]
+
+        too_many = ",".join(f"x{i}" for i in range(main.MAX_BATCH_IDS + 1))
+        assert (await ac.get("/api/todos", params={"ids": too_many})).status_code == 422
+        r = await ac.get("/api/todos", params={"ids": "b1", "sort": "title"})
+    assert r.status_code == 422
+    assert r.json()["detail"]["errors"][0]["field"] == "ids"
+
+
+def _doc(todo_id, tenant):
+    return Todo(
+        id=todo_id, title=todo_id, priority="normal", tenantId=tenant,
+        createdAt="2025-09-01T00:00:00Z", updatedAt="2025-09-01T00:00:00Z",
+    ).model_dump(mode="json")
+
+
+def test_cosmos_get_many_is_one_round_trip():
+    class Container:
+        def __init__(self):
+            self.docs = [_doc("a", "t1"), _doc("b", "t1"), _doc("c", "t2")]
+            self.calls = []
+
+        def query_items(self, query, parameters=None, **kwargs):
+            self.calls.append(("query", kwargs))
+            wanted = {p["name"]: p["value"] for p in parameters}["@ids"]
+            return [d for d in self.docs if d["id"] in wanted]
+
+        def read_many_items(self, items):
+            self.calls.append(("read_many", items))
+            return [d for d in self.docs if (d["id"], d["tenantId"]) in items]
+
+    c = Container()
+    repo = CosmosTodoRepository(c, partition_key_paths=["/tenantId"])
+    # キー値不明 (範囲指定なし) → ARRAY_CONTAINS の 1 クエリ
+    assert sorted(repo.get_many(["a", "c"])) == ["a", "c"]
+    # 範囲指定でキー値が決まる → read_many_items 1 回 (範囲外の c は返らない)
+    assert sorted(repo.scoped(PartitionScope(tenant_id="t1")).get_many(["a", "b", "c"])) == ["a", "b"]
+    assert [call[0] for call in c.calls] == ["query", "read_many"]
+    assert c.calls[1][1] == [("a", "t1"), ("b", "t1"), ("c", "t1")]
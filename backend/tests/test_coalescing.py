@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+import pytest
+from httpx import AsyncClient
+import main
+from infrastructure.http.single_flight import SingleFlight
+
+
+class SlowCountingRepo(main.InMemoryTodoRepository):
+    def __init__(self, delay: float = 0.1):
+        super().__init__()
+        self.delay = delay
+        self.list_calls = 0
+        self._lock = threading.Lock()
+
+    def list(self):
+        with self._lock:
+            self.list_calls += 1
+        time.sleep(self.delay)
+        return super().list()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_list_requests_share_one_backend_call():
+    repo = SlowCountingRepo()
+    main.set_repo(repo)
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        await ac.post("/api/todos", json={"id": "sf-1", "title": "x", "priority": "low"})
+        resps = await asyncio.gather(*[ac.get("/api/todos") for _ in range(10)])
+    assert all(r.status_code == 200 for r in resps)
+    assert all(r.content == resps[0].content for r in resps)
+    assert [t["id"] for t in resps[0].json()] == ["sf-1"]
+    assert repo.list_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_different_query_params_are_not_coalesced():
+    repo = SlowCountingRepo()
+    main.set_repo(repo)
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        await asyncio.gather(ac.get("/api/todos"), ac.get("/api/todos", params={"v": "2"}))
+    assert repo.list_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidate_prevents_joining_inflight_result():
+    sf = SingleFlight()
+    started = asyncio.Event()
+    release = asyncio.Event()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        started.set()
+        await release.wait()
+        return b"v%d" % len(calls)
+
+    first = asyncio.create_task(sf.do("k", loader))
+    await started.wait()
+    sf.invalidate()  # 書き込み発生
+    second = asyncio.create_task(sf.do("k", loader))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(first, second)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_followers():
+    sf = SingleFlight()
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def loader():
+        started.set()
+        await release.wait()
+        return b"ok"
+
+    leader = asyncio.create_task(sf.do("k", loader))
+    await started.wait()
+    followers = [asyncio.create_task(sf.do("k", loader)) for _ in range(3)]
+    await asyncio.sleep(0)
+    leader.cancel()  # 先頭のクライアントが切断
+    await asyncio.sleep(0)
+    release.set()
+    assert await asyncio.gather(*followers) == [b"ok"] * 3
+    assert leader.cancelled() and sf.calls == 1 and sf.shared == 3
+    assert not sf._inflight
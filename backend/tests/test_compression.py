@@ -0,0 +1,62 @@
+import asyncio
+import json
+import zlib
+import pytest
+from httpx import AsyncClient
+from starlette.responses import StreamingResponse
+import main
+from infrastructure.http.compression import CompressionMiddleware, negotiate
+
+
+@pytest.mark.asyncio
+async def test_large_list_is_gzipped_and_small_or_identity_is_not():
+    main.reset_readiness()
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        for i in range(40):
+            await ac.post("/api/todos", json={"id": f"z{i}", "title": "t" * 50, "description": "d" * 200, "priority": "low"})
+        r = await ac.get("/api/todos", headers={"Accept-Encoding": "gzip"})
+        plain = await ac.get("/api/todos", headers={"Accept-Encoding": "identity"})
+        small = await ac.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip" and r.headers["vary"] == "Accept-Encoding"
+    assert int(r.headers["content-length"]) < len(plain.content) / 5
+    assert r.json() == plain.json() and len(plain.json()) == 40
+    assert "content-encoding" not in plain.headers
+    assert "content-encoding" not in small.headers
+
+
+def test_negotiate_honours_q_values_and_server_preference():
+    offered = ["zstd", "br", "gzip"]
+    assert negotiate("gzip, br", offered) == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5", offered) == "gzip"
+    assert negotiate("*", offered) == "zstd"
+    assert negotiate("gzip;q=0, *;q=0", offered) is None
+    assert negotiate("deflate", ["gzip"]) is None
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_is_compressed_chunk_by_chunk():
+    async def app(scope, receive, send):
+        async def lines():
+            for i in range(3):
+                yield json.dumps({"line": i}).encode() + b"\n"
+        await StreamingResponse(lines(), media_type="application/x-ndjson")(scope, receive, send)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():  # 切断しないクライアント
+        await asyncio.Event().wait()
+
+    scope = {"type": "http", "method": "POST", "path": "/api/todos/import", "headers": [(b"accept-encoding", b"gzip")]}
+    await CompressionMiddleware(app, route_levels={"POST /api/todos/import": 1})(scope, receive, send)
+
+    start, *bodies = sent
+    assert dict(start["headers"])[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in dict(start["headers"])
+    d = zlib.decompressobj(31)
+    # 各チャンクは届いた時点で展開できる (同期フラッシュ)
+    decoded = [d.decompress(m["body"]) for m in bodies]
+    assert decoded[:3] == [b'{"line": 0}\n', b'{"line": 1}\n', b'{"line": 2}\n']
+    assert bodies[-1]["more_body"] is False and d.eof
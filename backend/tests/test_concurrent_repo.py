@@ -0,0 +1,85 @@
+import threading
+from datetime import datetime, timezone
+from application.services.todo_service import TodoService
+from domain.models.todo import Todo
+from infrastructure.repositories.in_memory_todo_repository import InMemoryTodoRepository
+
+
+def _todo(i: int, tags=None) -> Todo:
+    now = datetime.now(timezone.utc)
+    return Todo(id=f"c-{i}", title=f"t{i}", priority="normal", tags=tags or [], createdAt=now, updatedAt=now)
+
+
+def _run_threads(n: int, target):
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_concurrent_rmw_on_same_id_loses_no_updates():
+    repo = InMemoryTodoRepository(stripes=4)
+    repo.add(_todo(0, tags=[]))
+
+    def worker(i: int):
+        for j in range(200):
+            repo.update("c-0", lambda t: (t.tags.append(f"{i}-{j}") or True))
+
+    _run_threads(8, worker)
+    assert len(repo.get("c-0").tags) == 8 * 200
+
+
+def test_service_toggles_keep_tag_counts_consistent_under_threads():
+    repo = InMemoryTodoRepository()
+    service = TodoService(repo)
+    for i in range(16):
+        service.create(_todo(i, tags=["shared"]))
+    service.tags()  # カタログ構築後の差分更新経路を通す
+
+    def worker(i: int):
+        for _ in range(100):
+            service.complete(f"c-{i % 16}")
+            service.reopen(f"c-{(i + 1) % 16}")
+
+    _run_threads(8, worker)
+    completed = sum(1 for t in repo.list() if t.completed)
+    assert service.tags() == [{"tag": "shared", "open": 16 - completed, "completed": completed}]
+
+
+def test_list_is_snapshot_while_writers_run():
+    repo = InMemoryTodoRepository()
+    stop = threading.Event()
+
+    def writer(i: int):
+        n = 0
+        while not stop.is_set():
+            repo.add(_todo(i * 100000 + n))
+            repo.delete(f"c-{i * 100000 + n - 1}")
+            n += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    try:
+        for _ in range(200):
+            snapshot = repo.list()
+            assert len({t.id for t in snapshot}) == len(snapshot)
+            assert all(isinstance(t, Todo) for t in snapshot)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+
+
+def test_sharded_list_and_due_keep_order_across_stripes():
+    repo = InMemoryTodoRepository(stripes=8)
+    base = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    for i in range(40):
+        todo = _todo(i)
+        todo.dueDate = base.replace(day=1 + (i * 7) % 28)
+        repo.add(todo)
+    assert [t.id for t in repo.list()] == [f"c-{i}" for i in range(40)]
+    due = repo.list_due(before=base.replace(day=20))
+    assert [t.dueDate for t in due] == sorted(t.dueDate for t in due)
+    assert {t.id for t in due} == {f"c-{i}" for i in range(40) if 1 + (i * 7) % 28 < 20}
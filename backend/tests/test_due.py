@@ -0,0 +1,106 @@
+import pytest
+from httpx import AsyncClient
+import main
+from domain.models.todo import Todo
+from infrastructure.repositories.cosmos_todo_repository import CosmosTodoRepository
+from infrastructure.repositories.partition_migration import backfill_documents
+
+
+async def _seed(ac):
+    items = [
+        ("due-1", "2025-09-01T00:00:00Z"),
+        ("due-2", "2025-09-05T00:00:00Z"),
+        ("due-3", "2025-09-10T09:00:00+09:00"),  # = 2025-09-10T00:00:00Z
+        ("due-4", None),
+    ]
+    for todo_id, due in items:
+        payload = {"id": todo_id, "title": todo_id, "priority": "normal"}
+        if due:
+            payload["dueDate"] = due
+        r = await ac.post("/api/todos", json=payload)
+        assert r.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_due_range_is_sorted_and_half_open():
+    main.reset_readiness()
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        await _seed(ac)
+        r = await ac.get("/api/todos/due")
+        assert [t["id"] for t in r.json()] == ["due-1", "due-2", "due-3"]
+        r = await ac.get("/api/todos/due", params={"after": "2025-09-05T00:00:00Z", "before": "2025-09-10T00:00:00Z"})
+    assert r.status_code == 200
+    assert [t["id"] for t in r.json()] == ["due-2"]
+
+
+@pytest.mark.asyncio
+async def test_due_overdue_filters_completed_and_tracks_updates():
+    main.reset_readiness()
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        await _seed(ac)
+        await ac.patch("/api/todos/due-1/complete")
+        # due-2 の期限を後ろへ移動 → インデックスも追従すること
+        await ac.patch("/api/todos/due-2", json={"dueDate": "2025-12-01T00:00:00Z"})
+        await ac.delete("/api/todos/due-3")
+        r = await ac.get("/api/todos/due", params={"before": "2025-10-01T00:00:00Z", "completed": "false"})
+        assert r.json() == []
+        r = await ac.get("/api/todos/due", params={"completed": "true"})
+    assert [t["id"] for t in r.json()] == ["due-1"]
+
+
+def test_cosmos_list_due_uses_range_predicate():
+    class FakeContainer:
+        def __init__(self):
+            self.calls = []
+
+        def query_items(self, query, parameters=None, enable_cross_partition_query=True):
+            self.calls.append((query, parameters))
+            return iter([])
+
+    fake = FakeContainer()
+    from datetime import datetime, timezone
+    CosmosTodoRepository(container=fake).list_due(before=datetime(2025, 9, 1, tzinfo=timezone.utc), completed=False)
+    query, params = fake.calls[0]
+    assert "c.dueDate < @before" in query and "c.completed = @completed" in query
+    assert "ORDER BY" in query
+    assert {"name": "@before", "value": "2025-09-01T00:00:00+00:00"} in params
+
+
+class StringCompareContainer:
+    """Cosmos と同じく dueDate を保存された文字列のまま比較するフェイク。"""
+
+    def __init__(self, docs=None):
+        self.docs = {d["id"]: d for d in docs or []}
+
+    def create_item(self, body, **kwargs):
+        self.docs[body["id"]] = body
+
+    def upsert_item(self, body, **kwargs):
+        self.docs[body["id"]] = body
+
+    def query_items(self, query, parameters=None, **kwargs):
+        values = {p["name"]: p["value"] for p in parameters or []}
+        if "@before" not in values:
+            return iter(list(self.docs.values()))
+        return iter([d for d in self.docs.values() if d.get("dueDate") and d["dueDate"] < values["@before"]])
+
+
+def test_cosmos_due_range_matches_non_utc_offsets():
+    from datetime import datetime, timezone
+    fake = StringCompareContainer()
+    repo = CosmosTodoRepository(container=fake)
+    now = datetime.now(timezone.utc)
+    # 2024-12-31T23:00Z 相当 (+09:00 表記のまま保存すると "2025-01-01T08..." で境界より後と判定される)
+    repo.add(Todo(id="jst", title="t", priority="low", dueDate="2025-01-01T08:00:00+09:00", createdAt=now, updatedAt=now))
+    assert fake.docs["jst"]["dueDate"] == "2024-12-31T23:00:00+00:00"
+    assert [t.id for t in repo.list_due(before=datetime(2025, 1, 1, tzinfo=timezone.utc))] == ["jst"]
+
+
+def test_backfill_rewrites_legacy_offsets_and_priority_rank_once():
+    legacy = {"id": "old", "title": "t", "priority": "high", "dueDate": "2025-01-01T08:00:00+09:00",
+              "createdAt": "2025-01-01T00:00:00+00:00", "updatedAt": "2025-01-01T00:00:00+00:00", "_etag": "e"}
+    fake = StringCompareContainer([legacy])
+    assert backfill_documents(fake) == {"read": 1, "written": 1, "skipped": 0}
+    doc = fake.docs["old"]
+    assert doc["dueDate"] == "2024-12-31T23:00:00+00:00" and doc["priorityRank"] == 2 and "_etag" not in doc
+    assert backfill_documents(fake)["written"] == 0
@@ -0,0 +1,59 @@
+import asyncio
+import time
+import pytest
+from httpx import AsyncClient
+import main
+from infrastructure.http.idempotency import InMemoryIdempotencyStore, StoredResponse
+
+
+@pytest.mark.asyncio
+async def test_retried_post_is_replayed_byte_for_byte():
+    main.reset_readiness()
+    headers = {"Idempotency-Key": "k-1"}
+    payload = {"title": "once", "priority": "low"}
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        first = await ac.post("/api/todos", json=payload, headers=headers)
+        retry = await ac.post("/api/todos", json=payload, headers=headers)
+        other_body = await ac.post("/api/todos", json={"title": "changed", "priority": "low"}, headers=headers)
+        todos = (await ac.get("/api/todos")).json()
+    assert first.status_code == retry.status_code == 201
+    assert retry.content == first.content
+    assert retry.headers["idempotency-replayed"] == "true"
+    assert other_body.status_code == 422
+    assert other_body.json()["detail"]["type"] == "idempotency_key_reused"
+    assert len(todos) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_wait_for_first_execution(monkeypatch):
+    main.reset_readiness()
+    calls = []
+    create = main.service.create
+
+    def slow_create(todo):
+        calls.append(todo.id)
+        time.sleep(0.05)
+        return create(todo)
+
+    monkeypatch.setattr(main.service, "create", slow_create)
+    headers = {"Idempotency-Key": "k-2"}
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        responses = await asyncio.gather(*[
+            ac.post("/api/todos", json={"title": "dup", "priority": "low"}, headers=headers) for _ in range(5)
+        ])
+    assert len(calls) == 1
+    assert len({r.content for r in responses}) == 1
+    assert all(r.status_code == 201 for r in responses)
+
+
+def test_store_evicts_lru_and_expired_entries():
+    store = InMemoryIdempotencyStore(max_entries=2, ttl_sec=60)
+    resp = StoredResponse(201, [], b"{}", "f")
+    store.put("a", resp)
+    store.put("b", resp)
+    store.get("a")
+    store.put("c", resp)
+    assert store.get("b") is None and store.get("a") is resp
+    expired = InMemoryIdempotencyStore(ttl_sec=0)
+    expired.put("x", resp)
+    assert expired.get("x") is None
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import time
+import pytest
+from httpx import AsyncClient
+import main
+from domain.models.todo import Todo
+from infrastructure.http.bulk_import import BulkImporter, RuThrottle, iter_lines
+
+
+@pytest.mark.asyncio
+async def test_import_streams_per_line_results():
+    main.reset_readiness()
+    lines = [
+        {"id": "imp-1", "title": "a", "priority": "low", "tags": ["bulk"]},
+        {"title": "b", "priority": "oops"},
+        {"id": "imp-1", "title": "dup", "priority": "low"},
+        {"id": "imp-2", "title": "c", "priority": "high"},
+    ]
+    body = "\n".join(json.dumps(x) for x in lines) + "\n\n"
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        r = await ac.post("/api/todos/import", content=body, headers={"Content-Type": "application/x-ndjson"})
+        tags = (await ac.get("/api/tags")).json()
+    assert r.status_code == 200
+    out = [json.loads(x) for x in r.text.splitlines()]
+    by_line = {x["line"]: x for x in out if "line" in x}
+    assert by_line[1]["status"] == 201 and by_line[4]["status"] == 201
+    assert by_line[2]["status"] == 422 and by_line[2]["errors"][0]["field"] == "priority"
+    assert by_line[3] == {"line": 3, "status": 409, "type": "duplicate_todo_id", "id": "imp-1"}
+    assert out[-1]["summary"]["created"] == 2 and out[-1]["summary"]["failed"] == 2
+    assert sorted(t.id for t in main.service.list()) == ["imp-1", "imp-2"]
+    assert tags == [{"tag": "bulk", "open": 1, "completed": 0}]
+
+
+def _todo(i):
+    return Todo(id=f"t{i}", title="x", priority="low", createdAt="2025-09-01T00:00:00Z", updatedAt="2025-09-01T00:00:00Z")
+
+
+async def _chunks(n):
+    for i in range(n):
+        yield f"{i}\n".encode()
+
+
+@pytest.mark.asyncio
+async def test_importer_bounds_concurrency_and_retries_throttled_writes():
+    active, peak, attempts = 0, 0, {}
+
+    class TooManyRequests(Exception):
+        status_code = 429
+        headers = {"x-ms-retry-after-ms": "1"}
+
+    async def write(todo):
+        nonlocal active, peak
+        attempts[todo.id] = attempts.get(todo.id, 0) + 1
+        if todo.id == "t3" and attempts[todo.id] == 1:
+            raise TooManyRequests()
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.001)
+        active -= 1
+        return todo, 5.0
+
+    importer = BulkImporter(parse=lambda line: _todo(int(line)), write=write, concurrency=4)
+    out = [json.loads(x) async for x in importer.run(_chunks(50))]
+    assert peak <= 4
+    assert out[-1]["summary"]["created"] == 50
+    assert attempts["t3"] == 2
+
+
+@pytest.mark.asyncio
+async def test_ru_throttle_paces_writes_and_learns_charge():
+    throttle = RuThrottle(ru_per_sec=1000, burst=10, initial_estimate=10)
+    t0 = time.perf_counter()
+    for _ in range(6):
+        reserved = await throttle.acquire()
+    assert time.perf_counter() - t0 >= 0.04  # バースト超過分 50 RU / 1000 RU/s
+    throttle.observe(reserved, 20.0)
+    assert throttle.estimate == pytest.approx(12.0)
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_joins_fragments_and_drops_oversized_lines():
+    async def chunks():
+        for part in [b"a\n\nb", b"c", b"d\nxxxx", b"xxxx", b"xx\ne\n", b"f"]:
+            yield part
+
+    assert [line async for line in iter_lines(chunks(), max_line=6)] == [b"a", b"bcd", None, b"e", b"f"]
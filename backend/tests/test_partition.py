@@ -0,0 +1,128 @@
+import pytest
+from httpx import AsyncClient
+import main
+from domain.models.todo import Todo, utc_now
+from domain.models.partition import PartitionScope
+from application.services.todo_service import TodoService
+from infrastructure.repositories.in_memory_todo_repository import InMemoryTodoRepository
+from infrastructure.repositories.cosmos_todo_repository import CosmosTodoRepository, parse_partition_key_paths
+from infrastructure.repositories.partition_migration import migrate_container
+from infrastructure.repositories.todo_record import encode, decode
+
+T1 = {"X-Tenant-Id": "t1"}
+T2 = {"X-Tenant-Id": "t2"}
+
+
+@pytest.mark.asyncio
+async def test_tenant_header_isolates_reads_writes_and_tags():
+    main.reset_readiness()
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        assert (await ac.get("/api/tags", headers=T1)).json() == []
+        r = await ac.post("/api/todos", headers=T1, json={"id": "p1", "title": "a", "priority": "low", "tags": ["x"]})
+        assert r.json()["tenantId"] == "t1"
+        await ac.post("/api/todos", headers=T2, json={"id": "p2", "title": "b", "priority": "low", "tags": ["y"]})
+
+        assert [t["id"] for t in (await ac.get("/api/todos", headers=T1)).json()] == ["p1"]
+        assert (await ac.get("/api/todos/p2", headers=T1)).status_code == 404
+        assert (await ac.patch("/api/todos/p2/complete", headers=T1)).status_code == 404
+        assert (await ac.delete("/api/todos/p2", headers=T1)).status_code == 404
+        assert (await ac.get("/api/tags", headers=T1)).json() == [{"tag": "x", "open": 1, "completed": 0}]
+        # 範囲指定なし (管理用途) の更新も範囲別カタログへ反映される
+        await ac.patch("/api/todos/p1/complete")
+        assert (await ac.get("/api/tags", headers=T1)).json() == [{"tag": "x", "open": 0, "completed": 1}]
+        all_ids = sorted(t["id"] for t in (await ac.get("/api/todos")).json())
+    assert all_ids == ["p1", "p2"]
+
+
+def test_scoped_services_and_catalogs_are_lru_bounded():
+    service = TodoService(InMemoryTodoRepository(), max_scopes=3, max_scoped_catalogs=2)
+    scopes = [PartitionScope(tenant_id=f"t{i}") for i in range(4)]
+    for scope in scopes[:3]:
+        svc = service.for_scope(scope)
+        svc.create(Todo(id=scope.tenant_id, title="a", priority="low", tags=["x"], createdAt=utc_now(), updatedAt=utc_now()))
+        svc.tags()
+    # カタログは直近 2 範囲のみ保持、差分反映もその 2 範囲だけ
+    assert [svc._scope for svc in service._catalogs()] == scopes[1:3]
+    t0 = service.for_scope(scopes[0])
+    assert t0._tags is None
+    service.for_scope(scopes[3])  # 上限 3 を超えたので最も古い t1 を追い出す
+    assert scopes[1] not in service._scoped and len(service._scoped) == 3
+    assert [svc._scope for svc in service._catalogs()] == scopes[2:3]
+    # 追い出された範囲も次回参照で再構築され、件数は正しい
+    service.update_partial("t1", tags=["y"])
+    assert service.for_scope(scopes[1]).tags() == [{"tag": "y", "open": 1, "completed": 0}]
+    assert t0.tags() == [{"tag": "x", "open": 1, "completed": 0}]
+
+
+class RecordingContainer:
+    """query / point read に渡された partition_key を記録するフェイクコンテナ。"""
+
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.calls = []
+
+    def query_items(self, query, parameters=None, **kwargs):
+        self.calls.append(("query", query, kwargs))
+        names = {p["name"]: p["value"] for p in parameters or []}
+        for doc in self.docs:
+            if "@tenantId" in names and doc.get("tenantId") != names["@tenantId"]:
+                continue
+            if "@id" in names and doc.get("id") != names["@id"]:
+                continue
+            yield doc
+
+    def read_item(self, item, partition_key):
+        self.calls.append(("read", item, partition_key))
+        for doc in self.docs:
+            key = [doc.get("tenantId"), doc.get("userId")]
+            if doc["id"] == item and partition_key in (key, key[0]):
+                return doc
+        raise KeyError(item)
+
+    def upsert_item(self, body):
+        self.docs.append(body)
+
+
+def _doc(todo_id, tenant, user="u1"):
+    return Todo(
+        id=todo_id, title=todo_id, priority="normal", tenantId=tenant, userId=user,
+        createdAt="2025-09-01T00:00:00Z", updatedAt="2025-09-01T00:00:00Z",
+    ).model_dump(mode="json")
+
+
+def test_cosmos_scoped_queries_use_single_partition_and_hierarchical_point_reads():
+    c = RecordingContainer([_doc("a", "t1"), _doc("b", "t2")])
+    repo = CosmosTodoRepository(c, partition_key_paths=parse_partition_key_paths("/tenantId,/userId"))
+
+    tenant = repo.scoped(PartitionScope(tenant_id="t1"))
+    assert [t.id for t in tenant.list()] == ["a"]
+    assert c.calls[-1][2] == {"partition_key": ["t1"]}  # 階層キーのプレフィックスクエリ
+
+    user = repo.scoped(PartitionScope(tenant_id="t1", user_id="u1"))
+    assert user.get("a").id == "a"
+    assert c.calls[-1] == ("read", "a", ["t1", "u1"])
+    user.list_sorted([("createdAt", False)], limit=5)
+    assert c.calls[-1][2] == {"partition_key": ["t1", "u1"]}
+
+    # キー値が決まらない場合はクロスパーティションの id 検索
+    assert repo.get("b").tenantId == "t2"
+    assert c.calls[-1][2] == {"enable_cross_partition_query": True}
+
+
+def test_record_codec_round_trips_partition_fields():
+    todo = Todo(**_doc("r1", "t1", "u9"))
+    assert decode(encode(todo), 0) == todo
+    legacy = todo.model_copy(update={"tenantId": None, "userId": None})
+    assert decode(encode(legacy), 0).tenantId is None
+
+
+def test_migrate_container_fills_defaults_and_skips_missing_keys():
+    legacy = {"id": "m1", "userId": "u1", "title": "t", "priority": "low", "_rid": "x", "_etag": "e"}
+    orphan = {"id": "m2", "title": "t", "priority": "low"}
+    source, target = RecordingContainer([legacy, orphan]), RecordingContainer()
+    stats = migrate_container(source, target, ["/tenantId", "/userId"], default_tenant="default")
+    assert stats == {"read": 2, "written": 1, "skipped": 1}
+    assert target.docs == [{"id": "m1", "userId": "u1", "title": "t", "priority": "low", "tenantId": "default"}]
+
+    with pytest.raises(ValueError):
+        parse_partition_key_paths("/owner")
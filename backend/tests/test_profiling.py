@@ -0,0 +1,66 @@
+import sys
+import time
+import pytest
+from httpx import AsyncClient
+import main
+from infrastructure.http.profiling import Profiler, ProfilingMiddleware
+from infrastructure.repositories.in_memory_todo_repository import InMemoryTodoRepository
+
+
+class SlowRepository(InMemoryTodoRepository):
+    def list(self):
+        time.sleep(0.05)
+        return super().list()
+
+
+@pytest.mark.asyncio
+async def test_admin_header_profiles_request_across_loop_and_repo_threads(monkeypatch):
+    main.reset_readiness()
+    main.set_repo(SlowRepository())
+    profiler = Profiler(admin_token="secret", interval_ms=1)
+    monkeypatch.setattr(main, "profiler", profiler)
+    app = ProfilingMiddleware(main.app, profiler)
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        plain = await ac.get("/api/todos")
+        r = await ac.get("/api/todos", headers={"X-Profile-Token": "secret"})
+        assert "x-profile-id" not in plain.headers
+        profile_id = r.headers["x-profile-id"]
+
+        assert (await ac.get("/debug/profiles")).status_code == 403
+        listed = (await ac.get("/debug/profiles", headers={"X-Profile-Token": "secret"})).json()
+        flame = await ac.get(f"/debug/profiles/{profile_id}", headers={"X-Profile-Token": "secret"})
+    assert [p["id"] for p in listed] == [profile_id]
+    assert listed[0]["samples"] > 0 and listed[0]["phasesMs"]["service"] > 0
+    assert flame.headers["content-type"].startswith("text/plain")
+    assert any(line.startswith("repo-io;") and "todo_service:TodoService.list" in line for line in flame.text.splitlines())
+
+
+def test_sampler_lowers_switch_interval_only_while_profiling():
+    original = sys.getswitchinterval()
+    profiler = Profiler(sample_rate=1.0, interval_ms=1)
+    first = profiler.begin("GET", "/a")
+    second = profiler.begin("GET", "/b")
+    assert sys.getswitchinterval() == pytest.approx(0.001)
+    profiler.finish(first, 200)
+    assert sys.getswitchinterval() == pytest.approx(0.001)
+    profiler.finish(second, 200)
+    assert sys.getswitchinterval() == original
+
+
+@pytest.mark.asyncio
+async def test_sampled_profiles_are_hidden_without_admin_token(monkeypatch):
+    profiler = Profiler(sample_rate=1.0)
+    assert not profiler.authorized(None) and not profiler.authorized(b"guess")
+    monkeypatch.setattr(main, "profiler", profiler)
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        r = await ac.get("/debug/profiles")
+    assert r.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_debug_profiles_is_404_when_profiling_disabled():
+    assert main.profiler is None
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        r = await ac.get("/debug/profiles")
+    assert r.status_code == 404
+    assert r.json()["detail"]["type"] == "profiling_disabled"
@@ -0,0 +1,78 @@
+import pytest
+from httpx import AsyncClient
+import main
+from infrastructure.repositories.cosmos_session import merge_session_tokens
+from infrastructure.repositories.cosmos_todo_repository import CosmosTodoRepository
+
+
+class LaggingReplicaContainer:
+    """書き込みごとに LSN を進め、読み取りは遅れたレプリカから返すフェイクコンテナ。
+
+    session_token の LSN がレプリカより新しい読み取りは、追いついたレプリカ (= プライマリ相当) から返す。
+    """
+
+    client_connection = None  # SDK の ContainerProxy と同じく response_hook を受け付ける
+
+    def __init__(self):
+        self.lsn = 0
+        self.primary = {}
+        self.replica = {}
+        self.replica_lsn = 0
+        self.read_tokens = []
+
+    def _write(self, response_hook):
+        self.lsn += 1
+        if response_hook:
+            response_hook({"x-ms-session-token": f"0:-1#{self.lsn}", "x-ms-request-charge": "5.0"}, None)
+
+    def _view(self, session_token):
+        self.read_tokens.append(session_token)
+        if session_token and int(session_token.split("#")[1]) > self.replica_lsn:
+            return self.primary
+        return self.replica
+
+    def replicate(self):
+        self.replica, self.replica_lsn = dict(self.primary), self.lsn
+
+    def create_item(self, body, response_hook=None):
+        self.primary[body["id"]] = body
+        self._write(response_hook)
+
+    def upsert_item(self, body, response_hook=None):
+        self.primary[body["id"]] = body
+        self._write(response_hook)
+
+    def read_item(self, item, partition_key, session_token=None):
+        return self._view(session_token)[item]
+
+    def query_items(self, query, parameters=None, session_token=None, **kwargs):
+        return list(self._view(session_token).values())
+
+
+@pytest.mark.asyncio
+async def test_session_token_gives_read_your_writes_on_lagging_replica():
+    main.reset_readiness()
+    c = LaggingReplicaContainer()
+    main.set_repo(CosmosTodoRepository(c))
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        r = await ac.post("/api/todos", json={"id": "s1", "title": "t", "priority": "low"})
+        token = r.headers["x-session-token"]
+        assert token == "0:-1#1"
+        assert (await ac.get("/api/todos/s1")).status_code == 404  # トークン無し: 遅れたレプリカ
+        assert (await ac.get("/api/todos/s1", headers={"X-Session-Token": token})).status_code == 200
+        assert [t["id"] for t in (await ac.get("/api/todos", headers={"X-Session-Token": token})).json()] == ["s1"]
+
+        # 書き込みのレスポンスは受け取ったトークンとまとめた値を返す / 読み取りのみならヘッダ無し
+        r = await ac.patch("/api/todos/s1/complete", headers={"X-Session-Token": token})
+        assert r.status_code == 200 and r.headers["x-session-token"] == "0:-1#2"
+        c.replicate()
+        r = await ac.get("/api/todos/s1")
+    assert r.json()["completed"] is True and "x-session-token" not in r.headers
+    assert c.read_tokens[-1] is None
+    main.reset_readiness()
+
+
+def test_merge_keeps_highest_lsn_per_partition_range():
+    assert merge_session_tokens("0:-1#5,1:-1#3", "0:-1#7", None) == "0:-1#7,1:-1#3"
+    assert merge_session_tokens("2:9", "2:4") == "2:9"
+    assert merge_session_tokens(None, "garbage") is None
@@ -0,0 +1,110 @@
+import multiprocessing
+import os
+import sys
+from datetime import datetime, timezone
+import pytest
+from application.services.todo_service import TodoService
+from domain.models.todo import Todo
+from infrastructure.repositories.in_memory_todo_repository import DuplicateTodoIdError
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="fcntl (POSIX) 前提")
+
+
+def _todo(todo_id: str, **kw) -> Todo:
+    now = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    base = dict(id=todo_id, title=f"title-{todo_id}", priority="high", createdAt=now, updatedAt=now)
+    base.update(kw)
+    return Todo(**base)
+
+
+def _open(path, capacity=1 << 20):
+    from infrastructure.repositories.shared_memory_todo_repository import SharedMemoryTodoRepository
+    return SharedMemoryTodoRepository(str(path), capacity=capacity)
+
+
+def test_round_trip_and_crud(tmp_path):
+    repo = _open(tmp_path / "shm.bin")
+    todo = _todo("shm-1", description="説明", tags=["azure", "タグ"], dueDate=datetime(2025, 9, 5, tzinfo=timezone.utc))
+    repo.add(todo)
+    with pytest.raises(DuplicateTodoIdError):
+        repo.add(todo)
+    assert repo.get("shm-1").model_dump() == todo.model_dump()
+    service = TodoService(repo)
+    assert service.complete("shm-1").completed is True
+    assert service.update_partial("shm-1", title="changed").title == "changed"
+    assert [t.title for t in repo.list()] == ["changed"]
+    assert repo.delete("shm-1") is True
+    assert repo.get("shm-1") is None and repo.list() == []
+
+
+def test_two_handles_share_one_dataset(tmp_path):
+    a = _open(tmp_path / "shm.bin")
+    b = _open(tmp_path / "shm.bin")
+    a.add(_todo("x"))
+    assert b.get("x").title == "title-x"
+    b.save(_todo("x", title="from-b"))
+    assert a.get("x").title == "from-b"
+    a.delete("x")
+    assert b.list() == []
+
+
+def test_compaction_reclaims_dead_records(tmp_path):
+    a = _open(tmp_path / "shm.bin", capacity=8 * 1024)
+    b = _open(tmp_path / "shm.bin", capacity=8 * 1024)
+    a.add(_todo("keep"))
+    for i in range(500):  # 更新の追記で容量を何度も使い切る
+        a.save(_todo("hot", title=f"v{i}"))
+    assert {t.id: t.title for t in b.list()} == {"keep": "title-keep", "hot": "v499"}
+
+
+def _worker(path: str, worker: int, n: int) -> None:
+    repo = _open(path)
+    for i in range(n):
+        repo.add(_todo(f"w{worker}-{i}"))
+    for i in range(n):
+        repo.update("counter", lambda t: (t.tags.append(f"{worker}-{i}") or True))
+
+
+def test_multiple_processes_see_one_dataset(tmp_path):
+    path = str(tmp_path / "shm.bin")
+    _open(path).add(_todo("counter"))
+    ctx = multiprocessing.get_context("fork" if hasattr(os, "fork") else "spawn")
+    procs = [ctx.Process(target=_worker, args=(path, w, 50)) for w in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert all(p.exitcode == 0 for p in procs)
+    repo = _open(path)
+    assert len(repo.list()) == 1 + 3 * 50
+    assert len(repo.get("counter").tags) == 3 * 50
+
+
+def test_tag_catalog_follows_writes_from_other_handles(tmp_path):
+    a, b = _open(tmp_path / "shm.bin"), _open(tmp_path / "shm.bin")
+    svc_a, svc_b = TodoService(a), TodoService(b)
+    assert svc_a.tags() == []  # ワーカー A が先にカタログを構築
+    svc_b.create(_todo("tg-1", tags=["azure"]))
+    assert svc_a.tags() == [{"tag": "azure", "open": 1, "completed": 0}]
+    catalog = svc_a._tags
+    svc_a.tags()
+    assert svc_a._tags is catalog  # 書き込みが無ければ再構築しない
+    svc_b.complete("tg-1")
+    assert svc_a.tags() == [{"tag": "azure", "open": 0, "completed": 1}]
+    # 自プロセスの書き込みは差分反映済みのため再構築しない
+    catalog = svc_a._tags
+    svc_a.reopen("tg-1")
+    assert svc_a.tags() == [{"tag": "azure", "open": 1, "completed": 0}]
+    assert svc_a._tags is catalog
+
+
+def test_update_interrupted_before_old_record_is_retired_keeps_new_version(tmp_path):
+    from infrastructure.repositories.todo_record import LIVE, STATE_OFF
+    a = _open(tmp_path / "shm.bin")
+    a.add(_todo("x", title="v1"))
+    old = a._index["x"]
+    a.save(_todo("x", title="v2"))
+    a._mm[old + STATE_OFF] = LIVE  # 新レコード公開後・旧レコード DEAD 化前に書き手が落ちた状態
+    b = _open(tmp_path / "shm.bin")
+    assert b.get("x").title == "v2"
+    assert [t.title for t in b.list()] == ["v2"]
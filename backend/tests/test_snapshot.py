@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+from application.services.todo_service import TodoService
+from domain.models.todo import Todo
+from infrastructure.repositories.durable_in_memory_todo_repository import DurableInMemoryTodoRepository
+
+
+def _todo(todo_id: str, **kw) -> Todo:
+    now = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    base = dict(id=todo_id, title=f"title-{todo_id}", priority="normal", createdAt=now, updatedAt=now)
+    base.update(kw)
+    return Todo(**base)
+
+
+def _restart(path) -> DurableInMemoryTodoRepository:
+    repo = DurableInMemoryTodoRepository(str(path))
+    repo.warm_start()
+    return repo
+
+
+def test_wal_only_restart_restores_state(tmp_path):
+    repo = _restart(tmp_path)
+    service = TodoService(repo)
+    service.create(_todo("a", tags=["x"]))
+    service.create(_todo("b"))
+    service.complete("a")
+    service.delete("b")
+    repo.close()
+
+    again = _restart(tmp_path)
+    assert [t.id for t in again.list()] == ["a"]
+    assert again.get("a").completed is True
+    assert again.get("b") is None
+
+
+def test_snapshot_plus_wal_restart_and_due_index(tmp_path):
+    repo = _restart(tmp_path)
+    repo.add(_todo("s1", dueDate=datetime(2025, 9, 3, tzinfo=timezone.utc)))
+    repo.add(_todo("s2"))
+    assert repo.snapshot() == 2
+    # スナップショット後の変更は WAL にのみ残る
+    repo.add(_todo("s3", dueDate=datetime(2025, 9, 2, tzinfo=timezone.utc)))
+    repo.delete("s2")
+    repo.close()
+
+    again = _restart(tmp_path)
+    assert again.get("s3").title == "title-s3"  # 展開前でも get は応答可能
+    assert sorted(t.id for t in again.list()) == ["s1", "s3"]
+    assert [t.id for t in again.list_due()] == ["s3", "s1"]
+
+
+def test_torn_wal_tail_is_ignored(tmp_path):
+    repo = _restart(tmp_path)
+    repo.add(_todo("ok"))
+    repo.close()
+    wal = next(tmp_path.glob("wal.*.log"))
+    with open(wal, "ab") as f:
+        f.write(b"P\xff\xff\x00\x00partial")
+    assert [t.id for t in _restart(tmp_path).list()] == ["ok"]
+
+
+def test_pop_if_waits_for_warm_start(tmp_path):
+    repo = _restart(tmp_path)
+    repo.add(_todo("p1"))
+    repo.close()
+
+    again = DurableInMemoryTodoRepository(str(tmp_path))  # 未展開のまま条件付き削除
+    assert again.pop_if("p1", lambda t: True).id == "p1"
+    assert again.get("p1") is None
@@ -0,0 +1,130 @@
+import pytest
+from datetime import datetime, timezone
+from httpx import AsyncClient
+import main
+from domain.models.todo_sort import parse_sort, InvalidSortError
+from infrastructure.repositories.cosmos_todo_repository import CosmosTodoRepository, indexing_policy
+
+
+async def _seed(ac):
+    items = [
+        {"id": "s-a", "title": "a", "priority": "urgent", "dueDate": "2025-09-01T00:00:00Z"},
+        {"id": "s-b", "title": "b", "priority": "low"},
+        {"id": "s-c", "title": "c", "priority": "urgent", "dueDate": "2025-09-09T00:00:00Z"},
+        {"id": "s-d", "title": "d", "priority": "normal", "dueDate": "2025-09-05T00:00:00Z"},
+        {"id": "s-e", "title": "e", "priority": "urgent", "dueDate": "2025-09-09T00:00:00Z"},
+    ]
+    for it in items:
+        assert (await ac.post("/api/todos", json=it)).status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_sort_multi_field_with_stable_id_tiebreak():
+    main.reset_readiness()
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        await _seed(ac)
+        r = await ac.get("/api/todos", params={"sort": "-priority,-dueDate"})
+    assert r.status_code == 200
+    # urgent 内は期限降順、同一期限 (s-c / s-e) は id 昇順
+    assert [t["id"] for t in r.json()] == ["s-c", "s-e", "s-a", "s-d", "s-b"]
+
+
+@pytest.mark.asyncio
+async def test_sort_with_limit_returns_top_n():
+    main.reset_readiness()
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        await _seed(ac)
+        r = await ac.get("/api/todos", params={"sort": "dueDate", "limit": 2})
+    # dueDate 未設定 (None) は昇順で先頭
+    assert [t["id"] for t in r.json()] == ["s-b", "s-a"]
+
+
+@pytest.mark.asyncio
+async def test_sort_unknown_field_returns_422():
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        r = await ac.get("/api/todos", params={"sort": "secret"})
+    assert r.status_code == 422
+    detail = r.json()["detail"]
+    assert detail["type"] == "validation_error"
+    assert detail["errors"][0]["field"] == "sort"
+
+
+def test_parse_sort():
+    assert parse_sort("priority,-dueDate, createdAt") == [("priority", False), ("dueDate", True), ("createdAt", False)]
+    with pytest.raises(InvalidSortError):
+        parse_sort("nope")
+
+
+def test_cosmos_list_sorted_builds_order_by_and_top():
+    class FakeContainer:
+        def __init__(self):
+            self.calls = []
+
+        def query_items(self, query, parameters=None, enable_cross_partition_query=True):
+            self.calls.append((query, parameters))
+            return iter([])
+
+    fake = FakeContainer()
+    CosmosTodoRepository(container=fake).list_sorted(parse_sort("priority,-dueDate,createdAt"), 10)
+    query, params = fake.calls[0]
+    assert query == (
+        "SELECT TOP @limit * FROM c ORDER BY "
+        "c.priorityRank ASC, c.dueDate DESC, c.createdAt ASC, c.id ASC"
+    )
+    assert params == [{"name": "@limit", "value": 10}]
+
+
+def test_cosmos_list_sorted_only_issues_indexed_order_by():
+    class FakeContainer:
+        def __init__(self, docs):
+            self.docs = docs
+            self.queries = []
+
+        def query_items(self, query, parameters=None, **kwargs):
+            self.queries.append(query)
+            return iter(self.docs)
+
+    now = datetime.now(timezone.utc)
+    docs = [
+        {"id": i, "title": t, "priority": "low", "createdAt": now, "updatedAt": now}
+        for i, t in (("a", "b"), ("b", "c"), ("c", "a"))
+    ]
+    fake = FakeContainer(docs)
+    repo = CosmosTodoRepository(container=fake)
+    # 単一フィールドの降順は id も降順にして [dueDate ASC, id ASC] の全反転と一致させる
+    repo.list_sorted(parse_sort("-dueDate"), 5)
+    assert fake.queries[-1].endswith("ORDER BY c.dueDate DESC, c.id DESC")
+    repo.list_sorted(parse_sort("-updatedAt"), 5)
+    assert fake.queries[-1].endswith("ORDER BY c.updatedAt DESC, c.id ASC")
+    # 複合インデックスの無い並びは ORDER BY を発行せず全件取得 + top-N
+    assert [t.id for t in repo.list_sorted(parse_sort("title,-createdAt"), 2)] == ["c", "a"]
+    assert "ORDER BY" not in fake.queries[-1]
+
+
+def test_cosmos_falls_back_to_memory_when_composite_index_is_missing():
+    from azure.cosmos.exceptions import CosmosHttpResponseError
+
+    class NoCompositeIndexContainer:
+        """bicep 以外で作られたコンテナ: 複数プロパティの ORDER BY は 400。"""
+
+        def __init__(self, docs):
+            self.docs = docs
+
+        def query_items(self, query, parameters=None, **kwargs):
+            if "ORDER BY" in query and "," in query.split("ORDER BY")[1]:
+                raise CosmosHttpResponseError(status_code=400, message="The order by query does not have a corresponding composite index")
+            return iter(self.docs)
+
+    now = datetime.now(timezone.utc)
+    docs = [
+        {"id": i, "title": i, "priority": p, "dueDate": d, "createdAt": now, "updatedAt": now}
+        for i, p, d in (("a", "low", "2025-09-03T00:00:00+00:00"), ("b", "high", "2025-09-01T00:00:00+00:00"))
+    ]
+    repo = CosmosTodoRepository(container=NoCompositeIndexContainer(docs))
+    assert [t.id for t in repo.list_sorted(parse_sort("-priority"), 1)] == ["b"]
+    due = repo.list_due(before=datetime(2025, 9, 2, tzinfo=timezone.utc))
+    assert [t.id for t in due] == ["b"]
+    # アプリがコンテナを作成する場合も bicep と同じ複合インデックスを指定する
+    composites = indexing_policy()["compositeIndexes"]
+    assert [{"path": "/completed", "order": "ascending"}, {"path": "/dueDate", "order": "ascending"}] in composites
+    assert [{"path": "/updatedAt", "order": "descending"}, {"path": "/id", "order": "ascending"}] in composites
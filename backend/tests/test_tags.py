@@ -0,0 +1,103 @@
+import threading
+import time
+import pytest
+from httpx import AsyncClient
+import main
+from application.services.tag_catalog import TagCatalog
+from application.services.todo_service import TodoService
+from domain.models.todo import Todo, utc_now
+from infrastructure.repositories.cosmos_todo_repository import CosmosTodoRepository
+from infrastructure.repositories.in_memory_todo_repository import InMemoryTodoRepository
+
+
+@pytest.mark.asyncio
+async def test_tags_counts_follow_create_complete_update_delete():
+    main.reset_readiness()
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        # カタログを先に構築させ、以降はインクリメンタル更新経路を通す
+        assert (await ac.get("/api/tags")).json() == []
+        await ac.post("/api/todos", json={"id": "tag-1", "title": "a", "priority": "low", "tags": ["azure", "aca"]})
+        await ac.post("/api/todos", json={"id": "tag-2", "title": "b", "priority": "low", "tags": ["azure"]})
+        await ac.patch("/api/todos/tag-1/complete")
+        r = await ac.get("/api/tags")
+        assert r.json() == [
+            {"tag": "aca", "open": 0, "completed": 1},
+            {"tag": "azure", "open": 1, "completed": 1},
+        ]
+        await ac.patch("/api/todos/tag-2", json={"tags": ["bicep"]})
+        await ac.delete("/api/todos/tag-1")
+        r = await ac.get("/api/tags")
+    assert r.json() == [{"tag": "bicep", "open": 1, "completed": 0}]
+
+
+@pytest.mark.asyncio
+async def test_tags_prefix_autocomplete_and_limit():
+    main.reset_readiness()
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        await ac.post("/api/todos", json={"title": "x", "priority": "low", "tags": ["azure", "aks", "aca", "bicep"]})
+        r = await ac.get("/api/tags", params={"prefix": "a"})
+        assert [t["tag"] for t in r.json()] == ["aca", "aks", "azure"]
+        r = await ac.get("/api/tags", params={"prefix": "a", "limit": 2})
+        assert [t["tag"] for t in r.json()] == ["aca", "aks"]
+        r = await ac.get("/api/tags", params={"prefix": "z"})
+    assert r.json() == []
+
+
+def test_cosmos_tag_counts_uses_single_aggregate_query():
+    class FakeContainer:
+        def __init__(self):
+            self.queries = []
+
+        def query_items(self, query, parameters=None, enable_cross_partition_query=True):
+            self.queries.append(query)
+            return iter([
+                {"tag": "azure", "completed": False, "n": 3},
+                {"tag": "azure", "completed": True, "n": 1},
+            ])
+
+    fake = FakeContainer()
+    catalog = TagCatalog.from_counts(CosmosTodoRepository(container=fake).tag_counts())
+    assert len(fake.queries) == 1 and "GROUP BY" in fake.queries[0]
+    assert catalog.query() == [{"tag": "azure", "open": 3, "completed": 1}]
+
+
+def test_duplicate_tags_are_stored_once_so_counts_match_catalog():
+    class FakeContainer:
+        def __init__(self):
+            self.docs = {}
+
+        def create_item(self, body, **kwargs):
+            self.docs[body["id"]] = body
+
+        def upsert_item(self, body, **kwargs):
+            self.docs[body["id"]] = body
+
+        def read_item(self, item, partition_key, **kwargs):
+            return self.docs[item]
+
+    fake = FakeContainer()
+    service = TodoService(CosmosTodoRepository(container=fake))
+    todo = service.create(Todo.model_validate({
+        "id": "dup", "title": "t", "priority": "low", "tags": ["a", "b", "a"],
+        "createdAt": utc_now(), "updatedAt": utc_now(),
+    }))
+    assert todo.tags == ["a", "b"] and fake.docs["dup"]["tags"] == ["a", "b"]
+    # 部分更新 (属性代入) 経由でも保存時に重複を除く
+    service.update_partial("dup", tags=["c", "c"])
+    assert fake.docs["dup"]["tags"] == ["c"]
+
+
+def test_write_during_catalog_rebuild_is_not_lost():
+    class SlowCountRepo(InMemoryTodoRepository):
+        def tag_counts(self):
+            rows = super().tag_counts()
+            writer.start()  # 集計後・設置前に別スレッドの作成が割り込む
+            time.sleep(0.05)
+            return rows
+
+    now = utc_now()
+    service = TodoService(SlowCountRepo())
+    writer = threading.Thread(target=service.create, args=(Todo(id="w", title="w", priority="low", tags=["work"], createdAt=now, updatedAt=now),))
+    assert service.tags() == []
+    writer.join()
+    assert service.tags() == [{"tag": "work", "open": 1, "completed": 0}]
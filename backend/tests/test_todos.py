@@ -2,7 +2,9 @@ import uuid
 import pytest
 from httpx import AsyncClient
 import main
-from domain.models.todo import Todo
+from domain.models.todo import Todo, utc_now
+from domain.models.partition import PartitionScope
+from application.services.todo_service import TodoService
 
 
 class CosmosStubRepo:
@@ -170,3 +172,52 @@ async def test_delete_nonexistent_returns_404():
     async with AsyncClient(app=main.app, base_url="http://test") as ac:
         delete_resp = await ac.delete(f"/api/todos/{missing_id}")
     assert delete_resp.status_code == 404
+
+
+class DictRepo:
+    """必須メソッドのみ実装し TodoRepository を継承しないリポジトリ (任意機能は as_repository() が補う)。"""
+
+    def __init__(self):
+        self.items = {}
+
+    def add(self, todo):
+        self.items[todo.id] = todo
+        return todo
+
+    def list(self):
+        return list(self.items.values())
+
+    def get(self, todo_id):
+        return self.items.get(todo_id)
+
+    def save(self, todo):
+        self.items[todo.id] = todo
+        return todo
+
+    def delete(self, todo_id):
+        return self.items.pop(todo_id, None) is not None
+
+
+def test_minimal_repository_gets_default_capabilities():
+    service = TodoService(DictRepo())
+    now = utc_now()
+    for i, (prio, tenant) in enumerate([("low", "t1"), ("urgent", "t1"), ("high", "t2")]):
+        service.create(Todo(id=f"m{i}", title="t", priority=prio, tags=["x"], dueDate=now, tenantId=tenant, createdAt=now, updatedAt=now))
+    assert [t.id for t in service.list(order=[("priority", True)], limit=2)] == ["m1", "m2"]
+    assert service.get_many(["m0", "zz"]) == ([service.get("m0")], ["zz"])
+    assert service.complete("m0").completed and len(service.due(completed=True)) == 1
+    assert service.tags() == [{"tag": "x", "open": 2, "completed": 1}]
+    scoped = service.for_scope(PartitionScope(tenant_id="t2"))
+    assert [t.id for t in scoped.list()] == ["m2"] and scoped.get("m0") is None
+    assert service.delete("m1") and service.tags() == [{"tag": "x", "open": 1, "completed": 1}]
+
+
+
+@pytest.mark.asyncio
+async def test_duck_typed_repository_supports_patch_and_delete():
+    main.set_repo(DictRepo())
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        await ac.post("/api/todos", json={"id": "duck", "title": "d", "priority": "low"})
+        assert (await ac.patch("/api/todos/duck/complete")).json()["completed"] is True
+        assert (await ac.delete("/api/todos/duck")).status_code == 204
+    main.reset_readiness()
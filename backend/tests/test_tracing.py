@@ -0,0 +1,104 @@
+import json
+import pytest
+from types import SimpleNamespace
+from httpx import AsyncClient
+import main
+from infrastructure.http.tracing import KIND_CLIENT, Tracer, TracingMiddleware, parse_traceparent
+from infrastructure.http.trace_export import BatchSpanProcessor, FileSpanExporter
+from infrastructure.repositories.cosmos_todo_repository import CosmosTodoRepository, request_charge_hook
+
+PARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+class Recorder:
+    def __init__(self):
+        self.spans = []
+
+    def submit(self, spans):
+        self.spans.extend(spans)
+
+    def shutdown(self):
+        pass
+
+
+def _traced_app(monkeypatch, tracer):
+    monkeypatch.setattr(main, "tracer", tracer)
+    main.reset_readiness()  # 差し替えた tracer でサービスを作り直す
+    return TracingMiddleware(main.app, tracer)
+
+
+@pytest.mark.asyncio
+async def test_spans_follow_traceparent_through_service_and_repository(monkeypatch, tmp_path):
+    processor = BatchSpanProcessor([FileSpanExporter(str(tmp_path / "spans.ndjson"))], interval=60)
+    app = _traced_app(monkeypatch, Tracer(processor, sample_rate=1.0))
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.post("/api/todos", json={"id": "tr1", "title": "t", "priority": "low"}, headers={"traceparent": PARENT})
+        await ac.get("/api/todos/tr1")
+    processor.shutdown()
+    monkeypatch.undo()
+    main.reset_readiness()
+
+    [line] = (tmp_path / "spans.ndjson").read_text().splitlines()
+    spans = json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    by_name = {s["name"]: s for s in spans}
+    root = by_name["POST /api/todos"]
+    assert root["traceId"] == "4bf92f3577b34da6a3ce929d0e0e4736" and root["parentSpanId"] == "00f067aa0ba902b7"
+    assert by_name["validate CreateTodo"]["parentSpanId"] == root["spanId"]
+    create = by_name["TodoService.create"]
+    add = by_name["InMemoryTodoRepository.add"]
+    assert create["parentSpanId"] == root["spanId"] and add["parentSpanId"] == create["spanId"]
+    assert add["kind"] == KIND_CLIENT
+    get = by_name["GET /api/todos/{todo_id}"]
+    assert get["traceId"] != root["traceId"]
+    assert {"key": "todo.count", "value": {"intValue": "1"}} in by_name["TodoService.get"]["attributes"]
+
+
+@pytest.mark.asyncio
+async def test_tail_sampling_keeps_sampled_and_slow_traces_only(monkeypatch):
+    recorder = Recorder()
+    tracer = Tracer(recorder, sample_rate=0.0, slow_ms=10_000)
+    app = _traced_app(monkeypatch, tracer)
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.get("/api/todos")
+        await ac.get("/api/todos", headers={"traceparent": PARENT})
+        tracer.slow_ms = 0
+        await ac.get("/api/tags")
+    monkeypatch.undo()
+    main.reset_readiness()
+    assert (tracer.kept, tracer.dropped) == (2, 1)
+    assert {s.name for s in recorder.spans if s.is_root} == {"GET /api/todos", "GET /api/tags"}
+    assert parse_traceparent(b"00-" + b"0" * 32 + b"-00f067aa0ba902b7-01") is None
+
+
+class ChargingContainer:
+    """応答ごとに raw_response_hook 相当で RU を積算するフェイクコンテナ。"""
+
+    def __init__(self):
+        self.docs = []
+
+    def _charge(self, ru):
+        request_charge_hook(SimpleNamespace(http_response=SimpleNamespace(headers={"x-ms-request-charge": str(ru)})))
+
+    def create_item(self, body):
+        self._charge(6.5)
+        self.docs.append(body)
+
+    def query_items(self, query, parameters=None, **kwargs):
+        self._charge(2.5)
+        self._charge(1.0)  # 2 ページ目
+        return list(self.docs)
+
+
+@pytest.mark.asyncio
+async def test_repository_spans_carry_cosmos_request_charge(monkeypatch):
+    recorder = Recorder()
+    app = _traced_app(monkeypatch, Tracer(recorder, sample_rate=1.0))
+    main.set_repo(CosmosTodoRepository(ChargingContainer()))
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        await ac.post("/api/todos", json={"id": "ru1", "title": "t", "priority": "low"})
+        await ac.get("/api/todos")
+    monkeypatch.undo()
+    main.reset_readiness()
+    repo_spans = {s.name: s.attributes for s in recorder.spans if s.name.startswith("CosmosTodoRepository.")}
+    assert repo_spans["CosmosTodoRepository.add"]["db.cosmos.request_charge"] == 6.5
+    assert repo_spans["CosmosTodoRepository.list"] == {"todo.count": 1, "db.cosmos.request_charge": 3.5}
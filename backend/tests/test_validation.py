@@ -93,3 +93,16 @@ async def test_create_todo_priority_all_patterns(priority):
         resp = await ac.post("/api/todos", json=payload)
     assert resp.status_code == 201
     assert resp.json()["priority"] == priority
+
+
+@pytest.mark.asyncio
+async def test_create_todo_malformed_json_returns_422_and_ignores_server_fields():
+    """JSON 不正は 422 validation_error。completed / createdAt はクライアント指定を無視してサーバ生成。"""
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        bad = await ac.post("/api/todos", content=b'{"title": ', headers={"Content-Type": "application/json"})
+        ok = await ac.post("/api/todos", json={"title": "t", "priority": "low", "completed": True, "createdAt": "2000-01-01T00:00:00Z"})
+    assert bad.status_code == 422
+    assert bad.json()["detail"]["errors"][0]["errorType"] == "json_invalid"
+    assert ok.status_code == 201
+    body = ok.json()
+    assert body["completed"] is False and body["createdAt"] == body["updatedAt"] and len(body["id"]) == 36
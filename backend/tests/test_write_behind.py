@@ -0,0 +1,117 @@
+import time
+import pytest
+from httpx import AsyncClient
+import main
+from application.services.todo_service import TodoService
+from domain.models.todo import Todo, utc_now
+from infrastructure.repositories.in_memory_todo_repository import InMemoryTodoRepository
+from infrastructure.repositories.write_behind import WriteBehindBuffer
+
+
+class CountingRepo(InMemoryTodoRepository):
+    def __init__(self):
+        super().__init__()
+        self.saves = 0
+
+    def save(self, todo):
+        self.saves += 1
+        return super().save(todo)
+
+
+def _todo(todo_id, priority="low"):
+    now = utc_now()
+    return Todo(id=todo_id, title=todo_id, priority=priority, completed=False, createdAt=now, updatedAt=now)
+
+
+def test_burst_of_toggles_is_one_write_and_reads_see_pending_state():
+    base = CountingRepo()
+    base.add(_todo("w1"))
+    buffer = WriteBehindBuffer(window=60, max_delay=60)
+    service = TodoService(buffer.wrap(base))
+    for _ in range(5):
+        service.complete("w1")
+        service.reopen("w1")
+    service.complete("w1")
+    assert base.saves == 0 and base.get("w1").completed is False
+    assert service.get("w1").completed is True
+    assert [t.completed for t in service.list()] == [True]
+    assert buffer.flush() == 1
+    assert base.saves == 1 and base.get("w1").completed is True
+    assert (buffer.buffered, buffer.flushed) == (11, 1)
+
+
+def test_window_and_max_items_bound_the_buffer():
+    base = CountingRepo()
+    for i in range(3):
+        base.add(_todo(f"b{i}"))
+    buffer = WriteBehindBuffer(window=60, max_delay=60, max_items=2)
+    service = TodoService(buffer.wrap(base))
+    for i in range(3):
+        service.complete(f"b{i}")
+    assert base.saves == 1 and base.get("b0").completed is True  # 上限超過分 (最も古い) は即時保存
+    assert buffer.pending_count == 2
+
+    buffer.window = buffer.max_delay = 0.01  # 期限切れはバックグラウンドで保存
+    service.update_partial("b1", title="edited")
+    deadline = time.monotonic() + 5
+    while buffer.pending_count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    buffer.close()
+    assert base.get("b1").title == "edited" and base.get("b2").completed is True
+    assert buffer.pending_count == 0
+
+
+def test_sorted_list_includes_pending_changes_that_move_into_top_n():
+    base = CountingRepo()
+    for i, p in enumerate(["high", "normal", "low", "low"]):
+        base.add(_todo(f"s{i}", p))
+    buffer = WriteBehindBuffer(window=60, max_delay=60)
+    service = TodoService(buffer.wrap(base))
+    service.update_partial("s3", priority="urgent")
+    service.update_partial("s0", priority="low")
+    top = service.list(order=[("priority", True)], limit=2)
+    assert [t.id for t in top] == ["s3", "s1"]
+    assert service.delete("s3") and base.get("s3") is None
+    buffer.close()
+    assert base.saves == 1  # s3 の保留分は削除で破棄
+
+
+def test_delete_during_update_read_is_not_undone_by_flush():
+    class DeletingRepo(CountingRepo):
+        """基底からの読み取り直後に別リクエストの DELETE が割り込む。"""
+        def get(self, todo_id):
+            todo = super().get(todo_id)
+            if todo_id == "r1" and not deleted:
+                deleted.append(service.delete(todo_id))
+            return todo
+
+    deleted = []
+    base = DeletingRepo()
+    base.add(_todo("r1"))
+    buffer = WriteBehindBuffer(window=60, max_delay=60)
+    service = TodoService(buffer.wrap(base))
+    assert service.complete("r1") is None
+    assert deleted == [True] and buffer.pending_count == 0
+    buffer.close()
+    assert base.get("r1") is None and base.saves == 0
+    # 墓標は読み取りの終了で消え、同じ id の再作成後は通常どおり保留される
+    service.create(_todo("r1"))
+    assert service.complete("r1").completed is True
+
+
+@pytest.mark.asyncio
+async def test_api_toggles_are_buffered_and_flushed_on_repo_swap(monkeypatch):
+    buffer = WriteBehindBuffer(window=60, max_delay=60)
+    monkeypatch.setattr(main, "write_behind", buffer)
+    base = CountingRepo()
+    main.set_repo(base)
+    async with AsyncClient(app=main.app, base_url="http://test") as ac:
+        await ac.post("/api/todos", json={"id": "a1", "title": "t", "priority": "low"})
+        for action in ["complete", "reopen", "complete"]:
+            assert (await ac.patch(f"/api/todos/a1/{action}")).status_code == 200
+        assert (await ac.get("/api/todos/a1")).json()["completed"] is True
+    assert base.saves == 0
+    main.reset_readiness()
+    assert base.saves == 1 and base.get("a1").completed is True
+    monkeypatch.undo()
+    main.reset_readiness()
@@ -0,0 +1,47 @@
+"""既存の Todos コンテナのドキュメントを現在の保存形式へ書き直す。
+
+日時を UTC の ISO 文字列へ正規化し (期限範囲クエリ / 並び替えの文字列比較用)、priorityRank が無いドキュメントへ付与する。
+接続情報は API と同じ環境変数 (COSMOS_CONNECTION_STRING または COSMOS_ENDPOINT + COSMOS_KEY, COSMOS_DATABASE) を利用。
+形式が一致するドキュメントは書き込まないため、中断後の再実行でも続きから処理できる。
+
+実行例:
+    cd backend
+    python tools/backfill_documents.py --container Todos --dry-run
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from azure.cosmos import CosmosClient  # noqa: E402
+from infrastructure.repositories.partition_migration import backfill_documents  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--container", default=os.getenv("COSMOS_CONTAINER", "Todos"))
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    conn_str = os.getenv("COSMOS_CONNECTION_STRING")
+    if conn_str:
+        client = CosmosClient.from_connection_string(conn_str)
+    else:
+        client = CosmosClient(os.environ["COSMOS_ENDPOINT"], credential=os.environ["COSMOS_KEY"])
+    container = client.get_database_client(os.getenv("COSMOS_DATABASE", "TodoApp")).get_container_client(args.container)
+
+    t0 = time.perf_counter()
+    stats = backfill_documents(
+        container, dry_run=args.dry_run,
+        progress=lambda s: print(f"  read={s['read']} written={s['written']} skipped={s['skipped']}", flush=True),
+    )
+    elapsed = time.perf_counter() - t0
+    print(f"done: read={stats['read']} written={stats['written']} skipped={stats['skipped']} ({elapsed:.1f}s)"
+          + (" [dry-run]" if args.dry_run else ""))
+
+
+if __name__ == "__main__":
+    main()
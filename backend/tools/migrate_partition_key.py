@@ -0,0 +1,64 @@
+"""既存の Todos コンテナを新しいパーティションキー (テナント / 階層キー) のコンテナへ移行する。
+
+接続情報は API と同じ環境変数 (COSMOS_CONNECTION_STRING または COSMOS_ENDPOINT + COSMOS_KEY, COSMOS_DATABASE) を利用。
+移行先コンテナは存在しなければ指定キーで作成する。upsert のため中断後の再実行で続きから移行できる。
+
+実行例:
+    cd backend
+    python tools/migrate_partition_key.py --source Todos --target TodosByTenant \\
+        --partition-key /tenantId,/userId --default-tenant default --default-user default
+移行後は COSMOS_CONTAINER=TodosByTenant / COSMOS_PARTITION_KEY=/tenantId,/userId で API を起動する。
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from azure.cosmos import CosmosClient, PartitionKey  # noqa: E402
+from infrastructure.repositories.cosmos_todo_repository import parse_partition_key_paths  # noqa: E402
+from infrastructure.repositories.partition_migration import migrate_container  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", default=os.getenv("COSMOS_CONTAINER", "Todos"))
+    parser.add_argument("--target", required=True)
+    parser.add_argument("--partition-key", default="/tenantId,/userId", help="例: /tenantId または /tenantId,/userId")
+    parser.add_argument("--default-tenant", default=None, help="tenantId 未設定ドキュメントへの補完値")
+    parser.add_argument("--default-user", default=None, help="userId 未設定ドキュメントへの補完値")
+    parser.add_argument("--throughput", type=int, default=400)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    paths = parse_partition_key_paths(args.partition_key)
+    conn_str = os.getenv("COSMOS_CONNECTION_STRING")
+    if conn_str:
+        client = CosmosClient.from_connection_string(conn_str)
+    else:
+        client = CosmosClient(os.environ["COSMOS_ENDPOINT"], credential=os.environ["COSMOS_KEY"])
+    db = client.get_database_client(os.getenv("COSMOS_DATABASE", "TodoApp"))
+    source = db.get_container_client(args.source)
+    target = None
+    if not args.dry_run:
+        target = db.create_container_if_not_exists(
+            id=args.target,
+            partition_key=PartitionKey(path=paths[0]) if len(paths) == 1 else PartitionKey(path=paths, kind="MultiHash"),
+            offer_throughput=args.throughput,
+        )
+
+    t0 = time.perf_counter()
+    stats = migrate_container(
+        source, target, paths,
+        default_tenant=args.default_tenant, default_user=args.default_user, dry_run=args.dry_run,
+        progress=lambda s: print(f"  read={s['read']} written={s['written']} skipped={s['skipped']}", flush=True),
+    )
+    elapsed = time.perf_counter() - t0
+    print(f"done: read={stats['read']} written={stats['written']} skipped={stats['skipped']} ({elapsed:.1f}s)"
+          + (" [dry-run]" if args.dry_run else ""))
+
+
+if __name__ == "__main__":
+    main()
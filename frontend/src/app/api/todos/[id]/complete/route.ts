@@ -1,24 +1,14 @@
 import { NextRequest } from 'next/server'
+import { traceHeaders } from '@/lib/traceContext'
+import { scopeHeaders, sessionHeader, upstream } from '@/lib/upstream'
 const backend = process.env.BACKEND_API_BASE || 'http://localhost:80'
 
-async function forward(r: Response) {
-  if (r.status === 204 || r.status === 304) {
-    return new Response(null, { status: r.status })
-  }
-  const text = await r.text()
-  const headers = new Headers()
-  const ct = r.headers.get('content-type')
-  if (ct && text) headers.set('Content-Type', ct)
-  return new Response(text, { status: r.status, headers })
-}
-
 type UpstreamError = { detail: { type: string; backend: string; id: string; message?: string } }
 
-export async function PATCH(_: NextRequest, context: { params: Promise<{ id: string }> }) {
+export async function PATCH(req: NextRequest, context: { params: Promise<{ id: string }> }) {
   const { id } = await context.params
   try {
-    const r = await fetch(`${backend}/api/todos/${id}/complete`, { method: 'PATCH' })
-    return forward(r)
+    return await upstream(`${backend}/api/todos/${id}/complete`, { method: 'PATCH', headers: { ...traceHeaders(req.headers), ...sessionHeader(req.headers), ...scopeHeaders(req.headers) }, acceptEncoding: req.headers.get('accept-encoding') })
   } catch (e: unknown) {
     const message = e instanceof Error ? e.message : 'Unknown error'
     console.error('[proxy][PATCH /api/todos/:id/complete] upstream error', backend, id, message)
@@ -1,27 +1,19 @@
 import { NextRequest } from 'next/server'
+import { traceHeaders } from '@/lib/traceContext'
+import { scopeHeaders, sessionHeader, upstream } from '@/lib/upstream'
 
 const backend = process.env.BACKEND_API_BASE || 'http://localhost:80'
 
-async function forward(r: Response) {
-  // 204 / 304 ではボディを返さない (Edge/Node ランタイムでエラー回避)
-  if (r.status === 204 || r.status === 304) {
-    return new Response(null, { status: r.status })
-  }
-  const text = await r.text()
-  const headers = new Headers()
-  const ct = r.headers.get('content-type')
-  if (ct && text) headers.set('Content-Type', ct)
-  return new Response(text, { status: r.status, headers })
-}
-
 type UpstreamError = { detail: { type: string; backend: string; id?: string; message?: string } }
 
 export async function PATCH(req: NextRequest, context: { params: Promise<{ id: string }> }) {
   const { id } = await context.params
   const body = await req.text()
   try {
-    const r = await fetch(`${backend}/api/todos/${id}`, { method: 'PATCH', body, headers: { 'Content-Type': 'application/json' } })
-    return forward(r)
+    const headers: Record<string, string> = { 'Content-Type': 'application/json', ...traceHeaders(req.headers), ...sessionHeader(req.headers), ...scopeHeaders(req.headers) }
+    const key = req.headers.get('idempotency-key')
+    if (key) headers['Idempotency-Key'] = key
+    return await upstream(`${backend}/api/todos/${id}`, { method: 'PATCH', body, headers, acceptEncoding: req.headers.get('accept-encoding') })
   } catch (e: unknown) {
     const message = e instanceof Error ? e.message : 'Unknown error'
     console.error('[proxy][PATCH /api/todos/:id] upstream error', backend, id, message)
@@ -30,11 +22,10 @@ export async function PATCH(req: NextRequest, context: { params: Promise<{ id: s
   }
 }
 
-export async function DELETE(_: NextRequest, context: { params: Promise<{ id: string }> }) {
+export async function DELETE(req: NextRequest, context: { params: Promise<{ id: string }> }) {
   const { id } = await context.params
   try {
-    const r = await fetch(`${backend}/api/todos/${id}`, { method: 'DELETE' })
-    return forward(r)
+    return await upstream(`${backend}/api/todos/${id}`, { method: 'DELETE', headers: { ...traceHeaders(req.headers), ...sessionHeader(req.headers), ...scopeHeaders(req.headers) } })
   } catch (e: unknown) {
     const message = e instanceof Error ? e.message : 'Unknown error'
     console.error('[proxy][DELETE /api/todos/:id] upstream error', backend, id, message)
@@ -1,25 +1,16 @@
 import { NextRequest } from 'next/server'
+import { traceHeaders } from '@/lib/traceContext'
+import { scopeHeaders, sessionHeader, upstream } from '@/lib/upstream'
 
 // プロキシ先 FastAPI ベース URL (例: http://localhost:8000)
 const backend = process.env.BACKEND_API_BASE || 'http://localhost:80'
 
-async function forward(r: Response) {
-  if (r.status === 204 || r.status === 304) {
-    return new Response(null, { status: r.status })
-  }
-  const bodyText = await r.text()
-  const headers = new Headers()
-  const ct = r.headers.get('content-type')
-  if (ct && bodyText) headers.set('Content-Type', ct)
-  return new Response(bodyText, { status: r.status, headers })
-}
-
 type UpstreamErrorPayload = { detail: { type: string; backend: string; message?: string; [k: string]: unknown } }
 
-export async function GET() {
+export async function GET(req: NextRequest) {
   try {
-    const r = await fetch(`${backend}/api/todos`)
-    return forward(r)
+    // sort / limit / ids などのクエリはそのまま中継。圧縮済みボディも展開せずにストリームで返す
+    return await upstream(`${backend}/api/todos${req.nextUrl.search}`, { headers: { ...traceHeaders(req.headers), ...sessionHeader(req.headers), ...scopeHeaders(req.headers) }, acceptEncoding: req.headers.get('accept-encoding') })
   } catch (e: unknown) {
     const message = e instanceof Error ? e.message : 'Unknown error'
     console.error('[proxy][GET /api/todos] upstream error', backend, message)
@@ -31,12 +22,16 @@ export async function GET() {
 export async function POST(req: NextRequest) {
   const body = await req.text()
   try {
-    const r = await fetch(`${backend}/api/todos`, {
+    const headers: Record<string, string> = { 'Content-Type': 'application/json', ...traceHeaders(req.headers), ...sessionHeader(req.headers), ...scopeHeaders(req.headers) }
+    // 再送時に重複作成されないよう Idempotency-Key を中継
+    const key = req.headers.get('idempotency-key')
+    if (key) headers['Idempotency-Key'] = key
+    return await upstream(`${backend}/api/todos`, {
       method: 'POST',
       body,
-      headers: { 'Content-Type': 'application/json' }
+      headers,
+      acceptEncoding: req.headers.get('accept-encoding')
     })
-    return forward(r)
   } catch (e: unknown) {
     const message = e instanceof Error ? e.message : 'Unknown error'
     console.error('[proxy][POST /api/todos] upstream error', backend, message)
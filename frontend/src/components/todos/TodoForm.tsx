@@ -4,8 +4,9 @@ import { useForm } from 'react-hook-form'
 import { zodResolver } from '@hookform/resolvers/zod'
 import { z } from 'zod'
 import { createTodo, updateTodo } from '@/lib/api/todos'
+import { newIdempotencyKey } from '@/lib/api/client'
 import type { Todo } from '@/lib/api/types'
-import { useState } from 'react'
+import { useRef, useState } from 'react'
 
 const schema = z.object({
   title: z.string().min(1, 'Title is required').max(200),
@@ -36,6 +37,8 @@ export function TodoForm({ mode, initial, onDone }: Props) {
     } : { title: '', priority: 'normal', description: '', dueDate: '', tags: '' }
   })
   const [submitting, setSubmitting] = useState(false)
+  // 同じ内容の再送信 (失敗後のやり直し) には同じ Idempotency-Key を使い、内容が変わったら新しいキーにする
+  const pendingKey = useRef<{ body: string; key?: string } | null>(null)
 
   const onSubmit = handleSubmit(async (values) => {
     setSubmitting(true)
@@ -51,12 +54,16 @@ export function TodoForm({ mode, initial, onDone }: Props) {
             return arr.length ? arr : undefined
         })()
       }
+      const body = JSON.stringify(payload)
+      if (pendingKey.current?.body !== body) pendingKey.current = { body, key: newIdempotencyKey() }
+      const key = pendingKey.current.key
       if (mode === 'create') {
-        await createTodo(payload)
+        await createTodo(payload, key)
         reset({ title: '', description: '', priority: 'normal', dueDate: '', tags: '' })
       } else if (initial) {
-        await updateTodo(initial.id, payload)
+        await updateTodo(initial.id, payload, key)
       }
+      pendingKey.current = null
       onDone()
     } catch (e: unknown) {
       const err = e as { detail?: { type?: string; errors?: Array<{ field?: string; message?: string; errorType?: string }> } }
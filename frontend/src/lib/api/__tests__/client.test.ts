@@ -50,3 +50,44 @@ describe('apiClient', () => {
     await expect(apiClient.get('/api/bad')).rejects.toMatchObject({ detail: { type: 'bad_request' } })
   })
 })
+
+describe('apiClient session token', () => {
+  it('sends the last X-Session-Token received on later requests', async () => {
+    vi.resetModules()
+    const seen: Array<string | undefined> = []
+    global.fetch = vi.fn(async (_url: any, init?: any) => {
+      seen.push(init?.headers?.['X-Session-Token'])
+      return new Response(JSON.stringify({}), {
+        status: 200,
+        headers: { 'Content-Type': 'application/json', 'X-Session-Token': `0:-1#${seen.length}` }
+      }) as any
+    })
+    const { apiClient } = await import('../client')
+    await apiClient.post('/api/todos', { title: 'x' })
+    await apiClient.get('/api/todos')
+    await apiClient.get('/api/todos')
+    expect(seen).toEqual([undefined, '0:-1#1', '0:-1#2'])
+    global.fetch = originalFetch
+  })
+})
+
+describe('apiClient idempotency key', () => {
+  it('retries a transient failure with the same Idempotency-Key', async () => {
+    vi.resetModules()
+    const keys: Array<string | undefined> = []
+    let n = 0
+    global.fetch = vi.fn(async (_url: any, init?: any) => {
+      keys.push(init?.headers?.['Idempotency-Key'])
+      n++
+      if (n === 1) throw new TypeError('network down')
+      return new Response(JSON.stringify({ ok: true }), { status: n === 2 ? 503 : 201 }) as any
+    })
+    const { apiClient } = await import('../client')
+    await apiClient.post('/api/todos', { title: 'x' }, 'key-1')
+    await apiClient.post('/api/todos', { title: 'y' })
+    expect(keys.slice(0, 3)).toEqual(['key-1', 'key-1', 'key-1'])
+    expect(keys[3]).toBeDefined()
+    expect(keys[3]).not.toBe('key-1')
+    global.fetch = originalFetch
+  })
+})
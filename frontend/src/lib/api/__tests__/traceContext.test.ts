@@ -0,0 +1,27 @@
+import { describe, it, expect } from 'vitest'
+import { traceHeaders } from '../../traceContext'
+
+describe('traceHeaders', () => {
+  it('keeps trace-id / flags and issues a new parent-id for the proxy hop', () => {
+    const incoming = new Headers({
+      traceparent: '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01',
+      tracestate: 'vendor=x'
+    })
+    const h = traceHeaders(incoming)
+    const [version, traceId, parentId, flags] = h.traceparent.split('-')
+    expect(version).toBe('00')
+    expect(traceId).toBe('4bf92f3577b34da6a3ce929d0e0e4736')
+    expect(parentId).toMatch(/^[0-9a-f]{16}$/)
+    expect(parentId).not.toBe('00f067aa0ba902b7')
+    expect(flags).toBe('01')
+    expect(h.tracestate).toBe('vendor=x')
+  })
+
+  it('starts a new unsampled trace when the header is missing or invalid', () => {
+    for (const incoming of [new Headers(), new Headers({ traceparent: '00-' + '0'.repeat(32) + '-00f067aa0ba902b7-01' })]) {
+      const h = traceHeaders(incoming)
+      expect(h.traceparent).toMatch(/^00-[0-9a-f]{32}-[0-9a-f]{16}-00$/)
+      expect(h.tracestate).toBeUndefined()
+    }
+  })
+})
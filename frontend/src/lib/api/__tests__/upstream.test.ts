@@ -0,0 +1,20 @@
+import { describe, it, expect } from 'vitest'
+import { scopeHeaders } from '../../upstream'
+
+describe('scopeHeaders', () => {
+  it('ignores scope headers sent by the browser', () => {
+    expect(scopeHeaders(new Headers({ 'x-tenant-id': 'other', 'x-user-id': 'someone' }))).toEqual({})
+  })
+
+  it('derives user and tenant from the authenticated principal', () => {
+    const principal = Buffer.from(JSON.stringify({
+      claims: [{ typ: 'http://schemas.microsoft.com/identity/claims/tenantid', val: 'tenant-1' }]
+    })).toString('base64')
+    const incoming = new Headers({
+      'x-ms-client-principal-id': 'user-1',
+      'x-ms-client-principal': principal,
+      'x-tenant-id': 'other'
+    })
+    expect(scopeHeaders(incoming)).toEqual({ 'X-User-Id': 'user-1', 'X-Tenant-Id': 'tenant-1' })
+  })
+})
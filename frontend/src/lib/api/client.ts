@@ -9,18 +9,48 @@ if (process.env.NODE_ENV !== 'production') {
   console.log('[api] baseUrl (relative)')
 }
 
+// 最後に受け取った Cosmos セッショントークン。以降のリクエストに付けると、自分の書き込みが必ず読める (read-your-writes)
+let sessionToken: string | null = null
+
+// 一時的な失敗 (ネットワーク断 / 502・503・504) の再送。
+// POST / PATCH は初回と同じ Idempotency-Key のまま再送するため、サーバで適用済みでも二重に反映されない
+const MAX_ATTEMPTS = 3
+const RETRYABLE_STATUS = new Set([502, 503, 504])
+
+function canRetry(init?: RequestInit): boolean {
+  const method = (init?.method || 'GET').toUpperCase()
+  const headers = (init?.headers || {}) as Record<string, string>
+  return method === 'GET' || 'Idempotency-Key' in headers
+}
+
+async function send(url: string, init: RequestInit | undefined): Promise<Response> {
+  const retry = canRetry(init)
+  for (let attempt = 1; ; attempt++) {
+    try {
+      const res = await fetch(url, {
+        ...init,
+        headers: {
+          'Content-Type': 'application/json',
+          ...(sessionToken ? { 'X-Session-Token': sessionToken } : {}),
+          ...(init?.headers || {})
+        }
+      })
+      if (!retry || attempt >= MAX_ATTEMPTS || !RETRYABLE_STATUS.has(res.status)) return res
+    } catch (e) {
+      if (!retry || attempt >= MAX_ATTEMPTS || !(e instanceof TypeError)) throw e
+    }
+    await new Promise(resolve => setTimeout(resolve, 100 * 2 ** (attempt - 1)))
+  }
+}
+
 async function request<T>(path: string, init?: RequestInit): Promise<T> {
   const url = baseUrl + path
   if (process.env.NODE_ENV !== 'production') {
     console.log('[api] request', url, init?.method || 'GET')
   }
-  const res = await fetch(url, {
-    ...init,
-    headers: {
-      'Content-Type': 'application/json',
-      ...(init?.headers || {})
-    }
-  })
+  const res = await send(url, init)
+  const token = res.headers.get('x-session-token')
+  if (token) sessionToken = token
   if (!res.ok) {
     let body: unknown
     try { body = await res.json() } catch { /* ignore */ }
@@ -31,9 +61,21 @@ async function request<T>(path: string, init?: RequestInit): Promise<T> {
   return res.json() as Promise<T>
 }
 
+// 論理的な 1 操作 (フォーム送信 / 完了切り替え) ごとに 1 つ発行する。同じ操作のやり直しには同じキーを渡す
+export function newIdempotencyKey(): string | undefined {
+  return typeof crypto !== 'undefined' && 'randomUUID' in crypto ? crypto.randomUUID() : undefined
+}
+
+function idempotencyHeader(key: string | undefined): Record<string, string> {
+  return key ? { 'Idempotency-Key': key } : {}
+}
+
 export const apiClient = {
   get: <T>(path: string) => request<T>(path),
-  post: <T>(path: string, data: unknown) => request<T>(path, { method: 'POST', body: JSON.stringify(data) }),
-  patch: <T>(path: string, data?: unknown) => request<T>(path, { method: 'PATCH', body: data ? JSON.stringify(data) : undefined }),
+  // POST / PATCH は Idempotency-Key を付与 (省略時は呼び出しごとに発行)。内部の再送と、同じキーを渡したやり直しはサーバ側で初回レスポンスを再生
+  post: <T>(path: string, data: unknown, idempotencyKey = newIdempotencyKey()) =>
+    request<T>(path, { method: 'POST', body: JSON.stringify(data), headers: idempotencyHeader(idempotencyKey) }),
+  patch: <T>(path: string, data?: unknown, idempotencyKey = newIdempotencyKey()) =>
+    request<T>(path, { method: 'PATCH', body: data ? JSON.stringify(data) : undefined, headers: idempotencyHeader(idempotencyKey) }),
   delete: (path: string) => request<void>(path, { method: 'DELETE' })
 }
@@ -9,8 +9,15 @@ export function useTodos() {
   return { todos: data, error, isLoading }
 }
 
-export async function createTodo(input: Partial<Todo> & { title: string }) {
-  const created = await apiClient.post<Todo>('/api/todos', input)
+// 複数 ID の一括取得 (1 リクエスト)。items は要求順、missing は見つからなかった id
+export async function getTodosByIds(ids: string[]) {
+  const q = encodeURIComponent(ids.join(','))
+  return apiClient.get<{ items: Todo[]; missing: string[] }>(`/api/todos?ids=${q}`)
+}
+
+// idempotencyKey: 同じ送信をやり直す場合は初回と同じキーを渡す (サーバが重複作成せず初回の結果を返す)
+export async function createTodo(input: Partial<Todo> & { title: string }, idempotencyKey?: string) {
+  const created = await apiClient.post<Todo>('/api/todos', input, idempotencyKey)
   // 追加: 既存リストへ prepend
   mutate(KEY, (prev?: Todo[]) => prev ? [created, ...prev] : [created], { revalidate: false })
   return created
@@ -30,11 +37,11 @@ export async function toggleComplete(id: string, toCompleted: boolean) {
   }
 }
 
-export async function updateTodo(id: string, patch: Partial<Pick<Todo, 'title' | 'description' | 'priority' | 'dueDate' | 'tags'>>) {
+export async function updateTodo(id: string, patch: Partial<Pick<Todo, 'title' | 'description' | 'priority' | 'dueDate' | 'tags'>>, idempotencyKey?: string) {
   // 楽観的適用
   mutate(KEY, (prev?: Todo[]) => prev?.map(t => t.id === id ? { ...t, ...patch, updatedAt: new Date().toISOString() } : t), { revalidate: false })
   try {
-    const updated = await apiClient.patch<Todo>(`/api/todos/${id}`, patch)
+    const updated = await apiClient.patch<Todo>(`/api/todos/${id}`, patch, idempotencyKey)
     mutate(KEY, (p?: Todo[]) => p?.map(t => t.id === id ? updated : t), { revalidate: false })
     return updated
   } catch (e) {
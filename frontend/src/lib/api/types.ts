@@ -15,6 +15,8 @@ export interface components {
       completed: boolean;
       createdAt: string;
       updatedAt: string;
+      tenantId?: string | null;
+      userId?: string | null;
     };
   };
 }
@@ -0,0 +1,26 @@
+// W3C Trace Context (traceparent / tracestate) の中継。
+// プロキシ自身を 1 ホップとして新しい parent-id を採番し、trace-id / sampled フラグは受信値を引き継ぐ。
+// 受信ヘッダが無い・不正な場合は新しい trace-id で開始する (sampled=00: 採否はバックエンドの tail sampling に任せる)。
+
+const TRACEPARENT = /^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$/
+
+function randomHex(bytes: number): string {
+  const buf = new Uint8Array(bytes)
+  crypto.getRandomValues(buf)
+  return Array.from(buf, b => b.toString(16).padStart(2, '0')).join('')
+}
+
+function nonZero(hex: string): boolean {
+  return /[^0]/.test(hex)
+}
+
+export function traceHeaders(incoming: Headers): Record<string, string> {
+  const m = TRACEPARENT.exec(incoming.get('traceparent')?.trim().toLowerCase() ?? '')
+  const valid = m !== null && nonZero(m[1]) && nonZero(m[2])
+  const traceId = valid ? m![1] : randomHex(16)
+  const flags = valid ? m![3] : '00'
+  const headers: Record<string, string> = { traceparent: `00-${traceId}-${randomHex(8)}-${flags}` }
+  const state = incoming.get('tracestate')
+  if (valid && state) headers.tracestate = state
+  return headers
+}
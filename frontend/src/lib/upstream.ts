@@ -0,0 +1,79 @@
+import http from 'node:http'
+import https from 'node:https'
+import { Readable } from 'node:stream'
+
+// FastAPI への中継 (圧縮済みボディの素通し)。
+// fetch (undici) は Content-Encoding を自動で展開するため、プロキシで展開 → 再圧縮 (または無圧縮で送出) になってしまう。
+// node:http でブラウザの Accept-Encoding をそのまま渡し、圧縮されたバイト列をストリームのまま返す。
+
+// そのまま返すレスポンスヘッダ (hop-by-hop ヘッダは除外)
+const PASS_HEADERS = ['content-type', 'content-encoding', 'content-length', 'vary', 'retry-after', 'idempotency-replayed', 'x-profile-id', 'x-session-token']
+
+export type UpstreamInit = {
+  method?: string
+  headers?: Record<string, string>
+  body?: string
+  acceptEncoding?: string | null
+}
+
+// クライアントの X-Session-Token (Cosmos セッショントークン) を中継するヘッダ
+export function sessionHeader(incoming: Headers): Record<string, string> {
+  const token = incoming.get('x-session-token')
+  return token ? { 'X-Session-Token': token } : {}
+}
+
+// テナント / ユーザー範囲 (X-Tenant-Id / X-User-Id) を中継するヘッダ。範囲指定があれば API 側は単一パーティションで処理する。
+// 範囲は認証済みプリンシパルからのみ導出し、ブラウザが送った X-Tenant-Id / X-User-Id は中継しない (API はヘッダをそのまま信頼するため)。
+// App Service / Container Apps の組み込み認証 (Easy Auth) が付与する X-MS-CLIENT-PRINCIPAL-ID をユーザー ID、
+// X-MS-CLIENT-PRINCIPAL (base64 JSON) の tenantid クレームをテナント ID とする (クライアントからの同名ヘッダは前段で除去される)
+const TENANT_CLAIMS = ['http://schemas.microsoft.com/identity/claims/tenantid', 'tid']
+
+function principalTenant(incoming: Headers): string | null {
+  const raw = incoming.get('x-ms-client-principal')
+  if (!raw) return null
+  try {
+    const principal = JSON.parse(Buffer.from(raw, 'base64').toString('utf8')) as { claims?: Array<{ typ: string; val: string }> }
+    return principal.claims?.find(c => TENANT_CLAIMS.includes(c.typ))?.val ?? null
+  } catch {
+    return null
+  }
+}
+
+export function scopeHeaders(incoming: Headers): Record<string, string> {
+  const out: Record<string, string> = {}
+  const user = incoming.get('x-ms-client-principal-id')
+  if (!user) return out
+  out['X-User-Id'] = user
+  const tenant = principalTenant(incoming)
+  if (tenant) out['X-Tenant-Id'] = tenant
+  return out
+}
+
+export function upstream(url: string, init: UpstreamInit = {}): Promise<Response> {
+  const target = new URL(url)
+  const client = target.protocol === 'https:' ? https : http
+  const headers: Record<string, string> = { ...(init.headers || {}) }
+  if (init.acceptEncoding) headers['Accept-Encoding'] = init.acceptEncoding
+  if (init.body !== undefined) headers['Content-Length'] = String(Buffer.byteLength(init.body))
+
+  return new Promise((resolve, reject) => {
+    const req = client.request(target, { method: init.method || 'GET', headers }, res => {
+      const status = res.statusCode || 502
+      const out = new Headers()
+      for (const name of PASS_HEADERS) {
+        const v = res.headers[name]
+        if (v !== undefined) out.set(name, Array.isArray(v) ? v.join(', ') : v)
+      }
+      // 204 / 304 ではボディを返さない (Edge/Node ランタイムでエラー回避)
+      if (status === 204 || status === 304) {
+        res.resume()
+        resolve(new Response(null, { status, headers: out }))
+        return
+      }
+      resolve(new Response(Readable.toWeb(res) as ReadableStream<Uint8Array>, { status, headers: out }))
+    })
+    req.on('error', reject)
+    if (init.body !== undefined) req.write(init.body)
+    req.end()
+  })
+}